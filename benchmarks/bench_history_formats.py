@@ -0,0 +1,83 @@
+"""Benchmark save/load throughput and file size for each history file format and CSV compression codec.
+
+Throughput is in MB/s of uncompressed CSV, so codecs compare on the work they save, and the
+ratio is the uncompressed CSV size over the file size.
+
+Usage:
+    python benchmarks/bench_history_formats.py --rows 1000000
+"""
+
+import argparse
+import importlib.util
+import os
+import sys
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from calculator.history_formats import read_history, write_history  # pylint: disable=wrong-import-position
+
+FILE_NAMES = {"csv": "history.csv", "npz": "history.npz", "parquet": "history.parquet", "feather": "history.feather",
+              "csv.gzip": "history.csv.gz", "csv.zstd": "history.csv.zst", "csv.lz4": "history.csv.lz4"}
+
+# Python packages each compression codec needs, beyond the standard library
+CODEC_PACKAGES = {"gzip": None, "zstd": "zstandard", "lz4": "lz4"}
+
+def make_history(rows: int) -> pd.DataFrame:
+    """Build a synthetic history with a realistic mix of operations."""
+    rng = np.random.default_rng(601)
+    operations = np.array(["add", "subtract", "multiply", "divide", "sin", "cos", "tan", "sqrt"])
+    operand1 = rng.uniform(-1000, 1000, rows)
+    operand2 = rng.uniform(-1000, 1000, rows)
+    chosen = operations[rng.integers(0, len(operations), rows)]
+    operand2[np.isin(chosen, ["sin", "cos", "tan", "sqrt"])] = np.nan
+    return pd.DataFrame({"operation": chosen, "operand1": operand1, "operand2": operand2, "result": operand1 * 1.5})
+
+def bench_format(frame: pd.DataFrame, fmt: str, directory: str, csv_bytes: int) -> dict:
+    """Time one write and one read of the frame in the given format (csv.<codec> for compressed CSV)."""
+    file_path = os.path.join(directory, FILE_NAMES[fmt])
+    start = time.perf_counter()
+    write_history(frame, file_path)
+    write_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    loaded = read_history(file_path)
+    read_seconds = time.perf_counter() - start
+    assert len(loaded) == len(frame)
+    size = os.path.getsize(file_path)
+    return {"format": fmt, "write_s": write_seconds, "read_s": read_seconds, "size_mb": size / 1e6,
+            "write_mb_s": csv_bytes / 1e6 / write_seconds, "read_mb_s": csv_bytes / 1e6 / read_seconds,
+            "ratio": csv_bytes / size}
+
+def available_formats() -> list:
+    """The formats and CSV codecs whose optional packages are installed."""
+    formats = ["csv", "npz"]
+    if importlib.util.find_spec("pyarrow") is not None:
+        formats += ["parquet", "feather"]
+    for codec, package in CODEC_PACKAGES.items():
+        if package is None or importlib.util.find_spec(package) is not None:
+            formats.append(f"csv.{codec}")
+    return formats
+
+def run(rows: int) -> list:
+    """Benchmark every available format and codec and return one result dictionary each."""
+    frame = make_history(rows)
+    csv_bytes = len(frame.to_csv(index=False).encode())
+    with tempfile.TemporaryDirectory() as directory:
+        return [bench_format(frame, fmt, directory, csv_bytes) for fmt in available_formats()]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    arguments = parser.parse_args()
+
+    print(f"{'format':<10}{'write (s)':>12}{'read (s)':>12}{'write MB/s':>12}{'read MB/s':>12}"
+          f"{'size (MB)':>12}{'ratio':>8}")
+    for result in run(arguments.rows):
+        print(f"{result['format']:<10}{result['write_s']:>12.3f}{result['read_s']:>12.3f}{result['write_mb_s']:>12.1f}"
+              f"{result['read_mb_s']:>12.1f}{result['size_mb']:>12.1f}{result['ratio']:>8.2f}")
+
+if __name__ == "__main__":
+    main()
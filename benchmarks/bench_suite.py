@@ -0,0 +1,312 @@
+"""Microbenchmark suite for operations, precision, batches, history, persistence and command dispatch.
+
+Usage:
+    python benchmarks/bench_suite.py --output benchmarks/baseline.json
+    python benchmarks/bench_suite.py --compare benchmarks/baseline.json
+    python -m pytest -m benchmark --benchmark-json benchmarks/latest.json
+
+Each benchmark reports the best of several repeats in nanoseconds per operation. Logging is
+disabled while the suite runs, so the numbers measure the code rather than the log handlers.
+"""
+
+import argparse
+import contextlib
+from datetime import datetime, timezone
+import decimal
+from decimal import Decimal
+import importlib.util
+import io
+import json
+import logging
+import os
+import platform
+import sys
+import tempfile
+import threading
+import time
+import timeit
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# pylint: disable=wrong-import-position
+from calculator import Calculator, batch, decimal_math, operations
+from calculator.calculation import Calculation
+from calculator.calculations import Calculations
+from calculator.commands import CommandHandler
+from calculator.plugins import PluginLoader
+
+HISTORY_ROWS = (1_000, 100_000, 1_000_000)
+PERSIST_ROWS = 100_000
+QUICK_HISTORY_ROWS = (1_000, 10_000)
+QUICK_PERSIST_ROWS = 10_000
+
+FILE_NAMES = {"csv": "history.csv", "npz": "history.npz", "records": "history.rec",
+              "parquet": "history.parquet", "feather": "history.feather"}
+
+# Regressions beyond this ratio to the baseline are flagged by --compare
+REGRESSION_THRESHOLD = 1.10
+
+A = Decimal("12.5")
+B = Decimal("3.25")
+
+def measure(function, number: int, repeat: int = 5) -> dict:
+    """Times function number times per repeat and returns the best repeat in ns per call."""
+    number = max(int(number), 1)
+    best = min(timeit.repeat(function, number=number, repeat=repeat))
+    return {"ns_per_op": best / number * 1e9, "number": number, "repeat": repeat}
+
+def fill_history(rows: int):
+    """Replaces the in-memory history with rows synthetic calculations."""
+    Calculations.clear_history()
+    rng = np.random.default_rng(601)
+    operand1 = rng.uniform(-1000, 1000, rows)
+    operand2 = rng.uniform(-1000, 1000, rows)
+    Calculations.record_batch("add", operand1, operand2, operand1 + operand2)
+
+def bench_operations(scale: float) -> dict:
+    """The calculator.operations kernels on Decimal operands."""
+    results = {}
+    for name in ("add", "subtract", "multiply", "divide"):
+        kernel = getattr(operations, name)
+        results[f"operations.{name}"] = measure(lambda kernel=kernel: kernel(A, B), 200_000 * scale)
+    for name in ("sin", "cos", "tan", "sqrt"):
+        kernel = getattr(operations, name)
+        results[f"operations.{name}"] = measure(lambda kernel=kernel: kernel(A), 200_000 * scale)
+    return results
+
+# Digits requested from decimal_math in the precision benchmark; 15 and below use float maths
+PRECISION_DIGITS = (15, 28, 50, 100, 500, 1000)
+
+def bench_precision(scale: float) -> dict:
+    """decimal_math sin/cos/tan/sqrt at increasing digits, next to the default float engine."""
+    results = {}
+    for name in ("sin", "cos", "tan", "sqrt"):
+        kernel = getattr(operations, name)
+        results[f"precision.{name}.float"] = measure(lambda kernel=kernel: kernel(A), 20_000 * scale)
+        engine = getattr(decimal_math, name)
+        for digits in PRECISION_DIGITS:
+            engine(A, digits)  # Computes and caches pi outside the timed loop
+            number = 20_000 * scale * decimal_math.FLOAT_DIGITS / digits
+            results[f"precision.{name}.digits_{digits}"] = measure(
+                lambda engine=engine, digits=digits: engine(A, digits), number, repeat=3)
+    return results
+
+def bench_calculator(scale: float) -> dict:
+    """Calculator.* end to end: calculation, cache lookup (if enabled) and history recording."""
+    results = {}
+    for name in ("add", "subtract", "multiply", "divide"):
+        method = getattr(Calculator, name)
+        Calculations.clear_history()
+        results[f"calculator.{name}"] = measure(lambda method=method: method(A, B), 20_000 * scale)
+    for name in ("sin", "cos", "tan", "sqrt"):
+        method = getattr(Calculator, name)
+        Calculations.clear_history()
+        results[f"calculator.{name}"] = measure(lambda method=method: method(A), 20_000 * scale)
+    Calculations.clear_history()
+    return results
+
+def bench_history_append(history_rows, scale: float) -> dict:
+    """Calculations.add_calculation on a history that already holds N rows."""
+    results = {}
+    calculation = Calculation.create(A, B, operations.add)
+    for rows in history_rows:
+        fill_history(rows)
+        results[f"history.add_calculation.{rows}"] = measure(
+            lambda: Calculations.add_calculation(calculation), 10_000 * scale, repeat=3)
+    Calculations.clear_history()
+    return results
+
+def bench_history_query(history_rows, scale: float) -> dict:
+    """A narrow range query on result, scanning the history and with a sorted index."""
+    results = {}
+    for rows in history_rows:
+        fill_history(rows)
+        query = lambda: Calculations.query("result", low=0.0, high=1.0)  # pylint: disable=unnecessary-lambda-assignment
+        results[f"history.query.scan.{rows}"] = measure(query, 1_000_000 * scale / rows, repeat=3)
+        Calculations.configure_indexes(["result"])
+        query()  # Builds the sorted arrays, so only lookups are timed
+        results[f"history.query.index.{rows}"] = measure(query, 2_000 * scale, repeat=3)
+        Calculations.configure_indexes(None)
+    Calculations.clear_history()
+    return results
+
+def bench_concurrent_recording(scale: float) -> dict:
+    """Calculations.record_calculation from 1, 2, 4 and 8 threads at once, in ns per recorded row."""
+    results = {}
+    calculation = Calculation.create(A, B, operations.add)
+    calculation.perform()
+    rows_per_thread = max(int(80_000 * scale), 1)
+    for threads in (1, 2, 4, 8):
+        Calculations.clear_history()
+        barrier = threading.Barrier(threads + 1)
+
+        def record():
+            barrier.wait()
+            for _ in range(rows_per_thread):
+                Calculations.record_calculation(calculation)
+
+        workers = [threading.Thread(target=record) for _ in range(threads)]
+        for worker in workers:
+            worker.start()
+        start = time.perf_counter()
+        barrier.wait()
+        for worker in workers:
+            worker.join()
+        recorded = Calculations.history_length()  # Includes merging the queued rows
+        elapsed = time.perf_counter() - start
+        results[f"history.record_threads.{threads}"] = {
+            "ns_per_op": elapsed / recorded * 1e9, "number": recorded, "repeat": 1}
+    Calculations.clear_history()
+    return results
+
+def bench_parallel_batch(scale: float) -> dict:
+    """batch.evaluate_decimal on 1, 2, 4 and 8 worker processes, in ns per element.
+
+    Covers sqrt at the default precision and divide at 1000 digits. Starting the pools is not
+    timed. Batches under batch.PARALLEL_MIN_ROWS run in-process whatever the worker count.
+    """
+    results = {}
+    rows = max(int(200_000 * scale), 1)
+    sqrt_operands = [Decimal(i + 1) / 7 for i in range(rows)]
+    divide_rows = max(rows // 10, 1)
+    with decimal.localcontext() as context:
+        context.prec = 1000
+        divide_operands = [Decimal(i + 1) / 7 for i in range(divide_rows)]
+        divisor = Decimal(3) ** 500 / 7
+    for workers in (1, 2, 4, 8):
+        if workers > 1 and rows >= batch.PARALLEL_MIN_ROWS:
+            batch.get_pool(workers).submit(int).result()  # Wait for the pool to start
+        results[f"batch.sqrt.workers.{workers}"] = measure(
+            lambda workers=workers: batch.evaluate_decimal("sqrt", sqrt_operands, workers=workers), 1, repeat=3)
+        results[f"batch.sqrt.workers.{workers}"]["ns_per_op"] /= rows
+        with decimal.localcontext() as context:
+            context.prec = 1000
+            results[f"batch.divide_1000_digits.workers.{workers}"] = measure(
+                lambda workers=workers: batch.evaluate_decimal("divide", divide_operands, divisor, workers=workers),
+                1, repeat=3)
+        results[f"batch.divide_1000_digits.workers.{workers}"]["ns_per_op"] /= divide_rows
+    batch.shutdown_pools()
+    return results
+
+def available_formats() -> list:
+    """The history file formats that can be written in this environment."""
+    formats = ["csv", "npz", "records"]
+    if importlib.util.find_spec("pyarrow") is not None:
+        formats += ["parquet", "feather"]
+    return formats
+
+def bench_persistence(persist_rows: int) -> dict:
+    """save_history and load_history of persist_rows rows in each available format."""
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for fmt in available_formats():
+            file_path = os.path.join(directory, FILE_NAMES[fmt])
+            fill_history(persist_rows)
+            results[f"history.save.{fmt}"] = measure(lambda file_path=file_path: Calculations.save_history(file_path),
+                                                     1, repeat=3)
+            results[f"history.load.{fmt}"] = measure(lambda file_path=file_path: Calculations.load_history(file_path),
+                                                     1, repeat=3)
+            Calculations.clear_history()  # Drops the memory map before the file is removed
+    return results
+
+def bench_dispatch(scale: float) -> dict:
+    """CommandHandler.execute_command for plugin commands, with their output discarded."""
+    command_handler = CommandHandler()
+    PluginLoader(command_handler).load_plugins()
+    results = {}
+    with contextlib.redirect_stdout(io.StringIO()):
+        for name, args in (("add", (A, B)), ("sin", (A,)), ("menu", ())):
+            command_handler.execute_command(name, *args)  # Resolve the plugin outside the timed loop
+            results[f"commands.execute.{name}"] = measure(
+                lambda name=name, args=args: command_handler.execute_command(name, *args), 10_000 * scale)
+    Calculations.clear_history()
+    return results
+
+def run_suite(quick: bool = False, history_rows=None, persist_rows: int = None, scale: float = None) -> dict:
+    """Runs every benchmark and returns {"meta": ..., "results": {name: measurement}}."""
+    history_rows = history_rows or (QUICK_HISTORY_ROWS if quick else HISTORY_ROWS)
+    persist_rows = persist_rows or (QUICK_PERSIST_ROWS if quick else PERSIST_ROWS)
+    scale = scale or (0.1 if quick else 1.0)
+
+    results = {}
+    logging.disable(logging.CRITICAL)
+    try:
+        results.update(bench_operations(scale))
+        results.update(bench_precision(scale))
+        results.update(bench_calculator(scale))
+        results.update(bench_history_append(history_rows, scale))
+        results.update(bench_history_query(history_rows, scale))
+        results.update(bench_concurrent_recording(scale))
+        results.update(bench_parallel_batch(scale))
+        results.update(bench_persistence(persist_rows))
+        results.update(bench_dispatch(scale))
+    finally:
+        logging.disable(logging.NOTSET)
+        Calculations.clear_history()
+
+    return {
+        "meta": {
+            "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "quick": quick,
+            "history_rows": list(history_rows),
+            "persist_rows": persist_rows
+        },
+        "results": results
+    }
+
+def write_results(report: dict, file_path: str):
+    """Writes a suite report as JSON."""
+    with open(file_path, "w", encoding="utf-8") as report_file:
+        json.dump(report, report_file, indent=2, sort_keys=True)
+
+def compare(report: dict, baseline: dict, threshold: float = REGRESSION_THRESHOLD) -> list:
+    """Returns (name, baseline ns, current ns, ratio, regressed) for every benchmark present in both reports."""
+    rows = []
+    for name, current in sorted(report["results"].items()):
+        previous = baseline["results"].get(name)
+        if previous is None:
+            continue
+        ratio = current["ns_per_op"] / previous["ns_per_op"]
+        rows.append((name, previous["ns_per_op"], current["ns_per_op"], ratio, ratio > threshold))
+    return rows
+
+def format_ns(value: float) -> str:
+    """Formats a duration in nanoseconds with a readable unit."""
+    for unit, size in (("s", 1e9), ("ms", 1e6), ("us", 1e3)):
+        if value >= size:
+            return f"{value / size:.2f} {unit}"
+    return f"{value:.0f} ns"
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--quick", action="store_true", help="smaller histories and fewer iterations")
+    parser.add_argument("--output", metavar="PATH", help="write the results to a JSON file")
+    parser.add_argument("--compare", metavar="PATH", help="compare the results with a JSON baseline")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD,
+                        help="ratio to the baseline reported as a regression (default: %(default)s)")
+    arguments = parser.parse_args()
+
+    report = run_suite(quick=arguments.quick)
+    if arguments.output:
+        write_results(report, arguments.output)
+
+    if not arguments.compare:
+        print(f"{'benchmark':<36}{'per op':>14}")
+        for name, result in sorted(report["results"].items()):
+            print(f"{name:<36}{format_ns(result['ns_per_op']):>14}")
+        return 0
+
+    with open(arguments.compare, encoding="utf-8") as baseline_file:
+        baseline = json.load(baseline_file)
+    rows = compare(report, baseline, arguments.threshold)
+    print(f"{'benchmark':<36}{'baseline':>14}{'current':>14}{'ratio':>8}")
+    for name, previous, current, ratio, regressed in rows:
+        flag = "  REGRESSION" if regressed else ""
+        print(f"{name:<36}{format_ns(previous):>14}{format_ns(current):>14}{ratio:>8.2f}{flag}")
+    return 1 if any(row[4] for row in rows) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,103 @@
+"""Load generator for the calculator JSON-lines server.
+
+Usage:
+    python main.py --serve 127.0.0.1:8765
+    python benchmarks/load_client.py --address 127.0.0.1:8765 --connections 8 --requests 100000 --pipeline 32
+
+Each connection keeps up to --pipeline requests outstanding. Latency is measured from writing
+a request to reading its response, and the report gives requests/sec and p50/p95/p99/max latency.
+"""
+
+import argparse
+import asyncio
+import collections
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# pylint: disable=wrong-import-position
+from calculator.metrics import LatencyHistogram
+from calculator.server import parse_address
+
+async def open_connection(address: str):
+    """Opens a stream connection to "HOST:PORT" or "unix:PATH"."""
+    kind, host_or_path, port = parse_address(address)
+    if kind == "unix":
+        return await asyncio.open_unix_connection(host_or_path)
+    return await asyncio.open_connection(host_or_path, port)
+
+async def run_connection(address: str, requests: int, pipeline: int, payload: bytes, histogram: LatencyHistogram):
+    """Sends requests copies of payload over one connection with up to pipeline outstanding."""
+    reader, writer = await open_connection(address)
+    window = asyncio.Semaphore(pipeline)
+    sent_at = collections.deque()
+
+    async def send():
+        for _ in range(requests):
+            await window.acquire()
+            sent_at.append(time.perf_counter_ns())
+            writer.write(payload)
+            await writer.drain()
+
+    async def receive():
+        for _ in range(requests):
+            line = await reader.readline()
+            if not line:
+                raise ConnectionError("server closed the connection")
+            response = json.loads(line)
+            histogram.record(time.perf_counter_ns() - sent_at.popleft(), error=not response.get("ok"))
+            window.release()
+
+    try:
+        await asyncio.gather(send(), receive())
+    finally:
+        writer.close()
+        await writer.wait_closed()
+
+async def run_load(address: str, connections: int = 4, requests: int = 10_000, pipeline: int = 16,
+                   command: str = "add", args=("1", "2")) -> dict:
+    """Runs the load and returns throughput and latency figures (latencies in microseconds).
+
+    requests is the total across all connections.
+    """
+    payload = (json.dumps({"cmd": command, "args": list(args)}) + "\n").encode()
+    histogram = LatencyHistogram()
+    per_connection = [requests // connections + (1 if i < requests % connections else 0) for i in range(connections)]
+    start = time.perf_counter()
+    await asyncio.gather(*(run_connection(address, count, pipeline, payload, histogram)
+                           for count in per_connection if count))
+    elapsed = time.perf_counter() - start
+    report = histogram.summary()
+    report.update(elapsed_s=elapsed, requests_per_sec=histogram.count / elapsed if elapsed > 0 else 0.0,
+                  connections=connections, pipeline=pipeline)
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--address", default="127.0.0.1:8765", help="HOST:PORT or unix:PATH (default: %(default)s)")
+    parser.add_argument("--connections", type=int, default=4, help="concurrent connections (default: %(default)s)")
+    parser.add_argument("--requests", type=int, default=10_000, help="total requests (default: %(default)s)")
+    parser.add_argument("--pipeline", type=int, default=16,
+                        help="outstanding requests per connection (default: %(default)s)")
+    parser.add_argument("--cmd", default="add", help="command to send (default: %(default)s)")
+    parser.add_argument("args", nargs="*", default=["1", "2"], help="command arguments (default: 1 2)")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    arguments = parser.parse_args()
+
+    report = asyncio.run(run_load(arguments.address, arguments.connections, arguments.requests,
+                                  arguments.pipeline, arguments.cmd, arguments.args))
+    if arguments.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"{report['count']} requests ({report['errors']} errors) in {report['elapsed_s']:.3f}s "
+              f"over {report['connections']} connections, pipeline {report['pipeline']}")
+        print(f"throughput: {report['requests_per_sec']:.0f} requests/sec")
+        print(f"latency us: mean {report['mean_us']:.1f}  p50 {report['p50_us']:.1f}  p95 {report['p95_us']:.1f}  "
+              f"p99 {report['p99_us']:.1f}  max {report['max_us']:.1f}")
+    return 1 if report["errors"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,8 +2,10 @@ from calculator.calculations import Calculations
 from calculator.history_facade.history_facade import HistoryFacade
 from calculator.operations import add, subtract, multiply, divide, cos, sin, tan, sqrt 
 from calculator.calculation import Calculation 
+from calculator.metrics import get_metrics
 from decimal import Decimal 
-from typing import Callable 
+import time
+from typing import Callable, Union
 import logging
 
 # Set up logging for this module
@@ -14,18 +16,28 @@ class Calculator:
 
     @staticmethod
     def _perform_operation(a: Decimal, b: Decimal, operation: Callable[[Decimal, Decimal], Decimal]) -> Decimal:
-        """Create and perform a calculation, then return the result."""
+        """Create and perform a calculation, record it in history, then return the result."""
         logger.debug("Performing operation: %s with a: %s, b: %s", operation, a, b)
-        
-        calculation = Calculation.create(a, b, operation)
-        logger.info("Created calculation: %s", calculation)
+        metrics = get_metrics()
+        start = time.perf_counter_ns()
 
-        # Use HistoryFacade to add the calculation
-        HistoryFacade().add_calculation(calculation)  # Add calculation to HistoryFacade
-        logger.info("Added calculation to history via HistoryFacade: %s", calculation)
+        try:
+            calculation = Calculation.create(a, b, operation)
+            logger.info("Created calculation: %s", calculation)
 
-        result = calculation.perform()
-        logger.info("Performed operation: %s with result: %s", operation, result)
+            # Compute the result once, then record it through HistoryFacade
+            result = calculation.perform()
+            logger.info("Performed operation: %s with result: %s", operation, result)
+
+            HistoryFacade().record_calculation(calculation)
+            logger.info("Recorded calculation in history via HistoryFacade: %s", calculation)
+        except Exception:
+            if metrics is not None:
+                metrics.record(f"operation.{operation.__name__}", time.perf_counter_ns() - start, error=True)
+            raise
+
+        if metrics is not None:
+            metrics.record(f"operation.{operation.__name__}", time.perf_counter_ns() - start)
         return result
 
     @staticmethod
@@ -71,3 +83,48 @@ class Calculator:
     def sqrt(a: Decimal) -> Decimal:
         logger.debug("Calculating sqrt(%s)", a)
         return Calculator._perform_operation(a, None, sqrt)
+
+    @staticmethod
+    def evaluate_many(operation: Union[str, Callable], a_values, b_values=None, errors: str = "raise",
+                      workers: int = None):
+        """Evaluate one operation over arrays of operands and record the whole batch in history.
+
+        By default operands are evaluated as NumPy float arrays. With workers set, the exact
+        calculator.operations Decimal kernels are used instead, split into chunks over that many
+        worker processes (see batch.evaluate_decimal), and an object array of Decimals is
+        returned. With errors="raise" a divide by zero or a negative square root anywhere in the
+        batch raises ValueError and nothing is recorded. With errors="mask" the failed elements
+        are masked in the returned array and only the valid rows are recorded.
+        """
+        import numpy as np  # NumPy is only imported once a batch is evaluated  # pylint: disable=import-outside-toplevel
+        from calculator import batch  # pylint: disable=import-outside-toplevel
+
+        if errors not in ("raise", "mask"):
+            raise ValueError(f"errors must be 'raise' or 'mask', not {errors!r}")
+        operation_name = operation if isinstance(operation, str) else operation.__name__
+        logger.debug("Evaluating %s over a batch of operands", operation_name)
+
+        if workers is None:
+            a, b, results, invalid = batch.evaluate(operation_name, a_values, b_values)
+            error = batch.ERROR_MESSAGES.get(operation_name)
+            recorded_a, recorded_b, recorded_results = a, b, results
+        else:
+            a, b, results, invalid, error = batch.evaluate_decimal(operation_name, a_values, b_values, workers)
+            # History columns are floats
+            recorded_a, recorded_b = a.astype(float), None if b is None else b.astype(float)
+            recorded_results = results.astype(float)
+        error_count = int(invalid.sum())
+        if error_count and errors == "raise":
+            raise ValueError(error)
+
+        if error_count:
+            valid = ~invalid
+            HistoryFacade().record_batch(operation_name, recorded_a[valid],
+                                         None if recorded_b is None else recorded_b[valid], recorded_results[valid])
+        else:
+            HistoryFacade().record_batch(operation_name, recorded_a, recorded_b, recorded_results)
+        logger.info("Evaluated %s batch of %d with %d errors", operation_name, results.size, error_count)
+
+        if errors == "mask":
+            return np.ma.masked_array(results, mask=invalid)
+        return results
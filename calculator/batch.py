@@ -0,0 +1,202 @@
+from concurrent.futures import ProcessPoolExecutor
+import decimal
+from decimal import Decimal
+import logging
+import multiprocessing
+import threading
+import numpy as np
+from calculator import decimal_math, operations
+
+# Set up logging for this module
+logger = logging.getLogger(__name__)
+
+# NumPy ufunc equivalents of the calculator.operations kernels, keyed by operation name
+VECTORIZED_OPERATIONS = {
+    "add": np.add,
+    "subtract": np.subtract,
+    "multiply": np.multiply,
+    "divide": np.divide,
+    "sin": np.sin,
+    "cos": np.cos,
+    "tan": np.tan,
+    "sqrt": np.sqrt
+}
+
+UNARY_OPERATIONS = {"sin", "cos", "tan", "sqrt"}
+
+# Same messages the scalar kernels raise, so batch errors read like single-call errors
+ERROR_MESSAGES = {
+    "divide": "Cannot divide by zero",
+    "sqrt": "Cannot take the square root of a negative number"
+}
+
+def error_mask(operation_name: str, a: np.ndarray, b: np.ndarray = None) -> np.ndarray:
+    """Returns a boolean mask of the elements the scalar kernel would reject."""
+    if operation_name == "divide":
+        return b == 0
+    if operation_name == "sqrt":
+        return a < 0
+    return np.zeros(a.shape, dtype=bool)
+
+def evaluate(operation_name: str, a, b=None):
+    """Evaluates an operation over operand arrays.
+
+    Returns a tuple of (a, b, results, invalid) where a and b are the operands as float arrays,
+    and invalid is a boolean mask of elements that failed (their result is NaN).
+    """
+    ufunc = VECTORIZED_OPERATIONS.get(operation_name)
+    if ufunc is None:
+        raise ValueError(f"Unknown operation: {operation_name}")
+
+    a = np.atleast_1d(np.asarray(a, dtype=float))
+    if operation_name in UNARY_OPERATIONS:
+        if b is not None:
+            raise ValueError(f"{operation_name} takes a single operand array")
+        invalid = error_mask(operation_name, a)
+        with np.errstate(invalid='ignore'):
+            results = ufunc(a)
+    else:
+        if b is None:
+            raise ValueError(f"{operation_name} requires two operand arrays")
+        a, b = np.broadcast_arrays(a, np.asarray(b, dtype=float))
+        invalid = error_mask(operation_name, a, b)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            results = ufunc(a, b)
+
+    if results.ndim > 1:
+        raise ValueError(f"{operation_name} takes one-dimensional operand arrays, got shape {results.shape}")
+    results[invalid] = np.nan
+    logger.debug("Evaluated %s over %d elements (%d invalid).", operation_name, results.size, invalid.sum())
+    return a, b, results, invalid
+
+# Operands per task sent to a worker process
+PARALLEL_CHUNK_SIZE = 4096
+
+# Batches smaller than this run in the calling process, where pickling would cost more than it saves
+PARALLEL_MIN_ROWS = 8192
+
+_pools = {}  # Worker count -> ProcessPoolExecutor, kept for reuse between batches
+_pools_lock = threading.Lock()
+
+def get_pool(workers: int) -> ProcessPoolExecutor:
+    """Returns the shared process pool with the given number of workers, starting it on first use.
+
+    Workers are spawned rather than forked, so they never inherit locks held by the logging
+    queue or history threads of the parent.
+    """
+    with _pools_lock:
+        pool = _pools.get(workers)
+        if pool is None:
+            pool = _pools[workers] = ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn"))
+            logger.info("Started a process pool with %d workers.", workers)
+        return pool
+
+def shutdown_pools():
+    """Stops every shared process pool."""
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.shutdown(wait=True)
+
+def _to_decimal(value) -> Decimal:
+    if isinstance(value, Decimal):
+        return value
+    if isinstance(value, float):
+        return Decimal(repr(value))  # So 0.1 stays 0.1
+    return Decimal(value)
+
+def _decimal_operands(values) -> list:
+    """Converts a scalar, sequence or array of operands to a list of Decimals."""
+    if isinstance(values, np.ndarray):
+        if values.ndim > 1:
+            raise ValueError(f"Operand arrays must be one-dimensional, got shape {values.shape}")
+        values = values.ravel().tolist()
+    elif isinstance(values, (Decimal, int, float, str)):
+        values = [values]
+    return [_to_decimal(value) for value in values]
+
+def _object_array(values: list) -> np.ndarray:
+    # fromiter skips the per-element sequence checks np.array does on object input
+    return np.fromiter(values, dtype=object, count=len(values))
+
+def evaluate_chunk(operation_name: str, a: list, b: list, context: decimal.Context, precision: int = None) -> tuple:
+    """Runs the calculator.operations kernel over one chunk of operands (b is None for unary operations).
+
+    context is the Decimal context and precision the decimal_math precision of the caller.
+
+    Returns (results, failed, error): failed elements are Decimal NaN in results and their
+    indices are listed in failed, and error is the message of the first failure, or None.
+    Runs in worker processes, so it only takes picklable arguments.
+    """
+    if decimal_math.get_precision() != precision:
+        decimal_math.configure_precision(precision)
+    kernel = getattr(operations, operation_name)
+    nan = Decimal("NaN")
+    results = []
+    failed = []
+    error = None
+    with decimal.localcontext(context):
+        for index, operand1 in enumerate(a):
+            try:
+                results.append(kernel(operand1) if b is None else kernel(operand1, b[index]))
+            except (ValueError, ArithmeticError) as e:
+                results.append(nan)
+                failed.append(index)
+                error = error or str(e)
+    return results, failed, error
+
+def evaluate_decimal(operation_name: str, a, b=None, workers: int = 1, chunk_size: int = PARALLEL_CHUNK_SIZE):
+    """Evaluates an operation with the exact Decimal kernels, split over worker processes.
+
+    The operands are cut into chunks of chunk_size, the chunks run on a shared pool of workers
+    processes, and the results are merged back in operand order. Batches under
+    PARALLEL_MIN_ROWS, or workers=1, run in this process. Every chunk uses the caller's Decimal
+    context and decimal_math precision. Returns (a, b, results, invalid, error) with Decimal
+    object arrays for a, b and results, a boolean mask of failed elements (their result is
+    Decimal NaN) and the first error message, or None.
+    """
+    if operation_name not in VECTORIZED_OPERATIONS:
+        raise ValueError(f"Unknown operation: {operation_name}")
+    if workers < 1:
+        raise ValueError("workers must be at least 1")
+
+    a = _decimal_operands(a)
+    if operation_name in UNARY_OPERATIONS:
+        if b is not None:
+            raise ValueError(f"{operation_name} takes a single operand array")
+    else:
+        if b is None:
+            raise ValueError(f"{operation_name} requires two operand arrays")
+        b = _decimal_operands(b)
+        if len(a) == 1 and len(b) > 1:  # Broadcast a single operand, like the float path
+            a = a * len(b)
+        elif len(b) == 1:
+            b = b * len(a)
+        elif len(a) != len(b):
+            raise ValueError(f"Operand arrays differ in length ({len(a)} and {len(b)})")
+
+    context = decimal.getcontext().copy()
+    size = len(a)
+    starts = range(0, size, chunk_size)
+    a_chunks = [a[start:start + chunk_size] for start in starts]
+    b_chunks = [None] * len(a_chunks) if b is None else [b[start:start + chunk_size] for start in starts]
+    count = len(a_chunks)
+    arguments = ([operation_name] * count, a_chunks, b_chunks, [context] * count,
+                 [decimal_math.get_precision()] * count)
+    if workers == 1 or size < PARALLEL_MIN_ROWS:
+        outputs = map(evaluate_chunk, *arguments)
+    else:
+        outputs = get_pool(workers).map(evaluate_chunk, *arguments)
+
+    results = []
+    invalid = np.zeros(size, dtype=bool)
+    error = None
+    for chunk_results, chunk_failed, chunk_error in outputs:  # map yields the chunks in submission order
+        if chunk_failed:
+            invalid[np.asarray(chunk_failed) + len(results)] = True
+        results.extend(chunk_results)
+        error = error or chunk_error
+    logger.debug("Evaluated %s over %d elements in %d chunks on %d workers (%d invalid).",
+                 operation_name, size, len(a_chunks), workers, invalid.sum())
+    return _object_array(a), None if b is None else _object_array(b), _object_array(results), invalid, error
@@ -0,0 +1,117 @@
+from collections import OrderedDict
+import decimal
+from decimal import Decimal
+import logging
+import os
+import threading
+
+# Set up logging for this module
+logger = logging.getLogger(__name__)
+
+EVICTION_POLICIES = ("lru", "fifo")
+
+class CalculationCache:
+    """A bounded cache of calculation results keyed by (operation, a, b, precision, rounding).
+
+    With the "lru" policy a hit moves the entry to the back of the eviction order, so the
+    least recently used entry is evicted first. With "fifo" entries are evicted in insertion order.
+    The cache is safe to share between threads.
+    """
+
+    def __init__(self, maxsize: int = 1024, policy: str = "lru"):
+        if maxsize < 1:
+            raise ValueError("Cache size must be at least 1")
+        if policy not in EVICTION_POLICIES:
+            raise ValueError(f"Unknown cache eviction policy: {policy}")
+        self.maxsize = maxsize
+        self.policy = policy
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key, default=None):
+        """Returns the cached result for key, or default if it is not cached."""
+        with self._lock:
+            try:
+                value = self._entries[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            if self.policy == "lru":
+                self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        """Stores a result, evicting the oldest entry if the cache is full."""
+        with self._lock:
+            self._entries[key] = value
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """Removes all entries and resets the counters."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> dict:
+        """Returns the cache counters."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "policy": self.policy
+        }
+
+def _freeze(value):
+    """Returns a hashable key part that tells apart equal Decimals with different exponents (1 vs 1.0)."""
+    if isinstance(value, Decimal):
+        return value.as_tuple()
+    return value
+
+def cache_key(operation, a, b):
+    """Builds the cache key for an operation, its operands and the precision and rounding of the active decimal context.
+
+    Results are rounded to the context they were computed under, so the same operands under a
+    different decimal.localcontext() must miss.
+    """
+    context = decimal.getcontext()
+    return (operation, _freeze(a), _freeze(b), context.prec, context.rounding)
+
+_cache = None  # The active CalculationCache, or None when caching is disabled
+
+def get_cache():
+    """Returns the active calculation cache, or None if caching is disabled."""
+    return _cache
+
+def configure_cache(enabled: bool, maxsize: int = 1024, policy: str = "lru"):
+    """Enables (replacing any existing cache) or disables the calculation cache."""
+    global _cache  # pylint: disable=global-statement
+    _cache = CalculationCache(maxsize, policy) if enabled else None
+    logger.info("Calculation cache %s (size=%s, policy=%s).", "enabled" if enabled else "disabled", maxsize, policy)
+    return _cache
+
+def configure_cache_from_env():
+    """Configures the calculation cache from CALCULATION_CACHE_* environment variables."""
+    enabled = os.getenv('CALCULATION_CACHE_ENABLED', 'false').strip().lower() in ('1', 'true', 'yes', 'on')
+    try:
+        maxsize = int(os.getenv('CALCULATION_CACHE_SIZE', '1024'))
+        if maxsize < 1:
+            raise ValueError(maxsize)
+    except ValueError:
+        logger.warning("Invalid CALCULATION_CACHE_SIZE. Defaulting to 1024.")
+        maxsize = 1024
+    policy = os.getenv('CALCULATION_CACHE_POLICY', 'lru').strip().lower()
+    if policy not in EVICTION_POLICIES:
+        logger.warning("Invalid CALCULATION_CACHE_POLICY '%s'. Defaulting to 'lru'.", policy)
+        policy = 'lru'
+    return configure_cache(enabled, maxsize, policy)
@@ -1,6 +1,7 @@
 from decimal import Decimal
 from typing import Callable
-from calculator.operations import add, subtract, multiply, divide
+from calculator.operations import OPCODES, OPERATIONS
+from calculator.cache import get_cache, cache_key
 import logging
 
 # Set up logging for this module
@@ -8,12 +9,18 @@ logger = logging.getLogger(__name__)
 
 class Calculation:
     """A class to represent a mathematical calculation that encapsulates two operands 
-    and an operation (such as addition, subtraction, etc.)"""
+    and an operation (such as addition, subtraction, etc.)
+
+    Calculations use __slots__ so that large numbers of them can be kept in memory cheaply.
+    """
+
+    __slots__ = ("operation", "a", "b", "result")
 
     def __init__(self, operation: Callable, a: Decimal, b: Decimal = None):
         self.operation = operation
         self.a = a
         self.b = b  # optional for unary operations
+        self.result = None  # set once perform() has run
         logger.debug("Initialized Calculation: a=%s, b=%s, operation=%s", a, b, operation)
 
     @staticmethod
@@ -21,14 +28,42 @@ class Calculation:
         """Static method to create a new Calculation instance"""
         # Adjust the operation to ensure it is callable and not a Decimal
         calculation = Calculation(operation, a, b)
-        logger.info("Created Calculation: %s", calculation)
+        logger.debug("Created Calculation: %s", calculation)
         return calculation
 
+    @staticmethod
+    def from_opcode(opcode: int, a: Decimal, b: Decimal = None) -> 'Calculation':
+        """Creates a Calculation from an integer opcode in the calculator.operations registry."""
+        return Calculation(OPERATIONS[opcode], a, b)
+
+    @property
+    def opcode(self) -> int:
+        """The integer opcode of the operation, or None if it is not a registered calculator operation."""
+        return OPCODES.get(self.operation)
+
     def perform(self) -> Decimal:
+        """Performs the operation, stores the result on the calculation and returns it.
+
+        When the calculation cache is enabled, a cached result for the same operation and
+        operands, computed under the same decimal precision and rounding, is reused instead of
+        calling the operation again.
+        """
+        cache = get_cache()
+        if cache is not None:
+            key = cache_key(self.operation, self.a, self.b)
+            result = cache.get(key)
+            if result is not None:
+                self.result = result
+                logger.debug("Cache hit for %s", self)
+                return result
+
         if self.b is None:
             result = self.operation(self.a)  # Unary
         else:
             result = self.operation(self.a, self.b)  # Binary
+        if cache is not None:
+            cache.put(key, result)
+        self.result = result
         logger.info("Performed %s: %s = %s", self.operation.__name__, self, result)
         return result
 
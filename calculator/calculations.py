@@ -1,80 +1,395 @@
-import pandas as pd
 import logging
+import os
+from typing import TYPE_CHECKING
 from calculator.calculation import Calculation
+from calculator.history_aggregates import OperationAggregates
+from calculator.history_buffer import ConcurrentHistory, HistoryBuffer, HistorySpill, RingHistoryBuffer, HISTORY_COLUMNS
+from calculator.history_index import HistoryIndexes
+
+if TYPE_CHECKING:  # pandas and the file formats are imported on first use to keep startup fast
+    import pandas as pd
 
 logger = logging.getLogger(__name__)
 
+def _frame_columns(frame: "pd.DataFrame") -> tuple:
+    """The (operation, operand1, operand2, result) columns of a history DataFrame, as extend() takes them."""
+    return frame["operation"].astype(str).tolist(), frame["operand1"], frame["operand2"], frame["result"]
+
 class Calculations:
     """A class to manage both in-memory and persistent calculation history using a Pandas DataFrame."""
 
-    # Initialize a DataFrame to store calculation history
-    _history_df = pd.DataFrame(columns=["operation", "operand1", "operand2", "result"])
+    # Columnar buffer holding the calculation history; a DataFrame is built from it on demand.
+    # ConcurrentHistory lets any number of threads record rows without blocking each other.
+    # Running per-operation statistics of the results, kept up to date by the ConcurrentHistory
+    _aggregates = OperationAggregates()
+    _history = ConcurrentHistory(HistoryBuffer(), [_aggregates])
+
+    # Optional sorted indexes for query() over unbounded in-memory history, reset by the ConcurrentHistory
+    _indexes = None
+
+    # Memory-mapped history loaded from a records file; the buffer holds the rows added after it
+    _mapped = None
+    # Aggregates of the mapped rows, computed on the first summarize() so loading stays O(1)
+    _mapped_aggregates = None
+
+    # Journal bookkeeping: the file whose snapshot plus journal holds the first _saved_rows rows of history
+    _journal_base = None
+    _saved_rows = 0
+
+    @classmethod
+    def configure_history(cls, max_rows: int = None, spill_path: str = None):
+        """Switches between unbounded history and a bounded ring buffer of max_rows rows.
+
+        In bounded mode, rows evicted from memory are appended to spill_path if one is given.
+        Rows currently in memory are kept (up to the new capacity); previously spilled rows are discarded.
+        """
+        if not max_rows and isinstance(cls._history.buffer, HistoryBuffer):
+            logger.info("Configured unbounded in-memory history.")
+            return  # Already unbounded
+        current = cls._history.to_frame() if len(cls._history) else None
+        if max_rows:
+            cls._drop_indexes("bounded")
+            spill = HistorySpill(spill_path) if spill_path else None
+            cls._history = ConcurrentHistory(RingHistoryBuffer(max_rows, spill), cls._observers())
+            logger.info("Configured bounded history of %d rows (spill file: %s).", max_rows, spill_path)
+        else:
+            cls._history = ConcurrentHistory(HistoryBuffer(), cls._observers())
+            logger.info("Configured unbounded in-memory history.")
+        cls._history.clear()  # The observers are rebuilt from the rows that are kept
+        if current is not None:
+            cls._extend_frame(current)
+        cls._journal_base = None  # Row counts restart with the new buffer, so the next save is a full snapshot
 
     @classmethod
     def add_calculation(cls, calculation: Calculation):
         """Adds a new calculation to the in-memory history and logs it."""
         # Perform the calculation to get the result
-        result = calculation.perform()
-        # Add the calculation to the DataFrame
+        calculation.perform()
+        cls.record_calculation(calculation)
+
+    @classmethod
+    def record_calculation(cls, calculation: Calculation):
+        """Records an already performed calculation, reusing its stored result instead of computing it again."""
+        result = calculation.result
+        if result is None:
+            raise ValueError(f"Calculation has not been performed: {calculation}")
+        # Append the calculation to the columnar history buffer
         new_entry = {
             "operation": calculation.operation.__name__,
             "operand1": float(calculation.a),
             "operand2": float(calculation.b) if calculation.b is not None else None,
             "result": float(result)
         }
-        # Create a DataFrame from the new entry
-        new_entry_df = pd.DataFrame([new_entry])
-        
-        # Check if history_df is empty or not
-        if cls._history_df.empty:
-            cls._history_df = new_entry_df
-        else:
-            cls._history_df = pd.concat([cls._history_df, new_entry_df], ignore_index=True)
-
-        #cls._history_df = pd.concat([cls._history_df, pd.DataFrame([new_entry])], ignore_index=True)
+        cls._history.append(**new_entry)
         logger.info("Added calculation to in-memory history: %s", new_entry)
 
+    @classmethod
+    def record_batch(cls, operation_name: str, operand1, operand2, results):
+        """Records a batch of results for one operation with a single columnar append."""
+        cls._history.extend(operation_name, operand1, operand2, results)
+        logger.info("Added %d %s calculations to in-memory history.", len(results), operation_name)
+
     @classmethod
     def get_last_calculation(cls):
         """Retrieves the most recent calculation from the in-memory history."""
-        if cls._history_df.empty:
+        last_entry = cls._history.last_row()
+        if last_entry is None and cls._mapped is not None:
+            last_entry = cls._mapped.last_row()  # Reads a single record from the mapped file
+        if last_entry is None:
             logger.warning("No calculations in history.")
             return None
-        last_entry = cls._history_df.iloc[-1]
-        logger.info("Retrieved last calculation: %s", last_entry.to_dict())
-        return last_entry.to_dict()
+        logger.info("Retrieved last calculation: %s", last_entry)
+        return last_entry
+
+    @classmethod
+    def get_history(cls, full: bool = False):
+        """Retrieves the in-memory history as a DataFrame.
+
+        With full=True, rows spilled to disk by a bounded history are included as well.
+        Rows of a memory-mapped history file come first; note that this reads all of them.
+        """
+        import pandas as pd  # pylint: disable=import-outside-toplevel
+        with cls._history.locked() as history:
+            if full and history.spilled_rows:
+                logger.debug("Retrieved full history including %d spilled rows.", history.spilled_rows)
+                frame = pd.concat(list(history.iter_frames()), ignore_index=True)
+            else:
+                logger.debug("Retrieved complete in-memory history.")
+                frame = history.to_frame()
+        if cls._mapped is not None and len(cls._mapped):
+            mapped = cls._mapped.to_frame()
+            frame = mapped if frame.empty else pd.concat([mapped, frame], ignore_index=True)
+        return frame
 
     @classmethod
-    def get_history(cls):
-        """Retrieves the entire in-memory history as a DataFrame."""
-        logger.debug("Retrieved complete in-memory history.")
-        return cls._history_df
+    def history_length(cls) -> int:
+        """Returns the number of history rows, counting mapped and spilled rows without reading them."""
+        mapped_rows = len(cls._mapped) if cls._mapped is not None else 0
+        with cls._history.locked() as history:
+            return mapped_rows + history.spilled_rows + len(history)
+
+    @classmethod
+    def slice_history(cls, start: int = None, stop: int = None):
+        """Returns history rows start:stop as a DataFrame.
+
+        Rows that come from a memory-mapped file are read straight from the mapping, and rows in
+        memory are taken from the buffer, so only the requested rows are loaded.
+        """
+        import numpy as np  # pylint: disable=import-outside-toplevel
+        import pandas as pd  # pylint: disable=import-outside-toplevel
+        with cls._history.locked() as history:
+            start, stop, _ = slice(start, stop).indices(cls.history_length())
+            mapped_rows = len(cls._mapped) if cls._mapped is not None else 0
+            parts = []
+            if start < mapped_rows:
+                parts.append(cls._mapped.slice(start, min(stop, mapped_rows)))
+            if stop > mapped_rows:
+                first, last = max(start - mapped_rows, 0), stop - mapped_rows
+                spilled_rows = history.spilled_rows
+                if first >= spilled_rows:  # In-memory rows only, taken without building the whole frame
+                    parts.append(history.take(np.arange(first - spilled_rows, last - spilled_rows)))
+                else:
+                    rest = pd.concat(list(history.iter_frames()), ignore_index=True)
+                    parts.append(rest.iloc[first:last])
+        parts = [part for part in parts if not part.empty]
+        if not parts:
+            return pd.DataFrame(columns=HISTORY_COLUMNS)
+        return parts[0].reset_index(drop=True) if len(parts) == 1 else pd.concat(parts, ignore_index=True)
+
+    @classmethod
+    def tail_history(cls, count: int):
+        """Returns the last count history rows as a DataFrame without reading the rest of a mapped file."""
+        total = cls.history_length()
+        return cls.slice_history(max(total - count, 0), total)
+
+    @classmethod
+    def iter_history(cls, chunksize: int = 100_000):
+        """Yields the full history (spilled rows first) as DataFrame chunks, reading spilled rows lazily."""
+        yield from cls._history.iter_frames(chunksize)
 
     @classmethod
     def clear_history(cls):
         """Clears the in-memory calculation history."""
-        cls._history_df = pd.DataFrame(columns=["operation", "operand1", "operand2", "result"])
+        with cls._history.locked():
+            cls._history.clear()  # Through the wrapper, so the aggregates are reset too
+            cls._mapped = cls._mapped_aggregates = None
+            cls._journal_base = None  # The next save must write a full snapshot
+            cls._saved_rows = 0
         logger.info("Cleared in-memory calculation history.")
 
+    @staticmethod
+    def journal_path(file_path: str) -> str:
+        """Returns the path of the append-only journal that belongs to a history snapshot file."""
+        return f"{file_path}.journal"
+
+    @classmethod
+    def save_history(cls, file_path: str, fmt: str = None, journal: bool = False, compression: str = None):
+        """Saves the full history, including any spilled rows, to a file.
+
+        The format (csv, parquet, feather, npz or records) is fmt if given, otherwise it is taken from the file extension.
+        CSV snapshots are compressed with compression (gzip, zstd or lz4) or, if it is not given, as a .gz, .zst or
+        .lz4 extension implies; the journal stays plain CSV.
+        With journal=True, only the rows added since the last save are appended to the CSV journal next to
+        file_path, as long as the snapshot at file_path already holds everything before them. Otherwise a
+        full snapshot is written and any old journal is removed.
+        """
+        from calculator.history_formats import write_history  # pylint: disable=import-outside-toplevel
+        # Rows recorded by other threads during the save stay queued, so _saved_rows matches the file
+        with cls._history.locked() as history:
+            if journal and cls._journal_base == file_path and os.path.exists(file_path):
+                cls._append_journal(file_path)
+            else:
+                write_history(cls.get_history(full=True), file_path, fmt, compression)
+                if os.path.exists(cls.journal_path(file_path)):
+                    os.remove(cls.journal_path(file_path))
+                cls._journal_base = file_path
+                logger.info("Saved calculation history to %s", file_path)
+            cls._saved_rows = history.total_rows
+
+    @classmethod
+    def _append_journal(cls, file_path: str):
+        """Appends the rows added since the last save to the journal of file_path."""
+        new_rows = cls._history.total_rows - cls._saved_rows
+        if new_rows <= 0:
+            logger.debug("No new history rows to journal.")
+            return
+        frame = cls._history.to_frame() if new_rows <= len(cls._history) else cls.get_history(full=True)
+        if new_rows > len(frame):
+            logger.warning("%d unsaved rows were evicted without a spill file and cannot be journaled.",
+                           new_rows - len(frame))
+            new_rows = len(frame)
+        journal_path = cls.journal_path(file_path)
+        frame.iloc[len(frame) - new_rows:].to_csv(
+            journal_path, mode='a', header=not os.path.exists(journal_path), index=False)
+        logger.info("Appended %d rows to history journal %s", new_rows, journal_path)
+
     @classmethod
-    def save_history(cls, file_path: str):
-        """Saves the in-memory history to a CSV file."""
-        cls._history_df.to_csv(file_path, index=False)
-        logger.info("Saved calculation history to %s", file_path)
+    def _read_snapshot_and_journal(cls, file_path: str, fmt: str = None) -> "pd.DataFrame":
+        """Reads a snapshot and, if present, its journal tail as one DataFrame."""
+        import pandas as pd  # pylint: disable=import-outside-toplevel
+        from calculator.history_formats import read_history  # pylint: disable=import-outside-toplevel
+        frame = read_history(file_path, fmt)
+        journal_path = cls.journal_path(file_path)
+        if os.path.exists(journal_path):
+            tail = pd.read_csv(journal_path)
+            frame = tail if frame.empty else pd.concat([frame, tail], ignore_index=True)
+        return frame
 
     @classmethod
-    def load_history(cls, file_path: str):
-        """Loads history from a CSV file into the in-memory DataFrame."""
-        cls._history_df = pd.read_csv(file_path)
+    def load_history(cls, file_path: str, fmt: str = None, start: int = None, stop: int = None, operations=None):
+        """Loads history from a file into the in-memory history buffer, detecting the format like save_history.
+
+        If the file has a journal, its rows are applied after the snapshot rows. Files in the records
+        format are memory-mapped rather than read, and new rows are kept in memory after them.
+        start/stop and operations load only a row range and/or the given operations, streaming the
+        file so rows outside the selection are never materialized.
+        """
+        import pandas as pd  # pylint: disable=import-outside-toplevel
+        from calculator.history_formats import MappedHistory, detect_format  # pylint: disable=import-outside-toplevel
+        if start is not None or stop is not None or operations is not None:
+            frames = list(cls.iter_history_file(file_path, fmt, start=start, stop=stop, operations=operations))
+            with cls._history.locked() as history:
+                cls._mapped = cls._mapped_aggregates = None
+                cls._history.load_frame(pd.concat(frames, ignore_index=True) if frames
+                                        else pd.DataFrame(columns=HISTORY_COLUMNS))
+                cls._journal_base = None  # Only part of the file is in memory, so it is not the file's state
+                cls._saved_rows = 0
+                logger.info("Loaded %d selected history rows from %s", len(history), file_path)
+            return
+
+        with cls._history.locked() as history:
+            if detect_format(file_path, fmt) == "records":
+                cls._drop_indexes("memory-mapped")
+                cls._mapped, cls._mapped_aggregates = MappedHistory(file_path), None
+                journal_path = cls.journal_path(file_path)
+                cls._history.clear()  # The mapped rows are only read if they are summarized
+                if os.path.exists(journal_path):
+                    cls._extend_frame(pd.read_csv(journal_path))
+            else:
+                cls._mapped = cls._mapped_aggregates = None
+                cls._history.load_frame(cls._read_snapshot_and_journal(file_path, fmt))
+            cls._journal_base = file_path
+            cls._saved_rows = history.total_rows
         logger.info("Loaded calculation history from %s", file_path)
 
     @classmethod
-    def display_history(cls):
-        """Displays the in-memory history."""
-        if cls._history_df.empty:
+    def _extend_frame(cls, frame: "pd.DataFrame"):
+        """Appends the rows of a DataFrame after the current history."""
+        if not frame.empty:
+            cls._history.extend(*_frame_columns(frame))
+
+    @classmethod
+    def _observers(cls) -> list:
+        return [cls._aggregates] if cls._indexes is None else [cls._aggregates, cls._indexes]
+
+    @classmethod
+    def configure_indexes(cls, columns=None):
+        """Maintains sorted indexes on the given columns (result, operand1 and/or operation) for query().
+
+        The indexes hold row numbers into the in-memory buffer and are sorted on the first query, so
+        they need unbounded history that is not memory-mapped; otherwise a ValueError is raised.
+        None or an empty list drops them, and query() falls back to scanning the history.
+        """
+        with cls._history.locked() as history:
+            if not columns:
+                cls._indexes = None
+            elif cls._mapped is not None:
+                raise ValueError("History indexes cannot be built on memory-mapped history")
+            else:
+                cls._indexes = HistoryIndexes(history, columns)
+            cls._history.observers = tuple(cls._observers())
+        logger.info("Configured history indexes on %s.", ", ".join(columns) if columns else "no columns")
+
+    @classmethod
+    def _drop_indexes(cls, mode: str):
+        """Drops the indexes before switching to history they cannot cover."""
+        if cls._indexes is not None:
+            logger.warning("Dropped the history indexes: %s history cannot be indexed.", mode)
+            cls._indexes = None
+            cls._history.observers = tuple(cls._observers())
+
+    @classmethod
+    def query(cls, column: str, value=None, low=None, high=None):
+        """Returns the history rows whose column equals value, or lies in [low, high], ordered by that column.
+
+        Rows with equal values stay in history order. Either bound may be left out for an open
+        range. With an index on column this takes O(log² n + k log n) for k matching rows; otherwise
+        the full history is scanned.
+        """
+        if column not in HISTORY_COLUMNS:
+            raise ValueError(f"Unknown history column: {column}")
+        if value is not None:
+            low = high = value
+        with cls._history.locked():
+            if cls._indexes is not None and column in cls._indexes.columns:
+                return cls._indexes.query(column, low, high)
+        logger.debug("No index on %s, scanning the history.", column)
+        frame = cls.get_history(full=True)
+        mask = frame[column].notna()
+        if low is not None:
+            mask &= frame[column] >= low
+        if high is not None:
+            mask &= frame[column] <= high
+        return frame[mask].sort_values(column, kind="stable").reset_index(drop=True)
+
+    @classmethod
+    def summarize(cls) -> dict:
+        """Returns {operation: {count, sum, min, max, mean, variance}} of the results in the full history.
+
+        Answered from running aggregates, so the cost depends on the number of operations, not rows.
+        The rows of a memory-mapped file are aggregated in chunks on the first call after loading it.
+        """
+        with cls._history.locked():  # Applies rows still queued by other threads
+            if cls._mapped is None or not len(cls._mapped):
+                return cls._aggregates.summary()
+            if cls._mapped_aggregates is None:
+                cls._mapped_aggregates = OperationAggregates()
+                for records in cls._mapped.iter_records(1_000_000):
+                    cls._mapped_aggregates.extend(records["operation"], None, None, records["result"])
+                logger.info("Aggregated %d memory-mapped history rows.", len(cls._mapped))
+            return cls._mapped_aggregates.merged(cls._aggregates).summary()
+
+    @classmethod
+    def iter_history_file(cls, file_path: str, fmt: str = None, chunksize: int = 100_000, start: int = None,
+                          stop: int = None, operations=None, columns=None):
+        """Yields the rows of a saved history file, journal tail included, as DataFrame chunks in constant memory.
+
+        start/stop select a row range over the snapshot followed by its journal, operations keeps only the
+        given operation names, and columns projects the output. See history_formats.iter_history_file.
+        """
+        from calculator import history_formats  # pylint: disable=import-outside-toplevel
+        yield from history_formats.iter_history_file(file_path, fmt, chunksize, start, stop, operations, columns)
+        journal_path = cls.journal_path(file_path)
+        if not os.path.exists(journal_path):
+            return
+        offset = history_formats.count_rows(file_path, fmt) if start or stop is not None else 0
+        journal_start = max((start or 0) - offset, 0)
+        journal_stop = None if stop is None else max(stop - offset, 0)
+        yield from history_formats.iter_history_file(journal_path, "csv", chunksize, journal_start, journal_stop, operations, columns)
+
+    @classmethod
+    def compact_history(cls, file_path: str, fmt: str = None):
+        """Merges the journal of file_path into its snapshot and removes the journal."""
+        from calculator.history_formats import sniff_compression, write_history  # pylint: disable=import-outside-toplevel
+        journal_path = cls.journal_path(file_path)
+        if not os.path.exists(journal_path):
+            logger.info("No history journal to compact for %s", file_path)
+            return
+        frame = cls._read_snapshot_and_journal(file_path, fmt)
+        write_history(frame, file_path, fmt, sniff_compression(file_path))  # Keeps the snapshot's compression
+        os.remove(journal_path)
+        logger.info("Compacted history journal into %s", file_path)
+
+    @classmethod
+    def display_history(cls, full: bool = False):
+        """Displays the in-memory history, or the full history including spilled rows when full=True."""
+        if full and cls._history.spilled_rows:
+            logger.info("Displaying full calculation history.")
+            return cls.get_history(full=True)
+        if cls.history_length() == 0:
+            import pandas as pd  # pylint: disable=import-outside-toplevel
             logger.info("No calculation history available to display.")
             # Instead of returning a string, return an empty DataFrame
-            return pd.DataFrame(columns=["operation", "operand1", "operand2", "result"])
-        else:
-            logger.info("Displaying calculation history.")
-            return cls._history_df
+            return pd.DataFrame(columns=HISTORY_COLUMNS)
+        logger.info("Displaying calculation history.")
+        return cls.get_history()
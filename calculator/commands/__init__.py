@@ -1,39 +1,184 @@
 from abc import ABC, abstractmethod
+import importlib
+import inspect
 import logging
+import time
+import typing
 from decimal import Decimal
+from calculator.metrics import get_metrics
 
 # Set up logging for this module
 logger = logging.getLogger(__name__)
 
 class Command(ABC):
     """Abstract base class for all commands."""
-    
+
     @abstractmethod
     def execute(self):
         pass
 
+def to_decimal(value) -> Decimal:
+    """Coerces a command argument to Decimal; floats go through repr so 0.1 stays 0.1."""
+    if isinstance(value, Decimal):
+        return value
+    if isinstance(value, float):
+        return Decimal(repr(value))
+    return Decimal(value)
+
+def to_int(value) -> int:
+    """Coerces a command argument to int, rejecting values with a fractional part."""
+    if isinstance(value, int):
+        return value
+    number = to_decimal(value)
+    if number != number.to_integral_value():
+        raise ValueError(f"Expected a whole number, got {value}")
+    return int(number)
+
+# Argument coercion by annotation name, as recorded in the plugin manifest
+ARGUMENT_COERCIONS = {
+    "Decimal": to_decimal,
+    "int": to_int
+}
+
+def _coerce_decimals(args: tuple) -> tuple:
+    """Coerces every argument to Decimal, returning args unchanged when they already are."""
+    for arg in args:
+        if arg.__class__ is not Decimal:
+            return tuple(map(to_decimal, args))
+    return args
+
+def _argument_coercion(arg_types):
+    """Returns a function that coerces an argument tuple to arg_types, or None if no coercion applies."""
+    coercions = [ARGUMENT_COERCIONS.get(arg_type) for arg_type in arg_types or ()]
+    if not any(coercions):
+        return None
+    if all(coerce is to_decimal for coerce in coercions):
+        return _coerce_decimals
+    return lambda args: tuple(coerce(arg) if coerce else arg for coerce, arg in zip(coercions, args))
+
+def _positional_parameters(function, skip_self: bool) -> list:
+    parameters = list(inspect.signature(function).parameters.values())
+    if skip_self:
+        parameters = parameters[1:]
+    return [parameter for parameter in parameters
+            if parameter.kind in (parameter.POSITIONAL_ONLY, parameter.POSITIONAL_OR_KEYWORD)]
+
+def _annotation_name(parameter) -> str:
+    annotation = parameter.annotation
+    if annotation is parameter.empty:
+        return None
+    arguments = [argument for argument in typing.get_args(annotation) if argument is not type(None)]
+    if typing.get_origin(annotation) is typing.Union and len(arguments) == 1:
+        annotation = arguments[0]  # Optional[int] is coerced like int
+    return getattr(annotation, "__name__", str(annotation))
+
+def describe_command(command_class) -> dict:
+    """Returns the dispatch metadata of a command class, read from its signatures.
+
+    Operands go to the constructor ("init") if it takes any, otherwise to execute ("execute"),
+    matching what the plugin manifest records without importing the plugin.
+    """
+    parameters = _positional_parameters(command_class.__init__, skip_self=True) \
+        if command_class.__init__ is not object.__init__ else []
+    call = "init"
+    if not parameters:
+        parameters = _positional_parameters(command_class.execute, skip_self=True)
+        call = "execute"
+    return {
+        "arity": len(parameters),
+        "min_arity": sum(parameter.default is parameter.empty for parameter in parameters),
+        "arg_types": [_annotation_name(parameter) for parameter in parameters],
+        "call": call
+    }
+
 class CommandHandler:
     def __init__(self):
         self.commands = {}
+        self.metadata = {}  # Command name -> arity, min_arity, arg_types, call and stateless
+        self._dispatch = {}  # Command name -> (target, arity, min_arity, coerce, mode), built on first use
         logger.info("Initialized CommandHandler with an empty command registry.")
 
-    def register_command(self, command_name: str, command_class):
-        """Register a command to be executed by its name."""
+    def register_command(self, command_name: str, command_class, arity: int = None, call: str = None,
+                         arg_types: list = None, stateless: bool = None, min_arity: int = None):
+        """Register a command to be executed by its name.
+
+        command_class is either a Command subclass or a "module:ClassName" string, in which case
+        the module is only imported the first time the command is executed.
+
+        arity is the number of arguments the command takes, of which the first min_arity are
+        required (all of them if min_arity is None), call says whether they are passed to the
+        constructor ("init") or to execute ("execute"), and arg_types names the type each
+        argument is coerced to (see ARGUMENT_COERCIONS). Commands that take their arguments in
+        execute are stateless by default, so one instance is reused for every call. Metadata that
+        is not given is read from the class signatures, when the class is available.
+        """
+        metadata = {"arity": arity, "min_arity": min_arity, "call": call, "arg_types": arg_types,
+                    "stateless": stateless}
+        if arity is None and not isinstance(command_class, str):
+            metadata.update(describe_command(command_class))
         self.commands[command_name] = command_class  # Store class, not instance
-        logger.info(f"Registered command: {command_name}")
+        self.metadata[command_name] = metadata
+        self._dispatch.pop(command_name, None)
+        logger.info("Registered command: %s", command_name)
 
-    def execute_command(self, command_name: str, *args: Decimal):
+    def get_command_class(self, command_name: str):
+        """Return the class registered for a command, importing it first if it was registered lazily."""
         command_class = self.commands.get(command_name)
         if not command_class:
             raise ValueError(f"Unknown command: {command_name}")
+        if isinstance(command_class, str):
+            module_name, class_name = command_class.split(":")
+            command_class = getattr(importlib.import_module(module_name), class_name)
+            self.commands[command_name] = command_class
+            logger.debug("Imported command %s from %s", command_name, module_name)
+        return command_class
+
+    def _build_dispatch(self, command_name: str) -> tuple:
+        """Resolve a command and build its dispatch table entry."""
+        command_class = self.get_command_class(command_name)
+        metadata = self.metadata[command_name]
+        if metadata["arity"] is None:
+            metadata.update(describe_command(command_class))
+        if metadata["min_arity"] is None:
+            metadata["min_arity"] = metadata["arity"]
+        if metadata["stateless"] is None:
+            metadata["stateless"] = metadata["call"] == "execute"
 
-        # Check if command requires arguments (like AddCommand) or not (like CosCommand)
-        if len(args) == 1 and command_name in ["cos", "sin", "tan", "sqrt"]:
-            command_instance = command_class()  # Instantiate unary command without arguments
-            result = command_instance.execute(args[0])  # Pass single argument to execute
+        coerce = _argument_coercion(metadata["arg_types"])
+        if metadata["call"] == "init":
+            target, mode = command_class, "init"  # Arguments go to the constructor, like AddCommand
+        elif metadata["stateless"]:
+            target, mode = command_class().execute, "reuse"  # One instance serves every call
         else:
-            command_instance = command_class(*args)  # Instantiate binary command with arguments
-            result = command_instance.execute()
+            target, mode = command_class, "execute"  # Built per call, arguments go to execute
+        entry = (target, metadata["arity"], metadata["min_arity"], coerce, mode)
+        self._dispatch[command_name] = entry
+        return entry
+
+    def execute_command(self, command_name: str, *args: Decimal):
+        target, arity, min_arity, coerce, mode = self._dispatch.get(command_name) or self._build_dispatch(command_name)
+        metrics = get_metrics()
+        start = time.perf_counter_ns()
+
+        try:
+            if len(args) != arity and not min_arity <= len(args) <= arity:
+                expected = arity if min_arity == arity else f"{min_arity} to {arity}"
+                raise ValueError(f"{command_name} takes {expected} argument(s) ({len(args)} given)")
+            if coerce:
+                args = coerce(args)
+
+            if mode == "reuse":
+                result = target(*args)
+            elif mode == "init":
+                result = target(*args).execute()
+            else:
+                result = target().execute(*args)
+        except Exception:
+            if metrics is not None:
+                metrics.record(f"command.{command_name}", time.perf_counter_ns() - start, error=True)
+            raise
 
+        if metrics is not None:
+            metrics.record(f"command.{command_name}", time.perf_counter_ns() - start)
         logger.info("Executed command: %s with arguments: %s", command_name, args)
         return result
@@ -0,0 +1,216 @@
+import decimal
+from decimal import Decimal
+import functools
+import logging
+import math
+import os
+from calculator.cache import get_cache
+
+# Set up logging for this module
+logger = logging.getLogger(__name__)
+
+# Precisions up to this many digits are computed with float maths and rounded
+FLOAT_DIGITS = 15
+
+# Extra digits carried through series and argument reduction, dropped when the result is rounded
+GUARD_DIGITS = 10
+
+# Above this working precision, sin and cos halve the argument before summing a series
+HALVING_DIGITS = 200
+
+# Trig arguments whose integer part is longer than this are rejected rather than reduced
+MAX_REDUCTION_DIGITS = 10_000
+
+def _arccot(x: int, unity: int) -> int:
+    """arccot(x) scaled by unity, using integer arithmetic."""
+    total = term = unity // x
+    x_squared = x * x
+    n = 3
+    sign = -1
+    while term:
+        term //= x_squared
+        total += sign * (term // n)
+        sign = -sign
+        n += 2
+    return total
+
+@functools.lru_cache(maxsize=32)
+def pi(digits: int) -> Decimal:
+    """Returns pi to at least digits decimal places (Machin's formula)."""
+    unity = 10 ** (digits + GUARD_DIGITS)
+    scaled = 4 * (4 * _arccot(5, unity) - _arccot(239, unity))
+    return Decimal(f"{scaled}E-{digits + GUARD_DIGITS}")  # Exact, whatever the context precision
+
+def _sin_series(r: Decimal) -> Decimal:
+    """Taylor series of sin(r) at the current context precision; |r| should be at most pi/4."""
+    r_squared = r * r
+    term = total = r
+    n = 1
+    while True:
+        n += 2
+        term = -term * r_squared / ((n - 1) * n)
+        next_total = total + term
+        if next_total == total:
+            return total
+        total = next_total
+
+def _cos_series(r: Decimal) -> Decimal:
+    """Taylor series of cos(r) at the current context precision; |r| should be at most pi/4."""
+    r_squared = r * r
+    term = total = Decimal(1)
+    n = 0
+    while True:
+        n += 2
+        term = -term * r_squared / ((n - 1) * n)
+        next_total = total + term
+        if next_total == total:
+            return total
+        total = next_total
+
+def _sin_cos_by_halving(r: Decimal) -> tuple:
+    """(sin r, cos r) from the versine 1 - cos r of r / 2**k, doubled back k times.
+
+    The series for a tiny argument needs few terms, and vers(2x) = 2 vers(x) (2 - vers(x))
+    keeps its relative accuracy, unlike doubling cos directly. With k near the square root of
+    the precision this is two to three times faster than the plain series at 500+ digits.
+    """
+    halvings = math.isqrt(decimal.getcontext().prec)
+    with decimal.localcontext() as context:
+        context.prec += halvings // 3 + 2  # Each doubling can lose about log10(2) digits
+        r = r / (1 << halvings)
+        r_squared = r * r
+        term = total = r_squared / 2
+        n = 2
+        while True:
+            n += 2
+            term = -term * r_squared / ((n - 1) * n)
+            next_total = total + term
+            if next_total == total:
+                break
+            total = next_total
+        for _ in range(halvings):
+            total = 2 * total * (2 - total)
+        sin_r = (total * (2 - total)).sqrt().copy_sign(r)
+        cos_r = 1 - total
+    return +sin_r, +cos_r
+
+def _reduce(x: Decimal, working_digits: int) -> tuple:
+    """Reduces x to r in [-pi/4, pi/4] with x = r + k*pi/2 and returns (r, k mod 4).
+
+    The subtraction carries extra digits for the integer part of x, so large arguments lose no
+    accuracy, and for the digits of x, which covers the cancellation when x is close to a
+    multiple of pi/2.
+    """
+    integer_digits = max(x.adjusted() + 1, 0)
+    if integer_digits > MAX_REDUCTION_DIGITS:
+        raise ValueError(f"Argument too large for argument reduction: {x}")
+    with decimal.localcontext() as context:
+        context.prec = working_digits + integer_digits + len(x.as_tuple().digits)
+        half_pi = pi(context.prec) / 2
+        k = (x / half_pi).to_integral_value(rounding=decimal.ROUND_HALF_EVEN)
+        r = x - k * half_pi
+    return +r, int(k) % 4
+
+def _sin_cos(x: Decimal, digits: int, want_sin: bool, want_cos: bool) -> tuple:
+    """Returns (sin x, cos x) at digits + GUARD_DIGITS; only the requested values are computed."""
+    working_digits = digits + GUARD_DIGITS
+    with decimal.localcontext() as context:
+        context.prec = working_digits
+        r, quadrant = _reduce(x, working_digits)
+        # sin and cos of x are +-sin r or +-cos r, depending on the quadrant
+        swap = quadrant % 2 == 1
+        if working_digits > HALVING_DIGITS:
+            sin_r, cos_r = _sin_cos_by_halving(r)
+        else:
+            need_sin_r = (want_sin and not swap) or (want_cos and swap)
+            need_cos_r = (want_cos and not swap) or (want_sin and swap)
+            sin_r = _sin_series(r) if need_sin_r else None
+            cos_r = _cos_series(r) if need_cos_r else None
+        if swap:
+            sin_x, cos_x = cos_r, None if sin_r is None else -sin_r
+        else:
+            sin_x, cos_x = sin_r, cos_r
+        if quadrant >= 2:
+            sin_x = None if sin_x is None else -sin_x
+            cos_x = None if cos_x is None else -cos_x
+    return sin_x, cos_x
+
+@functools.lru_cache(maxsize=64)
+def _context(digits: int) -> decimal.Context:
+    """A shared context rounding to digits, so the fast path does not build one per call."""
+    return decimal.Context(prec=digits)
+
+def _round(value: Decimal, digits: int) -> Decimal:
+    return _context(digits).plus(value)
+
+def _from_float(value: float, digits: int) -> Decimal:
+    return _context(digits).create_decimal_from_float(value)
+
+def sin(x: Decimal, digits: int) -> Decimal:
+    """sin(x) rounded to digits significant digits."""
+    if digits <= FLOAT_DIGITS or not x.is_finite():
+        return _from_float(math.sin(float(x)), digits)
+    return _round(_sin_cos(x, digits, True, False)[0], digits)
+
+def cos(x: Decimal, digits: int) -> Decimal:
+    """cos(x) rounded to digits significant digits."""
+    if digits <= FLOAT_DIGITS or not x.is_finite():
+        return _from_float(math.cos(float(x)), digits)
+    return _round(_sin_cos(x, digits, False, True)[1], digits)
+
+def tan(x: Decimal, digits: int) -> Decimal:
+    """tan(x) rounded to digits significant digits."""
+    if digits <= FLOAT_DIGITS or not x.is_finite():
+        return _from_float(math.tan(float(x)), digits)
+    sin_x, cos_x = _sin_cos(x, digits, True, True)
+    with decimal.localcontext() as context:
+        context.prec = digits + GUARD_DIGITS
+        return _round(sin_x / cos_x, digits)
+
+def sqrt(x: Decimal, digits: int) -> Decimal:
+    """The square root of a non-negative x, correctly rounded to digits significant digits."""
+    if digits <= FLOAT_DIGITS:
+        root = math.sqrt(float(x))
+        if (root != 0.0 and math.isfinite(root)) or x == 0:
+            return _from_float(root, digits)
+        # x is outside the float range (over- or underflow), so fall through to Decimal
+    return _context(digits).sqrt(x)
+
+_precision = None  # Digits for sin/cos/tan/sqrt, or None for the float engine
+
+def get_precision():
+    """Returns the number of digits sin/cos/tan/sqrt are computed to, or None for the float engine."""
+    return _precision
+
+def configure_precision(digits: int = None):
+    """Sets the number of significant digits for sin/cos/tan/sqrt.
+
+    None keeps the float engine, whose results are the exact values of the float results.
+    Up to FLOAT_DIGITS digits, float results are rounded to digits. Beyond that, sqrt uses
+    Decimal.sqrt and the trig functions use argument reduction and Taylor series. The
+    calculation cache is cleared, since cached results were computed at the old precision.
+    """
+    global _precision  # pylint: disable=global-statement
+    if digits is not None and (not isinstance(digits, int) or digits < 1):
+        raise ValueError(f"Precision must be a positive number of digits, not {digits!r}")
+    _precision = digits
+    cache = get_cache()
+    if cache is not None:
+        cache.clear()
+    return _precision
+
+def configure_precision_from_env():
+    """Configures the precision from the MATH_PRECISION environment variable (empty for the float engine)."""
+    value = os.getenv('MATH_PRECISION', '').strip().lower()
+    digits = None
+    if value not in ('', '0', 'float'):
+        try:
+            digits = int(value)
+            if digits < 1:
+                raise ValueError(digits)
+        except ValueError:
+            logger.warning("Invalid MATH_PRECISION '%s'. Using the float engine.", value)
+            digits = None
+    configure_precision(digits)
+    logger.info("Maths precision set to %s.", f"{digits} digits" if digits else "float")
+    return digits
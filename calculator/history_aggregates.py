@@ -0,0 +1,133 @@
+import logging
+import math
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:  # pandas and NumPy are imported on first use to keep startup fast
+    import numpy as np
+    import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+class RunningStats:
+    """Count, sum, min, max, mean and variance of a stream of values, updated in O(1) per value.
+
+    Single values use Welford's update; arrays are reduced with NumPy and merged with Chan's
+    parallel formula, so both paths give the same numerically stable result.
+    """
+
+    __slots__ = ("count", "total", "mean", "m2", "minimum", "maximum")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.mean = 0.0
+        self.m2 = 0.0  # Sum of squared differences from the mean
+        self.minimum = math.inf
+        self.maximum = -math.inf
+
+    def add(self, value: float):
+        """Adds one value."""
+        self.count += 1
+        self.total += value
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        if value < self.minimum:
+            self.minimum = value
+        if value > self.maximum:
+            self.maximum = value
+
+    def add_array(self, values: "np.ndarray"):
+        """Adds every value of a float array."""
+        count = len(values)
+        if count == 0:
+            return
+        mean = float(values.mean())
+        self._combine(count, float(values.sum()), mean, float(((values - mean) ** 2).sum()),
+                      float(values.min()), float(values.max()))
+
+    def merge(self, other: "RunningStats"):
+        """Adds every value counted by another RunningStats."""
+        if other.count:
+            self._combine(other.count, other.total, other.mean, other.m2, other.minimum, other.maximum)
+
+    def _combine(self, count: int, total: float, mean: float, m2: float, minimum: float, maximum: float):
+        """Chan's update with the statistics of count more values."""
+        combined = self.count + count
+        delta = mean - self.mean
+        self.m2 += m2 + delta * delta * self.count * count / combined
+        self.mean += delta * count / combined
+        self.count = combined
+        self.total += total
+        self.minimum = min(self.minimum, minimum)
+        self.maximum = max(self.maximum, maximum)
+
+    @property
+    def variance(self) -> float:
+        """Sample variance (ddof=1, like pandas), or NaN for fewer than two values."""
+        return self.m2 / (self.count - 1) if self.count > 1 else math.nan
+
+    def summary(self) -> dict:
+        """Returns count, sum, min, max, mean and variance."""
+        return {
+            "count": self.count,
+            "sum": self.total,
+            "min": self.minimum,
+            "max": self.maximum,
+            "mean": self.mean,
+            "variance": self.variance
+        }
+
+class OperationAggregates:
+    """RunningStats of the result column for each operation name.
+
+    Observes a ConcurrentHistory, which only updates it while holding the history lock.
+    """
+
+    def __init__(self):
+        self.stats = {}
+
+    def _stats(self, operation: str) -> RunningStats:
+        stats = self.stats.get(operation)
+        if stats is None:
+            stats = self.stats[operation] = RunningStats()
+        return stats
+
+    def append(self, operation: str, operand1: float, operand2: float, result: float):
+        """Adds the result of one calculation."""
+        self._stats(operation).add(result)
+
+    def extend(self, operation, operand1, operand2, result):
+        """Adds a batch of results; operation is one name for the batch or a sequence of names."""
+        import numpy as np  # pylint: disable=import-outside-toplevel
+        results = np.asarray(result, dtype=float)
+        if isinstance(operation, str):
+            self._stats(operation).add_array(results)
+            return
+        names = np.asarray(operation)
+        if names.dtype.kind not in "SU":  # Fixed-width bytes, as in a records file, are grouped before decoding
+            names = names.astype(str)
+        for name in np.unique(names):
+            self._stats(name.decode() if isinstance(name, bytes) else str(name)).add_array(results[names == name])
+
+    def load_frame(self, frame: "pd.DataFrame"):
+        """Replaces the aggregates with those of the rows of a history DataFrame."""
+        self.clear()
+        if not frame.empty:
+            self.extend(frame["operation"].to_numpy(dtype=str), None, None, frame["result"].to_numpy(dtype=float))
+
+    def clear(self):
+        """Drops every aggregate."""
+        self.stats = {}
+
+    def merged(self, other: "OperationAggregates") -> "OperationAggregates":
+        """Returns new aggregates over the rows of both."""
+        merged = OperationAggregates()
+        for source in (self, other):
+            for operation, stats in source.stats.items():
+                merged._stats(operation).merge(stats)
+        return merged
+
+    def summary(self) -> dict:
+        """Returns {operation: summary} sorted by operation name."""
+        return {operation: self.stats[operation].summary() for operation in sorted(self.stats)}
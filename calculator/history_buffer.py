@@ -0,0 +1,503 @@
+from array import array
+from collections import deque
+from contextlib import contextmanager
+import itertools
+import logging
+import math
+import os
+import threading
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:  # pandas and NumPy are imported on first use to keep startup fast
+    import numpy as np
+    import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+HISTORY_COLUMNS = ["operation", "operand1", "operand2", "result"]
+
+def _operation_column(operation, count: int) -> list:
+    """Expands a single operation name to a column, or returns a sequence of names as a list."""
+    if isinstance(operation, str):
+        return [operation] * count
+    return list(operation)
+
+def _float_column(values, count: int) -> "np.ndarray":
+    """Returns values as a contiguous float64 array; None becomes a column of NaN."""
+    import numpy as np  # pylint: disable=import-outside-toplevel
+    if values is None:
+        return np.full(count, np.nan)
+    return np.ascontiguousarray(values, dtype=np.float64)
+
+def _batch_columns(operation, operand1, operand2, result) -> tuple:
+    """Returns the four columns of a batch, raising ValueError unless they are 1-D and of one length."""
+    count = len(result)
+    columns = (_operation_column(operation, count), _float_column(operand1, count),
+               _float_column(operand2, count), _float_column(result, count))
+    if any(column.ndim != 1 for column in columns[1:]) or any(len(column) != count for column in columns):
+        raise ValueError(f"History batch columns must be one-dimensional and of equal length, "
+                         f"got lengths {[len(column) for column in columns]}")
+    return columns
+
+class HistoryBuffer:
+    """A columnar append buffer for calculation history.
+
+    Rows are appended to growable typed arrays (one per column) so that each append is
+    amortized O(1). A DataFrame is only built when one is requested, and that DataFrame
+    is cached until the next write.
+    """
+
+    def __init__(self):
+        self._operations = []
+        self._operand1 = array('d')
+        self._operand2 = array('d')
+        self._results = array('d')
+        self._frame = None  # Cached DataFrame, invalidated on every write
+
+    def __len__(self):
+        return len(self._operations)
+
+    @property
+    def spilled_rows(self) -> int:
+        """Number of rows held on disk instead of in memory (always 0 for an unbounded buffer)."""
+        return 0
+
+    @property
+    def total_rows(self) -> int:
+        """Number of rows appended since the buffer was last cleared or loaded."""
+        return len(self._operations)
+
+    def append(self, operation: str, operand1: float, operand2: float, result: float):
+        """Appends a single row. A missing operand2 is stored as NaN."""
+        self._operations.append(operation)
+        self._operand1.append(operand1)
+        self._operand2.append(math.nan if operand2 is None else operand2)
+        self._results.append(result)
+        self._frame = None
+
+    def extend(self, operation, operand1, operand2, result):
+        """Appends a batch of rows in a single columnar write.
+
+        operation is either one operation name for the whole batch or a sequence of names.
+        operand2 may be None for unary operations, in which case it is stored as NaN.
+        """
+        operations, operand1, operand2, result = _batch_columns(operation, operand1, operand2, result)
+        self._operations.extend(operations)
+        self._operand1.frombytes(operand1.tobytes())
+        self._operand2.frombytes(operand2.tobytes())
+        self._results.frombytes(result.tobytes())
+        self._frame = None
+
+    def load_frame(self, frame: "pd.DataFrame"):
+        """Replaces the buffer contents with the rows of a DataFrame."""
+        self.clear()
+        if frame.empty:
+            return
+        self.extend(frame["operation"].astype(str).tolist(), frame["operand1"],
+                    frame["operand2"], frame["result"])
+        logger.debug("Loaded %d rows into history buffer.", len(frame))
+
+    def clear(self):
+        """Removes every row from the buffer."""
+        self._operations = []
+        self._operand1 = array('d')
+        self._operand2 = array('d')
+        self._results = array('d')
+        self._frame = None
+
+    def last_row(self):
+        """Returns the most recent row as a dictionary, or None if the buffer is empty."""
+        if not self._operations:
+            return None
+        return {
+            "operation": self._operations[-1],
+            "operand1": self._operand1[-1],
+            "operand2": self._operand2[-1],
+            "result": self._results[-1]
+        }
+
+    def to_frame(self) -> "pd.DataFrame":
+        """Returns the buffer as a DataFrame, building it only if a write happened since the last call."""
+        if self._frame is None:
+            import numpy as np  # pylint: disable=import-outside-toplevel
+            import pandas as pd  # pylint: disable=import-outside-toplevel
+
+            if not self._operations:
+                self._frame = pd.DataFrame(columns=HISTORY_COLUMNS)
+            else:
+                self._frame = pd.DataFrame({
+                    "operation": self._operations,
+                    # np.array copies, so the typed arrays stay free to grow
+                    "operand1": np.array(self._operand1, dtype=float),
+                    "operand2": np.array(self._operand2, dtype=float),
+                    "result": np.array(self._results, dtype=float)
+                }, columns=HISTORY_COLUMNS)
+            logger.debug("Materialized history DataFrame with %d rows.", len(self._operations))
+        return self._frame
+
+    def column(self, name: str, start: int = 0) -> "np.ndarray":
+        """Returns one column from row start onwards as a NumPy array (operation names as a str array)."""
+        import numpy as np  # pylint: disable=import-outside-toplevel
+        if name == "operation":
+            return np.array(self._operations[start:], dtype=str)
+        values = {"operand1": self._operand1, "operand2": self._operand2, "result": self._results}[name]
+        return np.array(values[start:], dtype=float)
+
+    def take(self, positions) -> "pd.DataFrame":
+        """Returns the rows at the given positions as a DataFrame, in the order given."""
+        import numpy as np  # pylint: disable=import-outside-toplevel
+        import pandas as pd  # pylint: disable=import-outside-toplevel
+        positions = np.asarray(positions, dtype=np.intp)
+        operations = self._operations
+        # Plain arrays in column order; a columns= argument or Series values make pandas several times slower here
+        return pd.DataFrame({
+            "operation": np.array([operations[position] for position in positions.tolist()], dtype=object),
+            "operand1": np.frombuffer(self._operand1, dtype=float)[positions],
+            "operand2": np.frombuffer(self._operand2, dtype=float)[positions],
+            "result": np.frombuffer(self._results, dtype=float)[positions]
+        })
+
+    def iter_frames(self, chunksize: int = 100_000):
+        """Returns an iterator over the full history as DataFrames, oldest rows first.
+
+        The rows are captured when it is called, so later writes do not show up in it.
+        """
+        frame = self.to_frame()
+        return iter([] if frame.empty else [frame])
+
+class HistorySpill:
+    """An append-only CSV file that receives the rows evicted from a RingHistoryBuffer.
+
+    Evicted rows are collected in memory and written in blocks of FLUSH_ROWS rows. The file
+    is read back lazily, one chunk at a time.
+    """
+
+    FLUSH_ROWS = 4096
+
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+        self.clear()  # A spill file only holds rows evicted during this session
+
+    def __len__(self):
+        return self._rows
+
+    def write(self, operations, operand1, operand2, result):
+        """Queues evicted rows for writing, flushing once enough rows are pending."""
+        self._pending["operation"].extend(operations)
+        self._pending["operand1"].extend(operand1)
+        self._pending["operand2"].extend(operand2)
+        self._pending["result"].extend(result)
+        self._rows += len(result)
+        if len(self._pending["result"]) >= self.FLUSH_ROWS:
+            self.flush()
+
+    def flush(self):
+        """Appends the pending rows to the spill file."""
+        if not self._pending["result"]:
+            return
+        import pandas as pd  # pylint: disable=import-outside-toplevel
+        write_header = not os.path.exists(self.file_path)
+        pd.DataFrame(self._pending, columns=HISTORY_COLUMNS).to_csv(
+            self.file_path, mode='a', header=write_header, index=False)
+        logger.debug("Spilled %d history rows to %s", len(self._pending["result"]), self.file_path)
+        for values in self._pending.values():
+            values.clear()
+
+    def iter_frames(self, chunksize: int = 100_000):
+        """Returns an iterator over the rows spilled so far, in chunks, oldest first.
+
+        The file is opened when it is called and reading stops at the rows spilled by then, so
+        rows spilled later, or a clear() that removes the file, do not affect the iteration.
+        """
+        self.flush()
+        if self._rows == 0:
+            return iter(())
+        import pandas as pd  # pylint: disable=import-outside-toplevel
+        return pd.read_csv(self.file_path, chunksize=chunksize, nrows=self._rows)
+
+    def clear(self):
+        """Drops pending rows and removes the spill file."""
+        self._pending = {column: [] for column in HISTORY_COLUMNS}
+        self._rows = 0
+        if os.path.exists(self.file_path):
+            os.remove(self.file_path)
+
+class RingHistoryBuffer:
+    """A fixed-capacity history buffer that keeps only the most recent rows in memory.
+
+    Columns are preallocated NumPy arrays used as a ring. Once the ring is full, each new
+    row overwrites the oldest one, which is first handed to the optional HistorySpill.
+    The interface matches HistoryBuffer.
+    """
+
+    def __init__(self, capacity: int, spill: HistorySpill = None):
+        if capacity < 1:
+            raise ValueError("History capacity must be at least 1")
+        import numpy as np  # pylint: disable=import-outside-toplevel
+        self.capacity = capacity
+        self.spill = spill
+        self._operations = np.empty(capacity, dtype=object)
+        self._operand1 = np.empty(capacity)
+        self._operand2 = np.empty(capacity)
+        self._results = np.empty(capacity)
+        self._start = 0   # Ring position of the oldest row
+        self._count = 0
+        self._evicted = 0  # Rows dropped from the ring since the last clear
+        self._frame = None
+
+    def __len__(self):
+        return self._count
+
+    @property
+    def spilled_rows(self) -> int:
+        """Number of evicted rows written to the spill file."""
+        return len(self.spill) if self.spill is not None else 0
+
+    @property
+    def total_rows(self) -> int:
+        """Number of rows appended since the buffer was last cleared or loaded, evicted rows included."""
+        return self._evicted + self._count
+
+    def _columns(self):
+        return (self._operations, self._operand1, self._operand2, self._results)
+
+    def _ordered(self, column: "np.ndarray") -> "np.ndarray":
+        """Returns a column's live rows oldest first."""
+        import numpy as np  # pylint: disable=import-outside-toplevel
+        end = self._start + self._count
+        if end <= self.capacity:
+            return column[self._start:end]
+        return np.concatenate((column[self._start:], column[:end - self.capacity]))
+
+    def _evict(self, count: int):
+        """Drops the count oldest rows, spilling them to disk if a spill file is set."""
+        if self.spill is not None:
+            self.spill.write(*(self._ordered(column)[:count] for column in self._columns()))
+        self._start = (self._start + count) % self.capacity
+        self._count -= count
+        self._evicted += count
+
+    def append(self, operation: str, operand1: float, operand2: float, result: float):
+        """Appends a single row, evicting the oldest row if the ring is full."""
+        if self._count == self.capacity:
+            self._evict(1)
+        position = (self._start + self._count) % self.capacity
+        self._operations[position] = operation
+        self._operand1[position] = operand1
+        self._operand2[position] = math.nan if operand2 is None else operand2
+        self._results[position] = result
+        self._count += 1
+        self._frame = None
+
+    def extend(self, operation, operand1, operand2, result):
+        """Appends a batch of rows, evicting as many old rows as needed to make room."""
+        import numpy as np  # pylint: disable=import-outside-toplevel
+        operations, operand1, operand2, result = _batch_columns(operation, operand1, operand2, result)
+        count = len(result)
+        batch = (np.array(operations, dtype=object), operand1, operand2, result)
+
+        if count > self.capacity:
+            # Only the last `capacity` rows can stay in memory; the rest go straight to the spill
+            self._evict(self._count)
+            if self.spill is not None:
+                self.spill.write(*(values[:count - self.capacity] for values in batch))
+            self._evicted += count - self.capacity
+            batch = tuple(values[count - self.capacity:] for values in batch)
+            count = self.capacity
+
+        overflow = self._count + count - self.capacity
+        if overflow > 0:
+            self._evict(overflow)
+
+        position = (self._start + self._count) % self.capacity
+        first = min(count, self.capacity - position)
+        for column, values in zip(self._columns(), batch):
+            column[position:position + first] = values[:first]
+            column[:count - first] = values[first:]
+        self._count += count
+        self._frame = None
+
+    def load_frame(self, frame: "pd.DataFrame"):
+        """Replaces the contents with the rows of a DataFrame, spilling rows that do not fit."""
+        self.clear()
+        if frame.empty:
+            return
+        self.extend(frame["operation"].astype(str).tolist(), frame["operand1"],
+                    frame["operand2"], frame["result"])
+
+    def clear(self):
+        """Removes every row, including spilled rows."""
+        self._start = 0
+        self._count = 0
+        self._evicted = 0
+        self._operations.fill(None)
+        self._frame = None
+        if self.spill is not None:
+            self.spill.clear()
+
+    def last_row(self):
+        """Returns the most recent row as a dictionary, or None if the buffer is empty."""
+        if self._count == 0:
+            return None
+        position = (self._start + self._count - 1) % self.capacity
+        return {
+            "operation": self._operations[position],
+            "operand1": float(self._operand1[position]),
+            "operand2": float(self._operand2[position]),
+            "result": float(self._results[position])
+        }
+
+    def take(self, positions) -> "pd.DataFrame":
+        """Returns the in-memory rows at the given positions (0 is the oldest) as a DataFrame, in the order given."""
+        import numpy as np  # pylint: disable=import-outside-toplevel
+        import pandas as pd  # pylint: disable=import-outside-toplevel
+        ring = (self._start + np.asarray(positions, dtype=np.intp)) % self.capacity
+        return pd.DataFrame({name: column[ring] for name, column in zip(HISTORY_COLUMNS, self._columns())})
+
+    def to_frame(self) -> "pd.DataFrame":
+        """Returns the in-memory rows as a DataFrame, cached until the next write."""
+        if self._frame is None:
+            import numpy as np  # pylint: disable=import-outside-toplevel
+            import pandas as pd  # pylint: disable=import-outside-toplevel
+
+            if self._count == 0:
+                self._frame = pd.DataFrame(columns=HISTORY_COLUMNS)
+            else:
+                self._frame = pd.DataFrame({
+                    name: np.array(self._ordered(column))  # Copy so later writes do not show through
+                    for name, column in zip(HISTORY_COLUMNS, self._columns())
+                }, columns=HISTORY_COLUMNS)
+        return self._frame
+
+    def iter_frames(self, chunksize: int = 100_000):
+        """Returns an iterator over the full history, spilled rows first, reading the spill file lazily in chunks.
+
+        The rows are captured when it is called, so later writes do not show up in it.
+        """
+        parts = [self.spill.iter_frames(chunksize)] if self.spill is not None else []
+        frame = self.to_frame()
+        if not frame.empty:
+            parts.append([frame])
+        return itertools.chain.from_iterable(parts)
+
+class ConcurrentHistory:
+    """A thread-safe front for a HistoryBuffer or RingHistoryBuffer.
+
+    append() only pushes the row onto a deque, which is safe without a lock, so concurrent
+    writers never wait for each other or for readers. Every other operation holds a lock and
+    first moves the queued rows into the buffer, in the order they were appended. Writers also
+    drain the queue once it reaches DRAIN_ROWS rows, if the lock happens to be free.
+
+    observers (such as OperationAggregates or HistoryIndexes) have the same append, extend,
+    load_frame and clear methods as the buffer. Every write that reaches the buffer is passed
+    on to them under the same lock, so they always describe the full history, including rows
+    spilled to disk.
+    """
+
+    DRAIN_ROWS = 1024
+
+    def __init__(self, buffer, observers=()):
+        self.buffer = buffer
+        self.observers = tuple(observers)
+        self._pending = deque()
+        self._lock = threading.RLock()
+        self._depth = 0  # Nesting of locked() on the thread holding the lock
+
+    def _drain(self):
+        pending = self._pending
+        append = self.buffer.append
+        if not self.observers:
+            while pending:
+                append(*pending.popleft())
+            return
+        observers = [observer.append for observer in self.observers]
+        while pending:
+            row = pending.popleft()
+            append(*row)
+            for observe in observers:
+                observe(*row)
+
+    @contextmanager
+    def locked(self):
+        """Holds the lock with all queued rows applied, and yields the underlying buffer.
+
+        Rows appended by other threads while the lock is held stay queued, so compound
+        operations (such as saving and then recording how many rows were saved) see one
+        consistent history.
+        """
+        with self._lock:
+            self._depth += 1
+            try:
+                if self._depth == 1:
+                    self._drain()
+                yield self.buffer
+            finally:
+                self._depth -= 1
+
+    def __len__(self):
+        with self.locked() as buffer:
+            return len(buffer)
+
+    @property
+    def spilled_rows(self) -> int:
+        """Number of rows held on disk instead of in memory."""
+        with self.locked() as buffer:
+            return buffer.spilled_rows
+
+    @property
+    def total_rows(self) -> int:
+        """Number of rows appended since the buffer was last cleared or loaded."""
+        with self.locked() as buffer:
+            return buffer.total_rows
+
+    def append(self, operation: str, operand1: float, operand2: float, result: float):
+        """Queues a single row; safe to call from any number of threads at once."""
+        pending = self._pending
+        pending.append((operation, operand1, operand2, result))
+        if len(pending) >= self.DRAIN_ROWS and self._lock.acquire(blocking=False):
+            try:
+                if self._depth == 0:
+                    self._drain()
+            finally:
+                self._lock.release()
+
+    def extend(self, operation, operand1, operand2, result):
+        """Appends a batch of rows after any queued single rows."""
+        with self.locked() as buffer:
+            buffer.extend(operation, operand1, operand2, result)
+            for observer in self.observers:
+                observer.extend(operation, operand1, operand2, result)
+
+    def load_frame(self, frame: "pd.DataFrame"):
+        """Replaces the buffer contents with the rows of a DataFrame."""
+        with self.locked() as buffer:
+            buffer.load_frame(frame)
+            for observer in self.observers:
+                observer.load_frame(frame)
+
+    def clear(self):
+        """Removes every row, including queued ones."""
+        with self.locked() as buffer:
+            buffer.clear()
+            for observer in self.observers:
+                observer.clear()
+
+    def last_row(self):
+        """Returns the most recent row as a dictionary, or None if there are no rows."""
+        with self.locked() as buffer:
+            return buffer.last_row()
+
+    def to_frame(self) -> "pd.DataFrame":
+        """Returns the in-memory rows as a DataFrame."""
+        with self.locked() as buffer:
+            return buffer.to_frame()
+
+    def iter_frames(self, chunksize: int = 100_000):
+        """Yields the full history in chunks, as it was at the first chunk.
+
+        The in-memory rows and the spill file are captured under the lock, which is released
+        before anything is yielded, so a partly consumed iterator never blocks other threads.
+        """
+        with self.locked() as buffer:
+            frames = buffer.iter_frames(chunksize)
+        yield from frames
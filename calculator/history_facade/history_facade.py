@@ -2,8 +2,6 @@ from calculator.calculation import Calculation
 from calculator.calculations import Calculations
 import logging
 import os
-from dotenv import load_dotenv
-import pandas as pd
 
 logger = logging.getLogger(__name__)
 
@@ -18,6 +16,30 @@ class HistoryFacade:
             logger.info("Initialized singleton HistoryFacade instance.")
         return cls._instance
 
+    def configure_from_env(self):
+        """Configures bounded in-memory history from HISTORY_MAX_ROWS and HISTORY_SPILL_PATH in .env.
+
+        HISTORY_MAX_ROWS of 0 or unset keeps history unbounded. HISTORY_INDEXES lists the columns
+        to index for query(), comma-separated.
+        """
+        try:
+            max_rows = int(os.getenv('HISTORY_MAX_ROWS', '0') or 0)
+        except ValueError:
+            logger.warning("Invalid HISTORY_MAX_ROWS. Defaulting to unbounded history.")
+            max_rows = 0
+        if max_rows < 0:
+            logger.warning("Negative HISTORY_MAX_ROWS. Defaulting to unbounded history.")
+            max_rows = 0
+        spill_path = os.getenv('HISTORY_SPILL_PATH', 'history_spill.csv')
+        Calculations.configure_history(max_rows, spill_path)
+
+        indexes = [column.strip() for column in os.getenv('HISTORY_INDEXES', '').split(',') if column.strip()]
+        if indexes:
+            try:
+                Calculations.configure_indexes(indexes)
+            except ValueError as e:
+                logger.warning("Cannot index history for HISTORY_INDEXES: %s. Queries will scan the history.", e)
+
     def add_calculation(self, calculation: Calculation):
         """Adds a calculation to both in-memory and persistent history."""
         try:
@@ -27,6 +49,24 @@ class HistoryFacade:
             logger.error("Failed to add calculation: %s", e)
             raise
 
+    def record_calculation(self, calculation: Calculation):
+        """Records an already performed calculation in history without computing its result again."""
+        try:
+            Calculations.record_calculation(calculation)
+            logger.info("Recorded calculation in history via facade: %s", calculation)
+        except Exception as e:
+            logger.error("Failed to record calculation: %s", e)
+            raise
+
+    def record_batch(self, operation_name: str, operand1, operand2, results):
+        """Records a batch of results for one operation in history."""
+        try:
+            Calculations.record_batch(operation_name, operand1, operand2, results)
+            logger.info("Recorded batch of %d %s calculations via facade.", len(results), operation_name)
+        except Exception as e:
+            logger.error("Failed to record batch: %s", e)
+            raise
+
     def get_last_calculation(self):
         """Retrieves the latest calculation from in-memory history."""
         try:
@@ -35,14 +75,38 @@ class HistoryFacade:
             logger.error("Failed to retrieve the last calculation: %s", e)
             raise
 
-    def get_history(self):
-        """Retrieves the entire in-memory history."""
+    def get_history(self, full: bool = False):
+        """Retrieves the in-memory history, or the full history including spilled rows when full=True."""
         try:
-            return Calculations.get_history()
+            return Calculations.get_history(full)
         except Exception as e:
             logger.error("Failed to retrieve history: %s", e)
             raise
 
+    def history_length(self) -> int:
+        """Returns the number of history rows without reading mapped or spilled rows."""
+        try:
+            return Calculations.history_length()
+        except Exception as e:
+            logger.error("Failed to count history rows: %s", e)
+            raise
+
+    def slice_history(self, start: int = None, stop: int = None):
+        """Retrieves history rows start:stop, reading only those rows from a memory-mapped history file."""
+        try:
+            return Calculations.slice_history(start, stop)
+        except Exception as e:
+            logger.error("Failed to slice history: %s", e)
+            raise
+
+    def tail_history(self, count: int):
+        """Retrieves the last count history rows."""
+        try:
+            return Calculations.tail_history(count)
+        except Exception as e:
+            logger.error("Failed to retrieve history tail: %s", e)
+            raise
+
     def clear_history(self):
         """Clears both in-memory history."""
         try:
@@ -53,14 +117,22 @@ class HistoryFacade:
             raise
 
     def save_history(self):
-        """Saves the in-memory history to a file using the path from .env."""
+        """Saves the in-memory history to a file using the path and optional HISTORY_FORMAT from .env.
+
+        With HISTORY_SAVE_MODE=journal, only rows added since the last save are appended to a journal.
+        HISTORY_COMPRESSION (gzip, zstd, lz4 or none) compresses CSV snapshots; unset, the extension decides.
+        """
         file_path = os.getenv('HISTORY_FILE_PATH', 'history.csv')  # Default to history.csv if not set
         if not file_path or not isinstance(file_path, str):  # LBYL approach
             logger.warning("Invalid file path provided. Defaulting to 'history.csv'.")
             file_path = 'history.csv'
         
+        history_format = os.getenv('HISTORY_FORMAT') or None  # Unset: use the file extension
+        journal = os.getenv('HISTORY_SAVE_MODE', 'snapshot').strip().lower() == 'journal'
+        compression = os.getenv('HISTORY_COMPRESSION') or None  # Unset: use the file extension
+
         try:
-            Calculations.save_history(file_path)
+            Calculations.save_history(file_path, history_format, journal, compression)
             logger.info("Saved history to %s via facade", file_path)
         except FileNotFoundError:
             logger.error("The file path does not exist: %s", file_path)
@@ -69,15 +141,20 @@ class HistoryFacade:
             logger.error("Failed to save history: %s", e)
             raise
 
-    def load_history(self):
-        """Loads calculation history from a file using the path from .env."""
+    def load_history(self, start: int = None, stop: int = None, operations=None):
+        """Loads calculation history from a file using the path and optional HISTORY_FORMAT from .env.
+
+        start/stop and operations restrict the load to a row range and/or the given operations.
+        """
         file_path = os.getenv('HISTORY_FILE_PATH', 'history.csv')  # Default to history.csv if not set
         if not file_path or not isinstance(file_path, str):  # LBYL approach
             logger.warning("Invalid file path provided. Defaulting to 'history.csv'.")
             file_path = 'history.csv'
 
+        history_format = os.getenv('HISTORY_FORMAT') or None  # Unset: use the file extension
+
         try:
-            Calculations.load_history(file_path)
+            Calculations.load_history(file_path, history_format, start, stop, operations)
             logger.info("Loaded history from %s via facade", file_path)
         except FileNotFoundError:
             logger.error("The file path does not exist: %s", file_path)
@@ -86,10 +163,57 @@ class HistoryFacade:
             logger.error("Failed to load history: %s", e)
             raise
 
-    def display_history(self):
-        """Displays the in-memory history."""
+    def stream_history(self, chunksize: int = 100_000, start: int = None, stop: int = None,
+                       operations=None, columns=None):
+        """Yields the saved history file configured in .env as DataFrame chunks without loading it into memory."""
+        file_path = os.getenv('HISTORY_FILE_PATH', 'history.csv')  # Default to history.csv if not set
+        if not file_path or not isinstance(file_path, str):  # LBYL approach
+            logger.warning("Invalid file path provided. Defaulting to 'history.csv'.")
+            file_path = 'history.csv'
+
+        history_format = os.getenv('HISTORY_FORMAT') or None  # Unset: use the file extension
+        logger.info("Streaming history from %s via facade", file_path)
+        yield from Calculations.iter_history_file(file_path, history_format, chunksize, start, stop, operations, columns)
+
+    def compact_history(self):
+        """Merges the history journal into the snapshot file configured in .env."""
+        file_path = os.getenv('HISTORY_FILE_PATH', 'history.csv')  # Default to history.csv if not set
+        if not file_path or not isinstance(file_path, str):  # LBYL approach
+            logger.warning("Invalid file path provided. Defaulting to 'history.csv'.")
+            file_path = 'history.csv'
+
+        history_format = os.getenv('HISTORY_FORMAT') or None  # Unset: use the file extension
+
         try:
-            return Calculations.display_history()
+            Calculations.compact_history(file_path, history_format)
+            logger.info("Compacted history at %s via facade", file_path)
+        except FileNotFoundError:
+            logger.error("The file path does not exist: %s", file_path)
+            raise
+        except Exception as e:
+            logger.error("Failed to compact history: %s", e)
+            raise
+
+    def display_history(self, full: bool = False):
+        """Displays the in-memory history, or the full history including spilled rows when full=True."""
+        try:
+            return Calculations.display_history(full)
         except Exception as e:
             logger.error("Failed to display history: %s", e)
             raise
+
+    def summarize(self):
+        """Returns per-operation count, sum, min, max, mean and variance of the results in the history."""
+        try:
+            return Calculations.summarize()
+        except Exception as e:
+            logger.error("Failed to summarize history: %s", e)
+            raise
+
+    def query(self, column: str, value=None, low=None, high=None):
+        """Retrieves the history rows whose column equals value, or lies in [low, high], using an index if there is one."""
+        try:
+            return Calculations.query(column, value, low, high)
+        except Exception as e:
+            logger.error("Failed to query history: %s", e)
+            raise
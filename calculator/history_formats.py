@@ -0,0 +1,381 @@
+import contextlib
+import io
+import logging
+import os
+import numpy as np
+import pandas as pd
+from calculator.history_buffer import HISTORY_COLUMNS
+
+logger = logging.getLogger(__name__)
+
+# File extensions recognised for each history file format
+FORMAT_EXTENSIONS = {
+    ".csv": "csv",
+    ".parquet": "parquet",
+    ".feather": "feather",
+    ".arrow": "feather",
+    ".npz": "npz",
+    ".rec": "records"
+}
+
+HISTORY_FORMATS = ("csv", "parquet", "feather", "npz", "records")
+
+# Streaming compression for CSV history, chosen explicitly or by a trailing extension (history.csv.gz)
+COMPRESSION_EXTENSIONS = {
+    ".gz": "gzip",
+    ".zst": "zstd",
+    ".lz4": "lz4"
+}
+
+HISTORY_COMPRESSIONS = ("gzip", "zstd", "lz4")
+
+# Levels that favour write throughput, since saves run on the REPL thread. On history CSV, gzip
+# level 1 compresses about 5x faster than level 6 for a 2.0 instead of 2.1 ratio.
+COMPRESSION_LEVELS = {"gzip": 1, "zstd": 3, "lz4": 0}
+
+# Leading bytes of each compressed stream, so files are read correctly whatever their name
+COMPRESSION_MAGIC = {
+    b"\x1f\x8b": "gzip",
+    b"\x28\xb5\x2f\xfd": "zstd",
+    b"\x04\x22\x4d\x18": "lz4"
+}
+
+# Fixed-width binary records: a 16 byte header followed by one RECORD_DTYPE entry per row
+RECORD_MAGIC = b"CALCHIST\x01"
+RECORD_HEADER_SIZE = 16
+RECORD_DTYPE = np.dtype([
+    ("operation", "S16"),
+    ("operand1", "<f8"),
+    ("operand2", "<f8"),
+    ("result", "<f8")
+])
+
+def detect_format(file_path: str, fmt: str = None) -> str:
+    """Returns the history file format: fmt if given, otherwise the one implied by the extension (default csv).
+
+    Parquet and Feather (Arrow IPC) need the optional pyarrow package. The records format
+    is a fixed-width binary file that load_history memory-maps instead of reading into memory.
+    """
+    if fmt:
+        fmt = fmt.strip().lower()
+        if fmt not in HISTORY_FORMATS:
+            raise ValueError(f"Unsupported history format: {fmt}")
+        return fmt
+    root, extension = os.path.splitext(file_path)
+    if extension.lower() in COMPRESSION_EXTENSIONS:
+        extension = os.path.splitext(root)[1]  # history.csv.gz is a csv file
+    return FORMAT_EXTENSIONS.get(extension.lower(), "csv")
+
+def detect_compression(file_path: str, compression: str = None):
+    """Returns the compression to write with (gzip, zstd, lz4) or None.
+
+    compression wins if given ("none" for none); otherwise a trailing .gz, .zst or .lz4 extension
+    decides. zstd needs the optional zstandard package and lz4 the optional lz4 package.
+    """
+    if compression:
+        compression = compression.strip().lower()
+        if compression == "none":
+            return None
+        if compression not in HISTORY_COMPRESSIONS:
+            raise ValueError(f"Unsupported history compression: {compression}")
+        return compression
+    return COMPRESSION_EXTENSIONS.get(os.path.splitext(file_path)[1].lower())
+
+def sniff_compression(file_path: str):
+    """Returns the compression of an existing file from its leading bytes, or None if it is not compressed."""
+    with open(file_path, "rb") as history_file:
+        head = history_file.read(4)
+    for magic, compression in COMPRESSION_MAGIC.items():
+        if head.startswith(magic):
+            return compression
+    return None
+
+def _open_stream(file_path: str, mode: str, compression: str):
+    """Opens a binary stream ("rb" or "wb") that compresses or decompresses on the fly."""
+    if compression == "gzip":
+        import gzip  # pylint: disable=import-outside-toplevel
+        return gzip.open(file_path, mode, compresslevel=COMPRESSION_LEVELS["gzip"])
+    if compression == "zstd":
+        import zstandard  # Optional dependency, only needed for zstd-compressed history  # pylint: disable=import-outside-toplevel
+        return zstandard.open(file_path, mode, cctx=zstandard.ZstdCompressor(level=COMPRESSION_LEVELS["zstd"]))
+    if compression == "lz4":
+        import lz4.frame  # Optional dependency, only needed for lz4-compressed history  # pylint: disable=import-outside-toplevel
+        return lz4.frame.open(file_path, mode, compression_level=COMPRESSION_LEVELS["lz4"])
+    if mode == "wb":
+        return open(file_path, "wb")  # pylint: disable=consider-using-with
+    return open(file_path, "rb")  # pylint: disable=consider-using-with
+
+def _open_writer(file_path: str, compression: str) -> io.TextIOWrapper:
+    """Opens a compressed CSV file as a text stream for pandas to write in chunks.
+
+    pandas reads the binary streams directly, but only writes bytes to the file types it knows.
+    """
+    return io.TextIOWrapper(_open_stream(file_path, "wb", compression), encoding="utf-8", newline="")
+
+def write_history(frame: pd.DataFrame, file_path: str, fmt: str = None, compression: str = None):
+    """Writes a history DataFrame to file_path in the given (or detected) format.
+
+    CSV files can be compressed with gzip, zstd or lz4 (given, or detected from the extension);
+    rows are compressed as pandas writes them, so the uncompressed text is never held in memory.
+    """
+    fmt = detect_format(file_path, fmt)
+    compression = detect_compression(file_path, compression)
+    if compression and fmt != "csv":
+        raise ValueError(f"Compression is only supported for csv history files, not {fmt}")
+    if compression:
+        with _open_writer(file_path, compression) as csv_file:
+            frame.to_csv(csv_file, index=False)
+    elif fmt == "csv":
+        frame.to_csv(file_path, index=False)
+    elif fmt == "parquet":
+        frame.to_parquet(file_path, index=False)
+    elif fmt == "feather":
+        frame.reset_index(drop=True).to_feather(file_path)
+    elif fmt == "records":
+        _write_records(frame, file_path)
+    else:
+        # Write through a file object so NumPy does not append a second .npz extension
+        with open(file_path, "wb") as npz_file:
+            np.savez(npz_file, **{
+                "operation": frame["operation"].to_numpy(dtype=str),
+                "operand1": frame["operand1"].to_numpy(dtype=float),
+                "operand2": frame["operand2"].to_numpy(dtype=float),
+                "result": frame["result"].to_numpy(dtype=float)
+            })
+    logger.debug("Wrote %d history rows to %s as %s%s", len(frame), file_path, fmt,
+                 f" ({compression})" if compression else "")
+
+def read_history(file_path: str, fmt: str = None) -> pd.DataFrame:
+    """Reads a history DataFrame from file_path in the given (or detected) format; compressed CSV is detected from its content."""
+    fmt = detect_format(file_path, fmt)
+    if fmt == "csv":
+        compression = sniff_compression(file_path)
+        if compression:
+            with _open_stream(file_path, "rb", compression) as csv_file:
+                frame = pd.read_csv(csv_file)
+        else:
+            frame = pd.read_csv(file_path)
+    elif fmt == "parquet":
+        frame = pd.read_parquet(file_path)
+    elif fmt == "feather":
+        frame = pd.read_feather(file_path)
+    elif fmt == "records":
+        frame = MappedHistory(file_path).to_frame()
+    else:
+        with np.load(file_path, allow_pickle=False) as data:
+            frame = pd.DataFrame({column: data[column] for column in HISTORY_COLUMNS})
+    logger.debug("Read %d history rows from %s as %s", len(frame), file_path, fmt)
+    return frame
+
+def _write_records(frame: pd.DataFrame, file_path: str):
+    """Writes a history DataFrame as fixed-width binary records.
+
+    The file is written next to file_path and then renamed over it, so a MappedHistory that
+    still maps the old file keeps seeing consistent data.
+    """
+    records = np.empty(len(frame), dtype=RECORD_DTYPE)
+    records["operation"] = frame["operation"].to_numpy(dtype=str)
+    for column in ("operand1", "operand2", "result"):
+        records[column] = frame[column].to_numpy(dtype=float)
+    temporary_path = f"{file_path}.tmp"
+    with open(temporary_path, "wb") as records_file:
+        records_file.write(RECORD_MAGIC.ljust(RECORD_HEADER_SIZE, b"\0"))
+        records.tofile(records_file)
+    os.replace(temporary_path, file_path)
+
+class MappedHistory:
+    """A read-only, memory-mapped view of a history file in the records format.
+
+    Rows are only paged in when they are read, so length, the last row, slices and tails
+    can be read from a multi-GB file without loading it into memory.
+    """
+
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+        with open(file_path, "rb") as records_file:
+            header = records_file.read(RECORD_HEADER_SIZE)
+        if not header.startswith(RECORD_MAGIC):
+            raise ValueError(f"Not a history records file: {file_path}")
+        size = os.path.getsize(file_path) - RECORD_HEADER_SIZE
+        if size % RECORD_DTYPE.itemsize:
+            raise ValueError(f"Truncated history records file: {file_path}")
+        if size == 0:
+            self._records = np.empty(0, dtype=RECORD_DTYPE)  # Empty files cannot be mapped
+        else:
+            self._records = np.memmap(file_path, dtype=RECORD_DTYPE, mode='r', offset=RECORD_HEADER_SIZE)
+        logger.debug("Mapped %d history rows from %s", len(self._records), file_path)
+
+    def __len__(self):
+        return len(self._records)
+
+    @staticmethod
+    def _records_to_frame(records: np.ndarray) -> pd.DataFrame:
+        return pd.DataFrame({
+            "operation": records["operation"].astype(str),
+            "operand1": np.array(records["operand1"]),
+            "operand2": np.array(records["operand2"]),
+            "result": np.array(records["result"])
+        }, columns=HISTORY_COLUMNS)
+
+    def row(self, index: int) -> dict:
+        """Returns one row as a dictionary."""
+        record = self._records[index]
+        return {
+            "operation": record["operation"].decode(),
+            "operand1": float(record["operand1"]),
+            "operand2": float(record["operand2"]),
+            "result": float(record["result"])
+        }
+
+    def last_row(self):
+        """Returns the last row as a dictionary, or None if the file has no rows."""
+        if len(self._records) == 0:
+            return None
+        return self.row(-1)
+
+    def slice(self, start: int = None, stop: int = None) -> pd.DataFrame:
+        """Returns rows start:stop as a DataFrame, reading only those rows."""
+        return self._records_to_frame(self._records[start:stop])
+
+    def tail(self, count: int) -> pd.DataFrame:
+        """Returns the last count rows as a DataFrame."""
+        return self.slice(max(len(self._records) - count, 0), None)
+
+    def to_frame(self) -> pd.DataFrame:
+        """Reads every row into a DataFrame."""
+        return self.slice()
+
+    def iter_records(self, chunksize: int):
+        """Yields the mapped records in blocks of chunksize rows, without converting them to DataFrames."""
+        for offset in range(0, len(self._records), chunksize):
+            yield self._records[offset:offset + chunksize]
+
+    def iter_chunks(self, chunksize: int, start: int = 0, stop: int = None, operations=None):
+        """Yields rows start:stop in DataFrame chunks.
+
+        The operation filter is applied to the mapped records, so rejected rows are never converted.
+        """
+        records = self._records[start:stop]
+        wanted = np.array([name.encode() for name in operations], dtype="S16") if operations is not None else None
+        for offset in range(0, len(records), chunksize):
+            block = records[offset:offset + chunksize]
+            if wanted is not None:
+                block = block[np.isin(block["operation"], wanted)]
+            if len(block):
+                yield self._records_to_frame(block)
+
+def _iter_csv(file_path, chunksize, start, stop, columns, operations):
+    """Chunked CSV reader: rows before start are skipped by the parser and reading stops at stop.
+
+    Compressed files are decompressed as the parser reads them.
+    """
+    compression = sniff_compression(file_path)
+    with _open_stream(file_path, "rb", compression) if compression else contextlib.nullcontext(file_path) as source:
+        reader = pd.read_csv(source, usecols=columns, chunksize=chunksize,
+                             skiprows=range(1, start + 1) if start else None,
+                             nrows=None if stop is None else stop - start)
+        with reader:
+            yield from reader
+
+def _iter_records(file_path, chunksize, start, stop, columns, operations):
+    """Records reader: slices the memory map and filters operations before converting rows."""
+    yield from MappedHistory(file_path).iter_chunks(chunksize, start, stop, operations)
+
+def _iter_npz(file_path, chunksize, start, stop, columns, operations):
+    """NumPy reader: only the projected columns are loaded (npz members cannot be read partially)."""
+    with np.load(file_path, allow_pickle=False) as data:
+        arrays = {column: data[column][start:stop] for column in columns}
+    first = next(iter(arrays.values()), None)
+    if first is None:
+        return
+    for offset in range(0, len(first), chunksize):
+        yield pd.DataFrame({column: values[offset:offset + chunksize] for column, values in arrays.items()})
+
+def _iter_parquet(file_path, chunksize, start, stop, columns, operations):
+    """Parquet reader: row groups outside the row range are skipped using the file metadata."""
+    import pyarrow.parquet as pq  # Optional dependency, only needed for parquet files  # pylint: disable=import-outside-toplevel
+
+    parquet_file = pq.ParquetFile(file_path)
+    row_groups = []
+    position = None  # File row number of the first selected row group
+    group_start = 0
+    for index in range(parquet_file.num_row_groups):
+        group_rows = parquet_file.metadata.row_group(index).num_rows
+        if group_start + group_rows > start and (stop is None or group_start < stop):
+            if position is None:
+                position = group_start
+            row_groups.append(index)
+        group_start += group_rows
+    if not row_groups:
+        return
+    for batch in parquet_file.iter_batches(batch_size=chunksize, row_groups=row_groups, columns=columns):
+        batch_start = position
+        position += batch.num_rows
+        low = max(start - batch_start, 0)
+        high = batch.num_rows if stop is None else min(stop - batch_start, batch.num_rows)
+        if high > low:
+            yield batch.slice(low, high - low).to_pandas()
+        if stop is not None and position >= stop:
+            break
+
+def _iter_feather(file_path, chunksize, start, stop, columns, operations):
+    """Feather reader: the file is memory-mapped and sliced before any rows are converted."""
+    import pyarrow.feather as feather  # Optional dependency, only needed for feather files  # pylint: disable=import-outside-toplevel
+
+    table = feather.read_table(file_path, columns=columns, memory_map=True)
+    table = table.slice(start, None if stop is None else max(stop - start, 0))
+    for batch in table.to_batches(max_chunksize=chunksize):
+        yield batch.to_pandas()
+
+_CHUNK_READERS = {
+    "csv": _iter_csv,
+    "records": _iter_records,
+    "npz": _iter_npz,
+    "parquet": _iter_parquet,
+    "feather": _iter_feather
+}
+
+def iter_history_file(file_path: str, fmt: str = None, chunksize: int = 100_000, start: int = None,
+                      stop: int = None, operations=None, columns=None):
+    """Yields the rows of a history file as DataFrame chunks in constant memory.
+
+    start/stop select a row range, operations keeps only rows whose operation is in the given
+    names, and columns projects the output to a subset of the history columns. Each format
+    applies as much of this as it can while reading, so skipped rows are not materialized.
+    """
+    fmt = detect_format(file_path, fmt)
+    columns = list(columns) if columns else list(HISTORY_COLUMNS)
+    unknown = set(columns) - set(HISTORY_COLUMNS)
+    if unknown:
+        raise ValueError(f"Unknown history columns: {sorted(unknown)}")
+    start = start or 0
+    if start < 0 or (stop is not None and stop < 0):
+        raise ValueError("Row range bounds must not be negative")
+    if stop is not None and stop <= start:
+        return
+    operations = list(operations) if operations is not None else None
+    read_columns = columns if operations is None or "operation" in columns else columns + ["operation"]
+
+    for chunk in _CHUNK_READERS[fmt](file_path, chunksize, start, stop, read_columns, operations):
+        if operations is not None:
+            chunk = chunk[chunk["operation"].isin(operations)]
+        if not chunk.empty:
+            yield chunk[columns].reset_index(drop=True)
+
+def count_rows(file_path: str, fmt: str = None) -> int:
+    """Returns the number of rows in a history file, from metadata where the format has it."""
+    fmt = detect_format(file_path, fmt)
+    if fmt == "records":
+        return len(MappedHistory(file_path))
+    if fmt == "npz":
+        with np.load(file_path, allow_pickle=False) as data:
+            return len(data["result"])
+    if fmt == "parquet":
+        import pyarrow.parquet as pq  # Optional dependency, only needed for parquet files  # pylint: disable=import-outside-toplevel
+        return pq.ParquetFile(file_path).metadata.num_rows
+    if fmt == "feather":
+        import pyarrow.feather as feather  # Optional dependency, only needed for feather files  # pylint: disable=import-outside-toplevel
+        return feather.read_table(file_path, columns=["result"], memory_map=True).num_rows
+    with _open_stream(file_path, "rb", sniff_compression(file_path)) as csv_file:
+        lines = sum(block.count(b"\n") for block in iter(lambda: csv_file.read(1 << 20), b""))
+    return max(lines - 1, 0)  # Minus the header
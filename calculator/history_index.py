@@ -0,0 +1,141 @@
+import logging
+import math
+from typing import TYPE_CHECKING
+from calculator.history_buffer import HistoryBuffer
+
+if TYPE_CHECKING:  # pandas and NumPy are imported on first use to keep startup fast
+    import numpy as np
+    import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+INDEXABLE_COLUMNS = ("result", "operand1", "operation")
+
+# Rows appended since the last merge are scanned linearly until there are this many, then sorted in
+MERGE_ROWS = 4096
+
+def _merge_runs(older: tuple, newer: tuple) -> tuple:
+    """Merges two (sorted values, row numbers) runs in linear time; equal values keep older rows first."""
+    import numpy as np  # pylint: disable=import-outside-toplevel
+    older_values, older_rows = older
+    newer_values, newer_rows = newer
+    older_at = np.arange(len(older_values)) + np.searchsorted(newer_values, older_values, side="left")
+    newer_at = np.arange(len(newer_values)) + np.searchsorted(older_values, newer_values, side="right")
+    values = np.empty(len(older_values) + len(newer_values), dtype=np.result_type(older_values, newer_values))
+    rows = np.empty(len(values), dtype=np.intp)
+    values[older_at], values[newer_at] = older_values, newer_values
+    rows[older_at], rows[newer_at] = older_rows, newer_rows
+    return values, rows
+
+class HistoryIndexes:
+    """Sorted secondary indexes over the columns of an in-memory HistoryBuffer, for range and point lookups.
+
+    An index holds only sorted column values and their row numbers; matching rows are taken
+    from the buffer. Each column's index is a list of sorted runs over consecutive row ranges,
+    oldest first, and a run is merged into the one before it while that one is at most twice
+    its size, so there are O(log n) runs and each row is merged O(log n) times. Appends do no
+    work: rows added since the last merge are scanned linearly and sorted into a new run on the
+    first lookup after MERGE_ROWS of them have built up. A lookup is two binary searches per run
+    plus the k matching rows.
+
+    Bounded and memory-mapped history keep rows outside the buffer, so they cannot be indexed.
+    Observes a ConcurrentHistory, which resets it under the history lock on load and clear.
+    """
+
+    def __init__(self, buffer: HistoryBuffer, columns=INDEXABLE_COLUMNS):
+        if not isinstance(buffer, HistoryBuffer):
+            raise ValueError("History indexes need unbounded in-memory history")
+        columns = tuple(columns)
+        unknown = [column for column in columns if column not in INDEXABLE_COLUMNS]
+        if unknown or not columns:
+            raise ValueError(f"Indexes can only be built on {', '.join(INDEXABLE_COLUMNS)}, not {unknown or 'nothing'}")
+        self.buffer = buffer
+        self.columns = columns
+        self._reset()
+
+    def _reset(self):
+        self._runs = {column: [] for column in self.columns}  # Column -> [(sorted values, row numbers)]
+
+    @property
+    def _merged_rows(self) -> int:
+        """The runs cover rows [0, _merged_rows)."""
+        return sum(len(values) for values, _ in self._runs[self.columns[0]])
+
+    def __len__(self):
+        return len(self.buffer)
+
+    def append(self, operation: str, operand1: float, operand2: float, result: float):
+        """Nothing to do: the row is read from the buffer when it is merged."""
+
+    def extend(self, operation, operand1, operand2, result):
+        """Nothing to do: the rows are read from the buffer when they are merged."""
+
+    def load_frame(self, frame: "pd.DataFrame"):
+        """Drops the indexes, since the buffer now holds other rows."""
+        self._reset()
+
+    def clear(self):
+        """Drops the indexes."""
+        self._reset()
+
+    def _merge(self):
+        """Sorts the rows added since the last merge into a new run, then merges runs of similar size."""
+        import numpy as np  # pylint: disable=import-outside-toplevel
+        start, stop = self._merged_rows, len(self.buffer)
+        for column in self.columns:
+            values = self.buffer.column(column, start)
+            order = np.argsort(values, kind="stable")
+            runs = self._runs[column]
+            runs.append((values[order], order + start))
+            while len(runs) > 1 and len(runs[-2][0]) <= 2 * len(runs[-1][0]):
+                newer = runs.pop()
+                runs[-1] = _merge_runs(runs[-1], newer)
+        logger.debug("Merged %d rows into the history indexes.", stop - start)
+
+    def search(self, column: str, low=None, high=None) -> "np.ndarray":
+        """Returns the row numbers whose column value lies in [low, high], ordered by value.
+
+        Rows with equal values are in history order, so a point lookup returns them in history
+        order. Either bound may be None for an open range; use low == high for a point lookup.
+        """
+        import numpy as np  # pylint: disable=import-outside-toplevel
+        if column not in self.columns:
+            raise ValueError(f"No index on {column}")
+        if len(self.buffer) - self._merged_rows > MERGE_ROWS:
+            self._merge()
+        merged_rows = self._merged_rows
+
+        if column == "operation":
+            low = None if low is None else str(low)
+            high = None if high is None else str(high)
+        else:
+            # NaN sorts last, so an open upper bound stops at infinity to leave NaN results out
+            low = -math.inf if low is None else float(low)
+            high = math.inf if high is None else float(high)
+
+        matches = []
+        for sorted_values, sorted_rows in self._runs[column]:
+            first = 0 if low is None else np.searchsorted(sorted_values, low, side="left")
+            last = len(sorted_values) if high is None else np.searchsorted(sorted_values, high, side="right")
+            if first < last:
+                matches.append((sorted_values[first:last], sorted_rows[first:last]))
+        if merged_rows < len(self.buffer):
+            recent = self.buffer.column(column, merged_rows)
+            mask = np.ones(len(recent), dtype=bool)
+            if low is not None:
+                mask &= recent >= low
+            if high is not None:
+                mask &= recent <= high
+            values, rows = recent[mask], np.flatnonzero(mask) + merged_rows
+            order = np.argsort(values, kind="stable")
+            matches.append((values[order], rows[order]))
+        if not matches:
+            return np.empty(0, dtype=np.intp)
+        merged = matches[0]
+        for newer in matches[1:]:
+            merged = _merge_runs(merged, newer)
+        return merged[1]
+
+    def query(self, column: str, low=None, high=None) -> "pd.DataFrame":
+        """Returns the rows whose column value lies in [low, high], ordered by value, then history order."""
+        return self.buffer.take(self.search(column, low, high))
@@ -0,0 +1,104 @@
+import atexit
+from datetime import datetime, timezone
+import json
+import logging
+import logging.handlers
+import queue
+import threading
+
+class JsonFormatter(logging.Formatter):
+    """Formats each record as one JSON object per line."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage()
+        }
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+def parse_sampling(spec: str) -> dict:
+    """Parses a sampling spec like "calculator.calculations=100,calculator.plugins=10".
+
+    Each entry keeps one in N records below WARNING from the named logger and its children.
+    """
+    rates = {}
+    for item in (spec or "").split(","):
+        if not item.strip():
+            continue
+        name, _, rate = item.partition("=")
+        try:
+            rates[name.strip()] = max(int(rate), 1)
+        except ValueError as e:
+            raise ValueError(f"Invalid log sampling entry: {item.strip()}") from e
+    return rates
+
+class SamplingFilter(logging.Filter):
+    """Keeps one in N records below WARNING for the configured loggers.
+
+    A rule applies to the named logger and its children, and the most specific rule wins.
+    Each logger is counted separately, so every message stream is thinned evenly.
+    Warnings and errors are never dropped.
+    """
+
+    def __init__(self, rates: dict):
+        super().__init__()
+        self.rates = dict(rates)
+        self._logger_rates = {}  # Logger name -> resolved rate
+        self._counters = {}
+        self._lock = threading.Lock()  # Records are filtered on every thread that logs
+
+    def _rate(self, name: str) -> int:
+        rate = self._logger_rates.get(name)
+        if rate is None:
+            rate = 1
+            prefix = name
+            while prefix:
+                if prefix in self.rates:
+                    rate = self.rates[prefix]
+                    break
+                prefix = prefix.rpartition(".")[0]
+            self._logger_rates[name] = rate
+        return rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self._rate(record.name)
+        if rate == 1:
+            return True
+        with self._lock:
+            count = self._counters.get(record.name, 0)
+            self._counters[record.name] = count + 1
+        return count % rate == 0
+
+def start_queue_logging(handlers, level: int, sampling: dict = None):
+    """Routes root logging through a queue drained by a background QueueListener.
+
+    The given handlers are attached to the listener, so file and console I/O happen on the
+    listener thread. The QueueHandler merges each message with its arguments before queueing it,
+    so later changes to mutable arguments do not show up in the log. Sampling, if any, is
+    applied before records are queued. The listener is stopped (and the queue flushed) at
+    exit. Returns the started listener.
+    """
+    log_queue = queue.SimpleQueue()
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    if sampling:
+        queue_handler.addFilter(SamplingFilter(sampling))
+
+    root = logging.getLogger()
+    root.setLevel(level)
+    root.addHandler(queue_handler)
+
+    listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    return listener
+
+def stop_queue_logging(listener: logging.handlers.QueueListener):
+    """Flushes and stops a listener started by start_queue_logging before exit."""
+    atexit.unregister(listener.stop)
+    listener.stop()
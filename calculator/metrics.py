@@ -0,0 +1,159 @@
+import atexit
+import json
+import logging
+import math
+import os
+import threading
+
+# Set up logging for this module
+logger = logging.getLogger(__name__)
+
+# Each power of two is split into 2**SUB_BUCKET_BITS buckets, so a bucket is at most 12.5% wide
+SUB_BUCKET_BITS = 3
+_SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+_EXACT_LIMIT = _SUB_BUCKETS << 1  # Values below this get a bucket of their own
+_BUCKET_COUNT = 64 * _SUB_BUCKETS
+_NO_SAMPLES = 1 << 64  # Initial minimum, above any recorded latency
+
+def bucket_index(value: int) -> int:
+    """Returns the histogram bucket of a non-negative integer latency in nanoseconds."""
+    if value < _EXACT_LIMIT:
+        return value
+    shift = value.bit_length() - SUB_BUCKET_BITS - 1
+    return (shift << SUB_BUCKET_BITS) + (value >> shift)
+
+def bucket_bounds(index: int) -> tuple:
+    """Returns the (lowest, highest) value that falls into a bucket."""
+    if index < _EXACT_LIMIT:
+        return index, index
+    shift = (index >> SUB_BUCKET_BITS) - 1
+    mantissa = (index & (_SUB_BUCKETS - 1)) + _SUB_BUCKETS
+    return mantissa << shift, ((mantissa + 1) << shift) - 1
+
+class LatencyHistogram:
+    """A log-linear latency histogram with a fixed number of buckets.
+
+    Recording a value is an integer bucket lookup and an increment, so it is cheap enough to
+    run on every command. Percentiles are accurate to the bucket width (at most 12.5%).
+    """
+
+    def __init__(self):
+        self.counts = [0] * _BUCKET_COUNT
+        self.count = 0
+        self.errors = 0
+        self.total_ns = 0
+        self.min_ns = _NO_SAMPLES
+        self.max_ns = 0
+
+    def record(self, elapsed_ns: int, error: bool = False):
+        """Adds one latency sample; error marks a call that raised."""
+        if elapsed_ns < _EXACT_LIMIT:
+            self.counts[elapsed_ns] += 1
+        else:
+            shift = elapsed_ns.bit_length() - SUB_BUCKET_BITS - 1  # Same as bucket_index, inlined
+            self.counts[(shift << SUB_BUCKET_BITS) + (elapsed_ns >> shift)] += 1
+        self.count += 1
+        self.total_ns += elapsed_ns
+        if error:
+            self.errors += 1
+        if elapsed_ns > self.max_ns:
+            self.max_ns = elapsed_ns
+        if elapsed_ns < self.min_ns:
+            self.min_ns = elapsed_ns
+
+    def percentile(self, fraction: float) -> float:
+        """Returns the latency in nanoseconds below which the given fraction of samples fall."""
+        if self.count == 0:
+            return 0.0
+        target = max(math.ceil(fraction * self.count), 1)
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= target:
+                lowest, highest = bucket_bounds(index)
+                return float(min(max((lowest + highest) / 2, self.min_ns), self.max_ns))
+        return float(self.max_ns)
+
+    def summary(self) -> dict:
+        """Returns count, error count, mean, p50/p95/p99 and max, in microseconds."""
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "mean_us": self.total_ns / self.count / 1000 if self.count else 0.0,
+            "p50_us": self.percentile(0.50) / 1000,
+            "p95_us": self.percentile(0.95) / 1000,
+            "p99_us": self.percentile(0.99) / 1000,
+            "max_us": self.max_ns / 1000
+        }
+
+class LatencyMetrics:
+    """Latency histograms keyed by name, e.g. "command.add" or "operation.add". Safe to share between threads."""
+
+    def __init__(self):
+        self.histograms = {}
+        self._lock = threading.Lock()
+
+    def record(self, name: str, elapsed_ns: int, error: bool = False):
+        """Adds one latency sample to the named histogram, creating it on first use."""
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = LatencyHistogram()
+            histogram.record(elapsed_ns, error)
+
+    def snapshot(self) -> dict:
+        """Returns {name: summary} for every histogram, sorted by name."""
+        with self._lock:
+            return {name: self.histograms[name].summary() for name in sorted(self.histograms)}
+
+    def reset(self):
+        """Drops every histogram."""
+        with self._lock:
+            self.histograms.clear()
+
+    def dump(self, file_path: str):
+        """Writes the current snapshot to a JSON file."""
+        with open(file_path, "w", encoding="utf-8") as dump_file:
+            json.dump(self.snapshot(), dump_file, indent=2)
+        logger.info("Wrote latency metrics to %s", file_path)
+
+    def format_table(self) -> str:
+        """Returns the snapshot as a fixed-width text table."""
+        lines = [f"{'name':<28}{'count':>9}{'errors':>8}{'p50 us':>10}{'p95 us':>10}{'p99 us':>10}{'max us':>10}"]
+        for name, summary in self.snapshot().items():
+            lines.append(f"{name:<28}{summary['count']:>9}{summary['errors']:>8}{summary['p50_us']:>10.1f}"
+                         f"{summary['p95_us']:>10.1f}{summary['p99_us']:>10.1f}{summary['max_us']:>10.1f}")
+        return "\n".join(lines)
+
+_metrics = None  # The active LatencyMetrics, or None when metrics are disabled (configure_metrics enables them)
+_dump_path = None
+
+def get_metrics():
+    """Returns the active latency metrics, or None if metrics are disabled."""
+    return _metrics
+
+def _dump_at_exit():
+    if _metrics is not None and _dump_path:
+        try:
+            _metrics.dump(_dump_path)
+        except OSError as e:
+            logger.error("Could not write latency metrics to %s: %s", _dump_path, e)
+
+def configure_metrics(enabled: bool, dump_path: str = None):
+    """Enables (with empty histograms) or disables latency metrics.
+
+    If dump_path is given, the final snapshot is written there as JSON when the process exits.
+    """
+    global _metrics, _dump_path  # pylint: disable=global-statement
+    _metrics = LatencyMetrics() if enabled else None
+    _dump_path = dump_path or None
+    atexit.unregister(_dump_at_exit)
+    if _metrics is not None and _dump_path:
+        atexit.register(_dump_at_exit)
+    logger.info("Latency metrics %s (dump file: %s).", "enabled" if enabled else "disabled", _dump_path)
+    return _metrics
+
+def configure_metrics_from_env():
+    """Configures latency metrics from the METRICS_ENABLED and METRICS_DUMP_PATH environment variables."""
+    enabled = os.getenv('METRICS_ENABLED', 'false').strip().lower() in ('1', 'true', 'yes', 'on')
+    return configure_metrics(enabled, os.getenv('METRICS_DUMP_PATH', '').strip())
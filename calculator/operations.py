@@ -1,5 +1,6 @@
 import math
 from decimal import Decimal
+from calculator import decimal_math
 
 def add(a: Decimal, b: Decimal) -> Decimal:
     """ Adds two Decimal numbers """
@@ -22,19 +23,35 @@ def divide(a: Decimal, b: Decimal) -> Decimal:
     return a / b
 
 def sin(a: Decimal) -> Decimal:
-    """Calculates the sine of a Decimal number."""
-    return Decimal(math.sin(float(a)))
+    """Calculates the sine of a Decimal number (see decimal_math.configure_precision)."""
+    digits = decimal_math.get_precision()
+    if digits is None:
+        return Decimal(math.sin(float(a)))
+    return decimal_math.sin(a, digits)
 
 def cos(a: Decimal) -> Decimal:
-    """Calculates the cosine of a Decimal number."""
-    return Decimal(math.cos(float(a)))
+    """Calculates the cosine of a Decimal number (see decimal_math.configure_precision)."""
+    digits = decimal_math.get_precision()
+    if digits is None:
+        return Decimal(math.cos(float(a)))
+    return decimal_math.cos(a, digits)
 
 def tan(a: Decimal) -> Decimal:
-    """Calculates the tangent of a Decimal number."""
-    return Decimal(math.tan(float(a)))
+    """Calculates the tangent of a Decimal number (see decimal_math.configure_precision)."""
+    digits = decimal_math.get_precision()
+    if digits is None:
+        return Decimal(math.tan(float(a)))
+    return decimal_math.tan(a, digits)
 
 def sqrt(a: Decimal) -> Decimal:
     """Calculates the square root of a Decimal number. Raises ValueError for negative inputs."""
     if a < 0:
         raise ValueError("Cannot take the square root of a negative number")
-    return Decimal(math.sqrt(float(a)))
\ No newline at end of file
+    digits = decimal_math.get_precision()
+    if digits is None:
+        return Decimal(math.sqrt(float(a)))
+    return decimal_math.sqrt(a, digits)
+
+# Registry of integer opcodes for the operations, so calculations can be stored compactly
+OPERATIONS = (add, subtract, multiply, divide, sin, cos, tan, sqrt)
+OPCODES = {operation: code for code, operation in enumerate(OPERATIONS)}
@@ -1,33 +1,150 @@
-import pkgutil
-import importlib
+import ast
+import json
 import logging
+import os
 from calculator.commands import CommandHandler
-from calculator.commands import Command
 
 # Set up logging for this module
 logger = logging.getLogger(__name__)
 
+PLUGINS_PACKAGE = 'calculator.plugins'
+PLUGINS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Generated on first load and rebuilt whenever a plugin file is added, removed or modified
+MANIFEST_PATH = os.path.join(PLUGINS_DIR, 'plugin_manifest.json')
+MANIFEST_VERSION = 2
+
+def _annotation_name(annotation) -> str:
+    """Returns the source text of an argument annotation, or None if it has none; Optional[X] gives X."""
+    if annotation is None:
+        return None
+    if isinstance(annotation, ast.Subscript) and ast.unparse(annotation.value) in ("Optional", "typing.Optional"):
+        annotation = annotation.slice
+    return ast.unparse(annotation)
+
+def _positional_arguments(function: ast.FunctionDef) -> tuple:
+    """Returns the (name, annotation) pairs of a method's positional arguments, self excluded, and how many are required."""
+    arguments = function.args.posonlyargs + function.args.args
+    pairs = [(argument.arg, _annotation_name(argument.annotation)) for argument in arguments[1:]]
+    return pairs, len(pairs) - len(function.args.defaults)
+
+def _is_command_class(node) -> bool:
+    """Checks whether a class statement lists Command among its bases."""
+    for base in node.bases:
+        if isinstance(base, ast.Name) and base.id == 'Command':
+            return True
+        if isinstance(base, ast.Attribute) and base.attr == 'Command':
+            return True
+    return False
+
+def scan_plugin(file_path: str):
+    """Parses a plugin module (without importing it) and describes the first Command subclass it defines.
+
+    Commands that take their operands in the constructor (like AddCommand) are recorded with
+    call "init", commands that take them in execute (like SinCommand) with call "execute".
+    Returns None if the module defines no command class.
+    """
+    with open(file_path, encoding="utf-8") as plugin_file:
+        tree = ast.parse(plugin_file.read(), filename=file_path)
+
+    for node in tree.body:
+        if not isinstance(node, ast.ClassDef) or not _is_command_class(node):
+            continue
+        methods = {item.name: item for item in node.body if isinstance(item, ast.FunctionDef)}
+        arguments, required = _positional_arguments(methods['__init__']) if '__init__' in methods else ([], 0)
+        call = 'init'
+        if not arguments and 'execute' in methods:
+            arguments, required = _positional_arguments(methods['execute'])
+            call = 'execute'
+        return {
+            "class": node.name,
+            "arity": len(arguments),
+            "min_arity": required,
+            "arg_types": [annotation for _, annotation in arguments],
+            "call": call
+        }
+    return None
+
+def _plugin_files(plugins_dir: str) -> dict:
+    """Returns {plugin_name: __init__.py path} for every plugin package in plugins_dir."""
+    files = {}
+    for entry in os.scandir(plugins_dir):
+        init_path = os.path.join(entry.path, '__init__.py')
+        if entry.is_dir() and not entry.name.startswith(('_', '.')) and os.path.isfile(init_path):
+            files[entry.name] = init_path
+    return files
+
+def _fingerprint(files: dict) -> dict:
+    """Returns {plugin_name: [mtime_ns, size]}, used to tell whether a cached manifest is stale."""
+    fingerprint = {}
+    for plugin_name, init_path in files.items():
+        stat = os.stat(init_path)
+        fingerprint[plugin_name] = [stat.st_mtime_ns, stat.st_size]
+    return fingerprint
+
+def build_manifest(plugins_dir: str = PLUGINS_DIR, package: str = PLUGINS_PACKAGE) -> dict:
+    """Scans every plugin package and returns a manifest of command name -> plugin metadata."""
+    files = _plugin_files(plugins_dir)
+    plugins = {}
+    for plugin_name, init_path in sorted(files.items()):
+        entry = scan_plugin(init_path)
+        if entry is None:
+            logger.warning("Ignored plugin without a Command subclass: %s", plugin_name)
+            continue
+        entry["module"] = f"{package}.{plugin_name}"
+        plugins[plugin_name] = entry
+    logger.info("Built plugin manifest with %d commands.", len(plugins))
+    return {"version": MANIFEST_VERSION, "package": package, "files": _fingerprint(files), "plugins": plugins}
+
+def load_manifest(plugins_dir: str = PLUGINS_DIR, package: str = PLUGINS_PACKAGE,
+                  manifest_path: str = MANIFEST_PATH) -> dict:
+    """Returns the plugin manifest, reading the cached file if it is current and rebuilding it otherwise.
+
+    The cache is current when the mtime and size of every plugin's __init__.py match the ones
+    recorded in it. A manifest that cannot be written (for example in a read-only install) is
+    still returned.
+    """
+    try:
+        with open(manifest_path, encoding="utf-8") as manifest_file:
+            manifest = json.load(manifest_file)
+        if (manifest.get("version") == MANIFEST_VERSION and manifest.get("package") == package
+                and manifest.get("files") == _fingerprint(_plugin_files(plugins_dir))):
+            logger.debug("Using cached plugin manifest: %s", manifest_path)
+            return manifest
+    except (OSError, ValueError):
+        pass  # Missing or unreadable manifest, rebuild it
+
+    manifest = build_manifest(plugins_dir, package)
+    temporary_path = f"{manifest_path}.tmp"
+    try:
+        with open(temporary_path, "w", encoding="utf-8") as manifest_file:
+            json.dump(manifest, manifest_file, indent=2, sort_keys=True)
+        os.replace(temporary_path, manifest_path)
+    except OSError as e:
+        logger.warning("Could not write plugin manifest %s: %s", manifest_path, e)
+    return manifest
+
 class PluginLoader:
-    def __init__(self, command_handler: CommandHandler):
+    def __init__(self, command_handler: CommandHandler, plugins_dir: str = PLUGINS_DIR,
+                 package: str = PLUGINS_PACKAGE, manifest_path: str = MANIFEST_PATH):
         self.command_handler = command_handler
+        self.plugins_dir = plugins_dir
+        self.package = package
+        self.manifest_path = manifest_path
+        self.manifest = None
 
     def load_plugins(self):
-        """Dynamically load all plugins in the plugins directory."""
-        plugins_package = 'calculator.plugins'
-        logger.info("Loading plugins from package: %s", plugins_package)
-
-        for _, plugin_name, is_pkg in pkgutil.iter_modules([plugins_package.replace('.', '/')]):
-            if is_pkg: 
-                logger.debug("Loading plugin: %s", plugin_name)
-                plugin_module = importlib.import_module(f'{plugins_package}.{plugin_name}')
-                for item_name in dir(plugin_module):
-                    item = getattr(plugin_module, item_name)
-                    try:
-                        if issubclass(item, Command): 
-                            self.command_handler.register_command(plugin_name, item)
-                            logger.info("Registered command: %s", plugin_name)
-                    except TypeError:
-                        logger.warning("Ignored item: %s (not a subclass of Command)", item_name)
-                        continue  # If item is not a class or unrelated class, just ignore
+        """Register every plugin listed in the plugin manifest.
+
+        Commands are registered as "module:Class" strings with the arity and argument types
+        from the manifest, so no plugin module is imported until its command is first executed.
+        """
+        logger.info("Loading plugins from package: %s", self.package)
+        self.manifest = load_manifest(self.plugins_dir, self.package, self.manifest_path)
+
+        for plugin_name, entry in self.manifest["plugins"].items():
+            self.command_handler.register_command(plugin_name, f"{entry['module']}:{entry['class']}",
+                                                  arity=entry["arity"], call=entry["call"],
+                                                  arg_types=entry["arg_types"], min_arity=entry["min_arity"])
 
         logger.info("Finished loading plugins.")
@@ -12,11 +12,11 @@ class AddCommand(Command):
     def __init__(self, a: Decimal, b: Decimal):
         self.a = a
         self.b = b
-        logger.info(f"Initialized AddCommand with a={a}, b={b}")
+        logger.info("Initialized AddCommand with a=%s, b=%s", a, b)
 
     def execute(self):
         result = Calculator.add(self.a, self.b)
-        logger.info(f"Executed AddCommand: {self.a} + {self.b} = {result}")
+        logger.info("Executed AddCommand: %s + %s = %s", self.a, self.b, result)
         print(f"Result: {result}")
         return result
 
@@ -0,0 +1,21 @@
+from calculator.commands import Command  # Import Command base class
+from calculator.history_facade.history_facade import HistoryFacade  # Use the strict facade
+import logging
+
+logger = logging.getLogger(__name__)
+
+class CompactHistoryCommand(Command):
+    def __init__(self):
+        self.history_facade = HistoryFacade()  # Create an instance of HistoryFacade
+        logger.info("Initialized CompactHistoryCommand.")
+
+    def execute(self):
+        """Executes the command to merge the history journal into the saved snapshot."""
+        try:
+            self.history_facade.compact_history()  # Call the instance method
+            logger.info("History journal compacted successfully.")
+            print("History journal compacted successfully.")
+        except Exception as e:
+            logger.error("Failed to compact history: %s", e)
+            print("Error: Could not compact history. Please check the logs for details.")
+            raise  # Optionally re-raise the exception for further handling
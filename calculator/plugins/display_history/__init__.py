@@ -1,24 +1,75 @@
+from typing import Optional
 from calculator.commands import Command  # Import Command base class
 from calculator.history_facade.history_facade import HistoryFacade  # Use the strict facade
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Rows shown by display_history() without arguments: a longer history is cut to its first and last half,
+# like the pandas repr, so only those rows are read and formatted
+DISPLAY_ROWS = 50
+
 class DisplayHistoryCommand(Command):
     def __init__(self):
         self.history_facade = HistoryFacade()  # Create an instance of HistoryFacade
         logger.info("Initialized DisplayHistoryCommand.")
 
-    def execute(self):
-        """Executes the command to display calculation history."""
+    def _select(self, count: Optional[int], limit: Optional[int], tail: Optional[int], total: int) -> list:
+        """Returns the (start, stop) row ranges to display for the command arguments."""
+        if tail is not None:
+            if count is not None or limit is not None:
+                raise ValueError("display_history takes either tail or count and limit, not both")
+            if tail < 0:
+                raise ValueError("display_history takes a non-negative tail")
+            return [(max(total - tail, 0), total)]
+        if (count is not None and count < 0) or (limit is not None and limit < 0):
+            raise ValueError("display_history takes a non-negative count, offset and limit")
+        if count is None:
+            if total <= DISPLAY_ROWS:
+                return [(0, total)]
+            half = DISPLAY_ROWS // 2
+            return [(0, half), (total - half, total)]
+        if limit is not None:
+            return [(min(count, total), min(count + limit, total))]
+        return [(0, min(count, total))]
+
+    def execute(self, count: Optional[int] = None, limit: Optional[int] = None, *, tail: Optional[int] = None):
+        """Executes the command to display calculation history.
+
+        display_history() shows the history, cut to its first and last DISPLAY_ROWS // 2 rows
+        when it is longer than DISPLAY_ROWS, display_history(n) the first n rows and
+        display_history(offset, limit) limit rows from row offset; tail=n shows the last n rows
+        (tail_history(n) in the REPL). Only the selected rows are read and formatted.
+        """
         try:
-            # Use the facade instance to access the display history function
-            history = self.history_facade.display_history()  # Call the instance method
-            
-            logger.info("Successfully retrieved history: \n%s", history)  # Log the history
-            
-            print("Calculation History:")
-            print(history)  # Print the history
+            total = self.history_facade.history_length()
+            ranges = self._select(count, limit, tail, total)
+            pages = []
+            for start, stop in ranges:
+                page = self.history_facade.slice_history(start, stop)
+                page.index = range(start, start + len(page))  # Number rows by their place in the full history
+                pages.append(page)
+            if len(pages) == 1:
+                history = pages[0]
+            else:
+                import pandas as pd  # pylint: disable=import-outside-toplevel
+                history = pd.concat(pages)
+            (start, _), (_, stop) = ranges[0], ranges[-1]
+
+            # Log the selection, not the rows; formatting a large frame for the log costs as much as printing it
+            logger.info("Successfully retrieved history: %d of %d rows, from row %d.", len(history), total, start)
+
+            if history.empty:
+                print("Calculation History: no calculations to display.")
+            elif len(pages) == 1:
+                print(f"Calculation History (rows {start} to {stop - 1} of {total}):")
+                print(history.to_string())
+            else:
+                print(f"Calculation History (first and last {len(pages[0])} of {total} rows; "
+                      "display_history(offset, limit) shows the rest):")
+                lines = history.to_string().split("\n")  # Formatted together, so the columns line up
+                lines.insert(1 + len(pages[0]), "...")
+                print("\n".join(lines))
             return history
         except Exception as e:
             logger.error("Failed to retrieve calculation history: %s", e)
@@ -11,7 +11,7 @@ class DivideCommand(Command):
     def __init__(self, a: Decimal, b: Decimal):
         self.a = a
         self.b = b
-        logger.info(f"Initialized DivideCommand with a={a}, b={b}")
+        logger.info("Initialized DivideCommand with a=%s, b=%s", a, b)
 
     def execute(self):
         try:
@@ -19,7 +19,7 @@ class DivideCommand(Command):
                 logger.error("Attempted to divide by zero.")
                 raise InvalidOperation("Cannot divide by zero")
             result = Calculator.divide(self.a, self.b)
-            logger.info(f"Executed DivideCommand: {self.a} / {self.b} = {result}")
+            logger.info("Executed DivideCommand: %s / %s = %s", self.a, self.b, result)
             print(f"Result: {result}")
             return result
         except InvalidOperation as e:
@@ -22,11 +22,17 @@ class MenuCommand(Command):
             "   cos(a)            - Calculates the cosine of x (e.g., cos(1))\n"
             "   tan(a)            - Calculates the tangent of x (e.g., tan(1))\n"
             "\n Calculation History Commands:\n"
-            "   display_history()  - Displays the calculation history\n"
+            "   display_history()  - Displays the calculation history (first and last 25 rows of a longer one)\n"
+            "   display_history(n) - Displays the first n rows of the calculation history\n"
+            "   display_history(offset, limit) - Displays limit rows starting at row offset\n"
+            "   tail_history(n)    - Displays the last n rows of the calculation history\n"
             "   load_history()     - Loads calculation history from a file\n"
             "   save_history()     - Saves current calculation history to a file\n"
+            "   compact_history()  - Merges the history journal into the saved file\n"
+            "   summary            - Shows count, sum, min, max, mean and variance per operation\n"
             "\n Utility Commands:\n"
             "   menu              - Displays this menu\n"
+            "   stats             - Shows per-command latency percentiles and error counts\n"
             "   exit              - Exits the calculator\n"
             "=================================================="
         )
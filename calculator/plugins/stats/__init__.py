@@ -0,0 +1,22 @@
+from calculator.commands import Command  # Import Command base class
+from calculator.metrics import get_metrics
+import logging
+
+logger = logging.getLogger(__name__)
+
+class StatsCommand(Command):
+    def execute(self):
+        """Prints per-command and per-operation latency percentiles, counts and error counts."""
+        metrics = get_metrics()
+        if metrics is None:
+            logger.warning("Stats requested while latency metrics are disabled.")
+            print("Latency metrics are disabled (set METRICS_ENABLED=True to enable them).")
+            return {}
+
+        snapshot = metrics.snapshot()
+        if not snapshot:
+            print("No commands have been timed yet.")
+        else:
+            print(metrics.format_table())
+        logger.info("Displayed latency stats for %d timers.", len(snapshot))
+        return snapshot
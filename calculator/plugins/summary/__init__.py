@@ -0,0 +1,22 @@
+from calculator.commands import Command  # Import Command base class
+from calculator.history_facade.history_facade import HistoryFacade  # Use the strict facade
+import logging
+
+logger = logging.getLogger(__name__)
+
+class SummaryCommand(Command):
+    def __init__(self):
+        self.history_facade = HistoryFacade()
+
+    def execute(self):
+        """Prints the count, sum, min, max, mean and variance of the results of each operation in the history."""
+        summary = self.history_facade.summarize()
+        if not summary:
+            print("No calculation history to summarize.")
+        else:
+            print(f"{'operation':<12}{'count':>10}{'sum':>14}{'min':>14}{'max':>14}{'mean':>14}{'variance':>14}")
+            for operation, stats in summary.items():
+                print(f"{operation:<12}{stats['count']:>10}{stats['sum']:>14.6g}{stats['min']:>14.6g}"
+                      f"{stats['max']:>14.6g}{stats['mean']:>14.6g}{stats['variance']:>14.6g}")
+        logger.info("Displayed history summary for %d operations.", len(summary))
+        return summary
@@ -0,0 +1,14 @@
+from calculator.commands import Command  # Import Command base class
+from calculator.plugins.display_history import DisplayHistoryCommand
+import logging
+
+logger = logging.getLogger(__name__)
+
+class TailHistoryCommand(Command):
+    def __init__(self):
+        self.display_history = DisplayHistoryCommand()
+
+    def execute(self, count: int):
+        """Displays the last count rows of the calculation history."""
+        logger.info("Displaying the last %s history rows.", count)
+        return self.display_history.execute(tail=count)
@@ -0,0 +1,154 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import json
+import logging
+from calculator.commands import CommandHandler
+
+# Set up logging for this module
+logger = logging.getLogger(__name__)
+
+# Longest accepted request line, in bytes
+MAX_LINE_BYTES = 64 * 1024
+
+def parse_address(address: str) -> tuple:
+    """Parses "HOST:PORT" or "unix:PATH" into ("tcp", host, port) or ("unix", path, None)."""
+    if address.startswith("unix:"):
+        return "unix", address[len("unix:"):], None
+    host, _, port = address.rpartition(":")
+    if not host or not port.isdigit():
+        raise ValueError(f"Invalid server address (expected HOST:PORT or unix:PATH): {address}")
+    return "tcp", host, int(port)
+
+def encode_response(response: dict) -> bytes:
+    """Encodes a response as one JSON line; Decimals and other results are written as strings."""
+    return (json.dumps(response, default=str) + "\n").encode()
+
+class CalculatorServer:
+    """Serves CommandHandler commands as JSON lines over TCP or a Unix socket.
+
+    Each request line looks like {"id": 1, "cmd": "add", "args": ["1", "2"]} and gets one
+    response line, {"id": 1, "ok": true, "result": "3"} or {"id": 1, "ok": false, "error": "..."},
+    in request order. Clients may pipeline requests. A connection has at most max_in_flight
+    requests that are executing or waiting to be written back; past that the server stops
+    reading from it, so a fast or stalled client is throttled by TCP flow control. With
+    workers > 0, commands run on a thread pool; otherwise they run on the event loop.
+    """
+
+    def __init__(self, command_handler: CommandHandler, max_in_flight: int = 64, workers: int = 0):
+        if max_in_flight < 1:
+            raise ValueError("max_in_flight must be at least 1")
+        self.command_handler = command_handler
+        self.max_in_flight = max_in_flight
+        self.executor = ThreadPoolExecutor(workers, thread_name_prefix="calculator") if workers > 0 else None
+        self.connections = 0
+        self.requests = 0
+
+    def execute(self, request: dict) -> dict:
+        """Executes one decoded request and returns its response."""
+        response = {"id": request.get("id")}
+        command_name = request.get("cmd")
+        args = request.get("args", [])
+        if not isinstance(command_name, str) or not isinstance(args, list):
+            response.update(ok=False, error="Request needs a string 'cmd' and a list 'args'")
+            return response
+        try:
+            result = self.command_handler.execute_command(command_name, *args)
+            response.update(ok=True, result=result)
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            logger.warning("Request %s failed: %s", command_name, e)
+            response.update(ok=False, error=str(e) or type(e).__name__)
+        return response
+
+    async def _handle_line(self, line: bytes) -> bytes:
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError("request must be a JSON object")
+        except ValueError as e:
+            return encode_response({"id": None, "ok": False, "error": f"Invalid request: {e}"})
+        if self.executor is None:
+            response = self.execute(request)
+        else:
+            response = await asyncio.get_running_loop().run_in_executor(self.executor, self.execute, request)
+        return encode_response(response)
+
+    async def _write_responses(self, pending: asyncio.Queue, in_flight: asyncio.Semaphore, writer):
+        """Writes responses back in request order, waiting for the client to read them."""
+        while True:
+            task = await pending.get()
+            if task is None:
+                return
+            writer.write(await task)
+            await writer.drain()
+            in_flight.release()
+
+    @staticmethod
+    async def _acquire(in_flight: asyncio.Semaphore, responder: asyncio.Task) -> bool:
+        """Waits for an open request slot; returns False once the responder has stopped, since no slot will free up."""
+        if responder.done():
+            return False
+        if not in_flight.locked():
+            await in_flight.acquire()
+            return True
+        acquire = asyncio.ensure_future(in_flight.acquire())
+        await asyncio.wait({acquire, responder}, return_when=asyncio.FIRST_COMPLETED)
+        if acquire.done():
+            return True
+        acquire.cancel()
+        return False
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Serves one client connection until it closes."""
+        self.connections += 1
+        peer = writer.get_extra_info("peername")
+        logger.info("Client connected: %s", peer)
+        in_flight = asyncio.Semaphore(self.max_in_flight)
+        pending = asyncio.Queue()
+        responder = asyncio.create_task(self._write_responses(pending, in_flight, writer))
+        try:
+            while True:
+                # Backpressure: stop reading while max_in_flight requests are open
+                if not await self._acquire(in_flight, responder):
+                    break
+                try:
+                    line = await reader.readline()
+                except ValueError:  # Line longer than MAX_LINE_BYTES
+                    await pending.put(asyncio.create_task(self._reject(f"Request line exceeds {MAX_LINE_BYTES} bytes")))
+                    break
+                if not line:
+                    break
+                if not line.strip():
+                    in_flight.release()
+                    continue
+                self.requests += 1
+                await pending.put(asyncio.create_task(self._handle_line(line)))
+        except ConnectionError as e:
+            logger.info("Client %s dropped: %s", peer, e)
+        finally:
+            await pending.put(None)
+            try:
+                await responder
+            except ConnectionError:
+                pass
+            writer.close()
+            self.connections -= 1
+            logger.info("Client disconnected: %s", peer)
+
+    @staticmethod
+    async def _reject(error: str) -> bytes:
+        return encode_response({"id": None, "ok": False, "error": error})
+
+    async def start(self, address: str):
+        """Starts listening on address ("HOST:PORT" or "unix:PATH") and returns the asyncio server."""
+        kind, host_or_path, port = parse_address(address)
+        if kind == "unix":
+            server = await asyncio.start_unix_server(self.handle_connection, host_or_path, limit=MAX_LINE_BYTES)
+        else:
+            server = await asyncio.start_server(self.handle_connection, host_or_path, port, limit=MAX_LINE_BYTES)
+        logger.info("Calculator server listening on %s", address)
+        return server
+
+    def close(self):
+        """Shuts down the worker threads, if any."""
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)
@@ -1,95 +1,131 @@
 import sys
+import argparse
+import contextlib
+import io
 import logging
 import re
+import time
 import warnings
 from decimal import Decimal, InvalidOperation
+from calculator.cache import configure_cache_from_env
 from calculator.commands import CommandHandler
-from calculator.plugins.add import AddCommand
-from calculator.plugins.subtract import SubtractCommand
-from calculator.plugins.multiply import MultiplyCommand
-from calculator.plugins.divide import DivideCommand
-from calculator.plugins.menu import MenuCommand
-from calculator.plugins.sin import SinCommand
-from calculator.plugins.cos import CosCommand
-from calculator.plugins.tan import TanCommand
-from calculator.plugins.sqrt import SqrtCommand
-from calculator.plugins.display_history import DisplayHistoryCommand
-from calculator.plugins.save_history import SaveHistoryCommand
-from calculator.plugins.load_history import LoadHistoryCommand
-from calculator.plugins.clear_history import ClearHistoryCommand
+from calculator.decimal_math import configure_precision_from_env
+from calculator.history_facade.history_facade import HistoryFacade
+from calculator.logging_setup import JsonFormatter, SamplingFilter, parse_sampling, start_queue_logging
+from calculator.metrics import configure_metrics_from_env
+from calculator.plugins import PluginLoader
 from dotenv import load_dotenv
 import os
 
+# Line format used when LOG_FORMAT is "text"
+TEXT_LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
 def setup_logging(environment):
-    """Set up logging configuration based on environment."""
+    """Set up logging configuration based on environment.
+
+    LOG_FORMAT selects "text" or "json" lines, LOG_QUEUE moves handler I/O to a background
+    QueueListener thread, and LOG_SAMPLING (e.g. "calculator=100") keeps one in N records
+    below WARNING for the named loggers.
+    """
     logger = logging.getLogger(__name__)
 
     # Retrieve the log level and log file from the environment variable
     log_level = os.getenv('LOG_LEVEL', 'INFO').upper()  # Ensure it’s uppercase
     log_file = os.getenv('LOG_FILE', f'logs/{environment}_calculator.log')
+    log_format = os.getenv('LOG_FORMAT', 'text').strip().lower()
+    use_queue = os.getenv('LOG_QUEUE', 'false').strip().lower() in ('1', 'true', 'yes', 'on')
+    try:
+        sampling = parse_sampling(os.getenv('LOG_SAMPLING', ''))
+    except ValueError as e:
+        logger.warning("%s. Log sampling disabled.", e)
+        sampling = {}
 
     # Set the log level based on the environment variable
     level = getattr(logging, log_level, logging.INFO)  # Default to INFO if invalid level
 
+    # Like basicConfig, leave logging alone if the root logger is already configured
+    if not logging.getLogger().handlers:
+        if environment == 'development':
+            handlers = [logging.FileHandler(log_file)]
+        else:
+            handlers = [logging.StreamHandler(sys.stdout)]
+        formatter = JsonFormatter() if log_format == 'json' else logging.Formatter(TEXT_LOG_FORMAT)
+        for handler in handlers:
+            handler.setFormatter(formatter)
+        if use_queue:
+            start_queue_logging(handlers, level, sampling)
+        else:
+            if sampling:
+                handlers[0].addFilter(SamplingFilter(sampling))
+            logging.basicConfig(level=level, handlers=handlers)
+
     if environment == 'development':
-        logging.basicConfig(
-            level=level,
-            format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-            handlers=[
-                logging.FileHandler(log_file),
-                #logging.StreamHandler(sys.stdout)
-            ]
-        )
-        logger.info(f"Logging set to file: {log_file} and console (development).")
+        logger.info("Logging set to file: %s (development).", log_file)
     else:
-        logging.basicConfig(
-            level=level,
-            format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-            handlers=[logging.StreamHandler(sys.stdout)]
-        )
         logger.info("Logging set to console (non-development).")
 
-    logger.info(f"Logging level set to : {log_level}")   
+    logger.info("Logging level set to : %s (format: %s, queued: %s, sampling: %s)",
+                log_level, log_format, use_queue, sampling or "off")
 
     return logger
 
-def main():
-    # Load environment variables from .env file
-    environment = os.getenv('ENVIRONMENT', 'development')
-    env_file = f'.env.{environment}'
-    load_dotenv(env_file)
+# Matches commands like add(1, 2), sin(1) or menu
+COMMAND_PATTERN = re.compile(r"(\w+)(?:\(([^)]*)\))?")
 
-    # Setup logging and get the logger
-    logger = setup_logging(environment)
-    logger.info("Starting the calculator application.")
+# Number of script lines whose output is buffered before it is written to stdout
+SCRIPT_FLUSH_EVERY = 1000
 
-    # Suppress only FutureWarnings
-    warnings.filterwarnings("ignore", category=FutureWarning)
+# Requests a server connection may have open before the server stops reading from it
+SERVER_MAX_IN_FLIGHT = 64
 
-    # Instantiate command handler and register commands
-    command_handler = CommandHandler()
+def register_commands(command_handler):
+    """Register all calculator commands with the command handler."""
+    logger = logging.getLogger(__name__)
 
-    # Register commands in a loop for better maintainability
-    command_classes = {
-        "add": AddCommand,
-        "subtract": SubtractCommand,
-        "multiply": MultiplyCommand,
-        "sin": SinCommand,
-        "cos": CosCommand,
-        "tan": TanCommand,
-        "sqrt": SqrtCommand,
-        "divide": DivideCommand,
-        "menu": MenuCommand,
-        "display_history": DisplayHistoryCommand,
-        "save_history": SaveHistoryCommand,
-        "load_history": LoadHistoryCommand,
-        "clear_history": ClearHistoryCommand
-    }
-
-    for command_name, command_class in command_classes.items():
-        command_handler.register_command(command_name, command_class)
+    # Commands come from the cached plugin manifest, so registering them does not import any
+    # plugin module; each one is imported the first time its command is used.
+    PluginLoader(command_handler).load_plugins()
     logger.info("Registered all commands successfully.")
 
+def process_command(command_handler, user_input, logger):
+    """Parse and execute a single command line. Returns True if the command succeeded."""
+    match = COMMAND_PATTERN.match(user_input)
+
+    if not match:
+        logger.warning("Invalid command format entered: %s", user_input)
+        print("Invalid command format. Type 'menu' to see available commands.")
+        return False
+
+    command_name = match.group(1)
+    args = match.group(2)
+
+    # Process args if they exist, otherwise create an empty list
+    args = args.split(",") if args else []
+
+    try:
+        # Handle string-based arguments specifically for history commands
+        if command_name in ["save_history", "load_history"] and args:
+            command_handler.execute_command(command_name, *args)
+        else:
+            # Convert to Decimal for numeric commands, catching invalid input
+            decimal_args = list(map(Decimal, args)) if args else []
+            command_handler.execute_command(command_name, *decimal_args)
+        logger.info("Command '%s' executed successfully with arguments: %s", command_name, args)
+        return True
+
+    except InvalidOperation:
+        logger.error("Invalid input. Non-numeric values entered.")
+        print("Invalid input. Please enter valid numbers.")
+    except KeyError:
+        logger.error("Unknown command: %s", command_name)
+        print(f"No such command: {command_name}. Type 'menu' for available commands.")
+    except Exception as e:
+        logger.exception("An error occurred while processing the command '%s': %s", command_name, e)
+        print(f"An error occurred: {e}")
+    return False
+
+def run_repl(command_handler, logger):
+    """Run the interactive input()-driven REPL."""
     print("Welcome to the Calculator REPL!")
     print("Type commands like: add(1, 2), subtract(3, 1), etc.")
     print("Type 'menu' to list available commands.")
@@ -102,42 +138,129 @@ def main():
             print("Exiting the calculator.")
             break
 
-        match = re.match(r"(\w+)(?:\(([^)]*)\))?", user_input)
-
-        if match:
-            command_name = match.group(1)
-            args = match.group(2)
-
-            # Process args if they exist, otherwise create an empty list
-            args = args.split(",") if args else []
-
-            try:
-                # Handle string-based arguments specifically for history commands
-                if command_name in ["save_history", "load_history"] and args:
-                    command_handler.execute_command(command_name, *args)
-                else:
-                    # Convert to Decimal for numeric commands, catching invalid input
-                    decimal_args = list(map(Decimal, args)) if args else []
-                    command_handler.execute_command(command_name, *decimal_args)
-                logger.info(f"Command '{command_name}' executed successfully with arguments: {args}")
-
-            except InvalidOperation:
-                logger.error("Invalid input. Non-numeric values entered.")
-                print("Invalid input. Please enter valid numbers.")
-            except KeyError:
-                logger.error(f"Unknown command: {command_name}")
-                print(f"No such command: {command_name}. Type 'menu' for available commands.")
-            except Exception as e:
-                logger.exception(f"An error occurred while processing the command '{command_name}': {e}")
-                print(f"An error occurred: {e}")
+        process_command(command_handler, user_input, logger)
 
-        else:
-            logger.warning(f"Invalid command format entered: {user_input}")
-            print("Invalid command format. Type 'menu' to see available commands.")
+def run_script(command_handler, stream, logger, output=None):
+    """Run commands read line by line from a stream without the interactive prompt.
+
+    Blank lines and lines starting with '#' are skipped and 'exit' stops the script.
+    Command output is buffered and written in blocks of SCRIPT_FLUSH_EVERY lines, and a
+    throughput summary is printed at the end. Returns a (commands, errors) tuple.
+    """
+    output = output or sys.stdout
+    buffer = io.StringIO()
+    commands = errors = 0
+    start = time.perf_counter()
+
+    with contextlib.redirect_stdout(buffer):
+        for line in stream:
+            user_input = line.strip()
+            if not user_input or user_input.startswith('#'):
+                continue
+            if user_input.lower() == 'exit':
+                break
+
+            commands += 1
+            if not process_command(command_handler, user_input, logger):
+                errors += 1
+
+            if commands % SCRIPT_FLUSH_EVERY == 0:
+                output.write(buffer.getvalue())
+                buffer.seek(0)
+                buffer.truncate()
+
+    output.write(buffer.getvalue())
+    elapsed = time.perf_counter() - start
+    rate = commands / elapsed if elapsed > 0 else 0.0
+    output.write(f"Processed {commands} commands ({errors} errors) in {elapsed:.3f}s ({rate:.0f} commands/sec)\n")
+    output.flush()
+    logger.info("Script finished: %d commands, %d errors in %.3fs", commands, errors, elapsed)
+    return commands, errors
+
+def run_server(command_handler, address, logger, max_in_flight=SERVER_MAX_IN_FLIGHT, workers=0):
+    """Serve commands as JSON lines on address ("HOST:PORT" or "unix:PATH") until interrupted.
+
+    Command output is discarded while serving; each result is returned in the response instead.
+    """
+    # Imported here so the REPL and script modes do not pay for asyncio
+    import asyncio  # pylint: disable=import-outside-toplevel
+    from calculator.server import CalculatorServer  # pylint: disable=import-outside-toplevel
+
+    server = CalculatorServer(command_handler, max_in_flight=max_in_flight, workers=workers)
+    console = sys.stdout
+
+    async def serve():
+        listener = await server.start(address)
+        print(f"Serving calculator commands on {address} (Ctrl+C to stop).", file=console, flush=True)
+        async with listener:
+            await listener.serve_forever()
+
+    try:
+        with open(os.devnull, "w", encoding="utf-8") as devnull, contextlib.redirect_stdout(devnull):
+            asyncio.run(serve())
+    except KeyboardInterrupt:
+        logger.info("Server stopped.")
+    finally:
+        server.close()
+    logger.info("Served %d requests.", server.requests)
+
+def parse_arguments(argv):
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description="Advanced Python calculator.")
+    parser.add_argument("--script", metavar="PATH",
+                        help="run commands from a file ('-' for stdin) instead of the interactive REPL")
+    parser.add_argument("--serve", metavar="ADDRESS",
+                        help="serve JSON-lines requests on HOST:PORT or unix:PATH instead of the interactive REPL")
+    parser.add_argument("--max-in-flight", type=int, default=SERVER_MAX_IN_FLIGHT, metavar="N",
+                        help="open requests allowed per server connection (default: %(default)s)")
+    parser.add_argument("--workers", type=int, default=0, metavar="N",
+                        help="run server commands on N threads instead of the event loop (default: %(default)s)")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    arguments = parse_arguments(argv if argv is not None else [])
+
+    # Load environment variables from .env file
+    environment = os.getenv('ENVIRONMENT', 'development')
+    env_file = f'.env.{environment}'
+    load_dotenv(env_file)
+
+    # Setup logging and get the logger
+    logger = setup_logging(environment)
+    logger.info("Starting the calculator application.")
+
+    # Suppress only FutureWarnings
+    warnings.filterwarnings("ignore", category=FutureWarning)
+
+    # Compute sin/cos/tan/sqrt to MATH_PRECISION digits, or with floats if unset
+    configure_precision_from_env()
+
+    # Enable the calculation result cache if configured
+    configure_cache_from_env()
+
+    # Time commands and operations, dumping the histograms on exit if configured
+    configure_metrics_from_env()
+
+    # Bound the in-memory history if configured
+    HistoryFacade().configure_from_env()
+
+    # Instantiate command handler and register commands
+    command_handler = CommandHandler()
+    register_commands(command_handler)
+
+    if arguments.serve:
+        run_server(command_handler, arguments.serve, logger, arguments.max_in_flight, arguments.workers)
+    elif arguments.script == '-':
+        run_script(command_handler, sys.stdin, logger)
+    elif arguments.script:
+        with open(arguments.script, encoding="utf-8") as script:
+            run_script(command_handler, script, logger)
+    else:
+        run_repl(command_handler, logger)
 
 if __name__ == '__main__':
     try:
-        main()
+        main(sys.argv[1:])
     except Exception as ex:
         logging.critical("Critical error encountered during application execution: %s", str(ex))
         print("A critical error occurred. The application will now exit.")
@@ -10,6 +10,8 @@ The test data is generated based on the number of records specified via the --nu
 """
 from decimal import Decimal  # Ensure this is at the top of your file
 from faker import Faker
+import pytest
+from calculator.calculations import Calculations
 from calculator.operations import add, subtract, multiply, divide, sin, cos, tan, sqrt
 
 fake = Faker()
@@ -17,6 +19,17 @@ fake = Faker()
 def pytest_addoption(parser):
     """Add command line options for pytest."""
     parser.addoption("--num_records", action="store", default=5, type=int, help="Number of test records to generate")
+    parser.addoption("--benchmark-json", action="store", default=None,
+                     help="File the benchmark suite writes its JSON results to (with -m benchmark)")
+
+@pytest.fixture
+def unbounded_history():
+    """Start and finish each test with empty, unbounded history."""
+    Calculations.configure_history(0)
+    Calculations.clear_history()
+    yield
+    Calculations.configure_history(0)
+    Calculations.clear_history()
 
 def pytest_generate_tests(metafunc):
     """Generate dynamic test cases based on the number of records specified."""
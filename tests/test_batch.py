@@ -0,0 +1,124 @@
+"""Unit tests for the vectorized batch evaluation API (Calculator.evaluate_many)."""
+
+import decimal
+import math
+from decimal import Decimal
+import numpy as np
+import pytest
+from calculator import Calculator, batch, decimal_math
+from calculator.calculations import Calculations
+from calculator.operations import add
+
+@pytest.fixture(autouse=True)
+def clean_history():
+    """Start every test with an empty history."""
+    Calculations.clear_history()
+    yield
+    Calculations.clear_history()
+
+def test_evaluate_many_binary_records_batch():
+    """Test that a binary batch returns the element-wise results and records every row."""
+    results = Calculator.evaluate_many("add", [1, 2, 3], [10, 20, 30])
+    np.testing.assert_array_equal(results, [11, 22, 33])
+
+    history = Calculations.get_history()
+    assert len(history) == 3
+    assert history["operation"].tolist() == ["add", "add", "add"]
+    assert history["result"].tolist() == [11.0, 22.0, 33.0]
+
+def test_evaluate_many_accepts_operation_function_and_decimals():
+    """Test that the operation can be passed as a calculator.operations function with Decimal operands."""
+    results = Calculator.evaluate_many(add, [Decimal('1.5'), Decimal('2.5')], Decimal('1'))
+    np.testing.assert_array_equal(results, [2.5, 3.5])
+
+def test_evaluate_many_unary():
+    """Test that unary operations store NaN for the missing second operand."""
+    results = Calculator.evaluate_many("sqrt", [4, 9])
+    np.testing.assert_array_equal(results, [2, 3])
+    assert math.isnan(Calculations.get_last_calculation()["operand2"])
+
+def test_evaluate_many_divide_by_zero_raises():
+    """Test that errors='raise' keeps the scalar divide-by-zero semantics and records nothing."""
+    with pytest.raises(ValueError, match="Cannot divide by zero"):
+        Calculator.evaluate_many("divide", [1, 2], [1, 0])
+    assert Calculations.get_history().empty
+
+def test_evaluate_many_mask_reports_errors():
+    """Test that errors='mask' masks failed elements and records only the valid rows."""
+    results = Calculator.evaluate_many("sqrt", [4, -1, 16], errors="mask")
+    assert results.mask.tolist() == [False, True, False]
+    assert results.compressed().tolist() == [2.0, 4.0]
+    assert len(Calculations.get_history()) == 2
+
+def test_evaluate_many_invalid_arguments():
+    """Test that unknown operations, missing operands and bad error modes are rejected."""
+    with pytest.raises(ValueError, match="Unknown operation"):
+        Calculator.evaluate_many("power", [1], [2])
+    with pytest.raises(ValueError, match="requires two operand arrays"):
+        Calculator.evaluate_many("add", [1])
+    with pytest.raises(ValueError, match="errors must be"):
+        Calculator.evaluate_many("add", [1], [2], errors="ignore")
+
+@pytest.mark.parametrize("workers", [None, 1])
+def test_evaluate_many_rejects_multidimensional_operands(workers):
+    """Test that 2-D operands are rejected before anything is recorded, so the history stays readable."""
+    with pytest.raises(ValueError, match="one-dimensional"):
+        Calculator.evaluate_many("add", np.ones((2, 3)), np.ones((2, 3)), workers=workers)
+    assert Calculations.get_history().empty
+
+@pytest.fixture
+def small_parallel_batches(monkeypatch):
+    """Send even tiny batches to the process pool, in chunks of 3."""
+    monkeypatch.setattr(batch, "PARALLEL_MIN_ROWS", 0)
+    monkeypatch.setattr(batch, "PARALLEL_CHUNK_SIZE", 3)
+    yield
+    batch.shutdown_pools()
+
+def test_evaluate_many_workers_uses_decimal_kernels(small_parallel_batches):  # pylint: disable=unused-argument,redefined-outer-name
+    """Test that a process-pool batch returns exact Decimals in operand order and records every row in order."""
+    a_values = [Decimal(i) / 10 for i in range(10)]
+    with decimal.localcontext() as context:
+        context.prec = 50  # The caller's context reaches the workers
+        results = Calculator.evaluate_many("divide", a_values, Decimal(3), workers=2)
+        assert list(results) == [value / 3 for value in a_values]
+    assert results.dtype == object
+    assert len(results[1].as_tuple().digits) == 50
+
+    history = Calculations.get_history()
+    assert history["operand1"].tolist() == [float(value) for value in a_values]
+    assert history["result"].tolist() == [float(value / 3) for value in a_values]
+
+def test_evaluate_many_workers_errors(small_parallel_batches):  # pylint: disable=unused-argument,redefined-outer-name
+    """Test that process-pool batches raise or mask failures like the float path."""
+    with pytest.raises(ValueError, match="Cannot take the square root of a negative number"):
+        Calculator.evaluate_many("sqrt", [4, 9, 16, -1, 25], workers=2)
+    assert Calculations.get_history().empty
+
+    results = Calculator.evaluate_many("sqrt", [4, 9, 16, -1, 25], errors="mask", workers=2)
+    assert results.mask.tolist() == [False, False, False, True, False]
+    assert [float(value) for value in results.compressed()] == [2.0, 3.0, 4.0, 5.0]
+    assert Calculations.get_history()["operand1"].tolist() == [4.0, 9.0, 16.0, 25.0]
+
+def test_evaluate_decimal_in_process_matches_scalar_kernels():
+    """Test that the single-worker Decimal path matches the scalar operations and rejects bad input."""
+    a, b, results, invalid, error = batch.evaluate_decimal("divide", [1, 0.1, "2.5"], [4, 0, 2])
+    assert list(a) == [Decimal(1), Decimal("0.1"), Decimal("2.5")]
+    assert list(b) == [Decimal(4), Decimal(0), Decimal(2)]
+    assert results[0] == Decimal("0.25") and results[1].is_nan() and results[2] == Decimal("1.25")
+    assert invalid.tolist() == [False, True, False]
+    assert error == "Cannot divide by zero"
+
+    with pytest.raises(ValueError, match="differ in length"):
+        batch.evaluate_decimal("add", [1, 2], [1, 2, 3])
+    with pytest.raises(ValueError, match="workers must be"):
+        batch.evaluate_decimal("add", [1], [2], workers=0)
+
+def test_evaluate_many_workers_use_configured_precision(small_parallel_batches):  # pylint: disable=unused-argument,redefined-outer-name
+    """Test that the decimal_math precision of the caller reaches the worker processes."""
+    decimal_math.configure_precision(40)
+    try:
+        results = Calculator.evaluate_many("sqrt", [2, 3, 5, 7], workers=2)
+    finally:
+        decimal_math.configure_precision(None)
+    assert [len(value.as_tuple().digits) for value in results] == [40] * 4
+    assert results[0] == decimal.Context(prec=40).sqrt(Decimal(2))
@@ -0,0 +1,38 @@
+"""Runs the microbenchmark suite in benchmarks/bench_suite.py.
+
+The full run is marked as a benchmark and is skipped by default; select it with
+`pytest -m benchmark --benchmark-json results.json`. The smoke test runs every benchmark
+once with tiny inputs so the suite keeps working as the code changes.
+"""
+
+import json
+import pytest
+from benchmarks.bench_suite import compare, run_suite, write_results
+
+def test_benchmark_suite_smoke(tmp_path):
+    """Test that every benchmark runs and that reports can be written and compared."""
+    report = run_suite(history_rows=(10,), persist_rows=10, scale=0.0001)
+    results = report["results"]
+    assert "operations.add" in results
+    assert "calculator.sqrt" in results
+    assert "history.add_calculation.10" in results
+    assert "history.query.index.10" in results
+    assert "history.save.csv" in results and "history.load.records" in results
+    assert "commands.execute.add" in results
+    assert "batch.sqrt.workers.8" in results
+    assert all(result["ns_per_op"] > 0 for result in results.values())
+
+    file_path = tmp_path / "report.json"
+    write_results(report, str(file_path))
+    baseline = json.loads(file_path.read_text())
+    rows = compare(report, baseline)
+    assert len(rows) == len(results)
+    assert all(ratio == 1.0 and not regressed for _, _, _, ratio, regressed in rows)
+
+@pytest.mark.benchmark
+def test_benchmark_suite(request, tmp_path):
+    """Run the quick benchmark suite and write its JSON report."""
+    report = run_suite(quick=True)
+    write_results(report, request.config.getoption("benchmark_json") or str(tmp_path / "benchmarks.json"))
+    for name, result in sorted(report["results"].items()):
+        print(f"{name:<36}{result['ns_per_op']:>14.0f} ns")
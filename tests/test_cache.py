@@ -0,0 +1,94 @@
+"""Unit tests for the calculation result cache."""
+
+import decimal
+from decimal import Decimal
+import pytest
+from calculator import Calculator
+from calculator.cache import CalculationCache, configure_cache, configure_cache_from_env, get_cache
+from calculator.calculation import Calculation
+from calculator.calculations import Calculations
+
+@pytest.fixture
+def cache():
+    """Enable a small LRU cache for the test and disable caching afterwards."""
+    yield configure_cache(True, maxsize=2)
+    configure_cache(False)
+
+def test_lru_eviction_and_counters():
+    """Test that the least recently used entry is evicted and counters are updated."""
+    lru = CalculationCache(maxsize=2)
+    lru.put("a", 1)
+    lru.put("b", 2)
+    assert lru.get("a") == 1  # "a" becomes most recently used
+    lru.put("c", 3)           # evicts "b"
+    assert lru.get("b") is None
+    assert lru.stats() == {"hits": 1, "misses": 1, "evictions": 1, "size": 2, "maxsize": 2, "policy": "lru"}
+
+def test_fifo_eviction_ignores_hits():
+    """Test that the fifo policy evicts in insertion order even after a hit."""
+    fifo = CalculationCache(maxsize=2, policy="fifo")
+    fifo.put("a", 1)
+    fifo.put("b", 2)
+    fifo.get("a")
+    fifo.put("c", 3)  # evicts "a"
+    assert fifo.get("a") is None
+    assert fifo.get("b") == 2
+
+def test_invalid_cache_configuration():
+    """Test that invalid sizes and policies are rejected."""
+    with pytest.raises(ValueError):
+        CalculationCache(maxsize=0)
+    with pytest.raises(ValueError):
+        CalculationCache(policy="random")
+
+def test_perform_uses_cache(cache):
+    """Test that a repeated calculation is served from the cache without calling the operation."""
+    calls = []
+
+    def counting_sqrt(a):
+        calls.append(a)
+        return a.sqrt()
+
+    assert Calculation(counting_sqrt, Decimal(16)).perform() == Decimal(4)
+    assert Calculation(counting_sqrt, Decimal(16)).perform() == Decimal(4)
+    assert len(calls) == 1
+    assert cache.stats()["hits"] == 1
+
+def test_cache_distinguishes_decimal_exponents(cache):
+    """Test that operands that compare equal but print differently are cached separately."""
+    assert str(Calculator.add(Decimal('1'), Decimal('2'))) == "3"
+    assert str(Calculator.add(Decimal('1.0'), Decimal('2'))) == "3.0"
+
+def test_cache_respects_the_decimal_context(cache):
+    """Test that a result cached under one precision or rounding is not reused under another."""
+    Calculations.clear_history()
+    assert Calculator.divide(Decimal(1), Decimal(3)) == Decimal(1) / Decimal(3)
+    with decimal.localcontext(prec=5):
+        assert str(Calculator.divide(Decimal(1), Decimal(3))) == "0.33333"
+    with decimal.localcontext(prec=5, rounding=decimal.ROUND_UP):
+        assert str(Calculator.divide(Decimal(1), Decimal(3))) == "0.33334"
+    assert cache.stats()["hits"] == 0
+    Calculations.clear_history()
+
+def test_cache_hits_are_recorded_in_history(cache):
+    """Test that cached results are still added to history."""
+    Calculations.clear_history()
+    Calculator.multiply(Decimal(3), Decimal(4))
+    Calculator.multiply(Decimal(3), Decimal(4))
+    assert len(Calculations.get_history()) == 2
+    assert cache.stats()["hits"] == 1
+    Calculations.clear_history()
+
+def test_configure_cache_from_env(monkeypatch):
+    """Test that the cache is configured from environment variables, falling back on invalid values."""
+    monkeypatch.setenv("CALCULATION_CACHE_ENABLED", "True")
+    monkeypatch.setenv("CALCULATION_CACHE_SIZE", "not-a-number")
+    monkeypatch.setenv("CALCULATION_CACHE_POLICY", "fifo")
+    configured = configure_cache_from_env()
+    assert get_cache() is configured
+    assert configured.maxsize == 1024
+    assert configured.policy == "fifo"
+
+    monkeypatch.setenv("CALCULATION_CACHE_ENABLED", "False")
+    assert configure_cache_from_env() is None
+    assert get_cache() is None
@@ -9,7 +9,7 @@ as well as the functionality of the Calculation class that encapsulates these op
 from decimal import Decimal
 import pytest
 from calculator.calculation import Calculation
-from calculator.operations import add,  divide
+from calculator.operations import add, divide, OPERATIONS
 
 def test_calculation_operations(operation, expected, a, b):
     """
@@ -45,3 +45,17 @@ def test_divide_by_zero():
     calc = Calculation(divide, Decimal('10'), Decimal('0'))  # Create a Calculation instance with a zero divisor.
     with pytest.raises(ValueError, match = "Cannot divide by zero"):  
         calc.perform()
+
+def test_calculation_uses_slots():
+    """Test that Calculation instances have no per-instance __dict__."""
+    calc = Calculation(add, Decimal('1'), Decimal('2'))
+    assert not hasattr(calc, "__dict__")
+    with pytest.raises(AttributeError):
+        calc.extra = 1  # pylint: disable=assigning-non-slot
+
+def test_calculation_opcodes():
+    """Test that opcodes round-trip through the calculator.operations registry."""
+    calc = Calculation(divide, Decimal('10'), Decimal('4'))
+    assert OPERATIONS[calc.opcode] is divide
+    assert Calculation.from_opcode(calc.opcode, Decimal('10'), Decimal('4')).perform() == Decimal('2.5')
+    assert Calculation(lambda a: a, Decimal('1')).opcode is None  # Not a registered operation
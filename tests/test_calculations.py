@@ -14,6 +14,7 @@ Tests included:
 - `test_clear_history`: Confirms that the history can be cleared and that no records remain afterward.
 """
 
+import pytest
 from calculator.calculation import Calculation
 from calculator.calculations import Calculations
 
@@ -78,3 +79,17 @@ def test_clear_history() -> None:
     
     # Assert that the history is now empty
     assert Calculations.get_history().empty, "History should be empty after clearing"
+
+def test_record_calculation_uses_stored_result() -> None:
+    """
+    Test that record_calculation stores the result computed by perform() without recomputing it.
+    Verifies that recording a calculation that was never performed raises a ValueError.
+    """
+    Calculations.clear_history()
+    calculation = Calculation(add, 1, 2)
+    calculation.perform()
+    Calculations.record_calculation(calculation)
+    assert Calculations.get_last_calculation()["result"] == 3.0
+
+    with pytest.raises(ValueError):
+        Calculations.record_calculation(Calculation(add, 4, 5))
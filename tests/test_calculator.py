@@ -61,3 +61,14 @@ def test_sqrt_negative_number():
     """Test square root of a negative number."""
     with pytest.raises(ValueError):
         Calculator.sqrt(Decimal(-4))
+
+def test_operation_is_performed_once():
+    """Test that each Calculator call evaluates the operation exactly once."""
+    calls = []
+
+    def counting_add(a, b):
+        calls.append((a, b))
+        return a + b
+
+    assert Calculator._perform_operation(Decimal(1), Decimal(2), counting_add) == Decimal(3)
+    assert len(calls) == 1
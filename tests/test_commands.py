@@ -1,7 +1,11 @@
 """Unit tests for the Command and CommandHandler classes."""
 
+from decimal import Decimal
+from typing import Optional
+import pytest
 from calculator.commands import Command
 from calculator.commands import CommandHandler
+from calculator.plugins.add import AddCommand
 
 class TestCommand(Command):
     """A concrete subclass that implements the abstract method."""
@@ -20,3 +24,87 @@ def test_command_handler_with_test_command():
     
     # This checks that the command was executed; adjust based on what you expect.
     assert result is None  # This should pass, depending on your TestCommand logic.
+
+def test_command_handler_lazy_registration():
+    """Test that a command registered as a "module:Class" string is imported on first use."""
+    command_handler = CommandHandler()
+    command_handler.register_command("add", "calculator.plugins.add:AddCommand")
+    assert command_handler.commands["add"] == "calculator.plugins.add:AddCommand"
+
+    command_handler.execute_command("add", 1, 2)
+    assert command_handler.commands["add"] is AddCommand
+
+def test_command_handler_unknown_command():
+    """Test that executing an unregistered command raises ValueError."""
+    command_handler = CommandHandler()
+    with pytest.raises(ValueError, match="Unknown command: missing"):
+        command_handler.execute_command("missing")
+
+class CountingCommand(Command):
+    """A command that takes its operand in execute and counts how often it is instantiated."""
+    instances = 0
+
+    def __init__(self):
+        CountingCommand.instances += 1
+
+    def execute(self, value: Decimal):
+        return value * 2
+
+def test_command_metadata_from_signatures():
+    """Test that arity, argument types and call style are read from the registered class."""
+    command_handler = CommandHandler()
+    command_handler.register_command("add", AddCommand)
+    command_handler.register_command("double", CountingCommand)
+    assert command_handler.metadata["add"] == {"arity": 2, "min_arity": 2, "arg_types": ["Decimal", "Decimal"],
+                                               "call": "init", "stateless": None}
+    assert command_handler.metadata["double"]["arity"] == 1
+    assert command_handler.metadata["double"]["call"] == "execute"
+
+def test_stateless_command_instance_is_reused():
+    """Test that a command taking its arguments in execute is instantiated once."""
+    command_handler = CommandHandler()
+    command_handler.register_command("double", CountingCommand)
+    before = CountingCommand.instances
+    assert command_handler.execute_command("double", Decimal("2")) == Decimal("4")
+    assert command_handler.execute_command("double", Decimal("3")) == Decimal("6")
+    assert CountingCommand.instances == before + 1
+
+def test_stateful_command_is_built_per_call():
+    """Test that stateless=False creates a new instance for every call."""
+    command_handler = CommandHandler()
+    command_handler.register_command("double", CountingCommand, stateless=False)
+    before = CountingCommand.instances
+    command_handler.execute_command("double", Decimal("2"))
+    command_handler.execute_command("double", Decimal("3"))
+    assert CountingCommand.instances == before + 2
+
+def test_command_arguments_are_coerced():
+    """Test that arguments are coerced to the registered argument types."""
+    command_handler = CommandHandler()
+    command_handler.register_command("add", "calculator.plugins.add:AddCommand",
+                                     arity=2, call="init", arg_types=["Decimal", "Decimal"])
+    assert command_handler.execute_command("add", "1", 0.1) == Decimal("1.1")
+
+def test_command_arity_is_checked():
+    """Test that calling a command with the wrong number of arguments raises ValueError."""
+    command_handler = CommandHandler()
+    command_handler.register_command("add", AddCommand)
+    with pytest.raises(ValueError, match=r"add takes 2 argument\(s\) \(1 given\)"):
+        command_handler.execute_command("add", Decimal("1"))
+
+class PageCommand(Command):
+    def execute(self, count: int, limit: Optional[int] = None):
+        return count, limit
+
+def test_optional_arguments_and_int_coercion():
+    """Test that trailing arguments with defaults may be left out and int arguments must be whole numbers."""
+    command_handler = CommandHandler()
+    command_handler.register_command("page", PageCommand)
+    assert command_handler.metadata["page"]["min_arity"] == 1
+    assert command_handler.metadata["page"]["arg_types"] == ["int", "int"]
+    assert command_handler.execute_command("page", Decimal("3")) == (3, None)
+    assert command_handler.execute_command("page", "4", Decimal("-2")) == (4, -2)
+    with pytest.raises(ValueError, match="whole number"):
+        command_handler.execute_command("page", Decimal("1.5"))
+    with pytest.raises(ValueError, match=r"page takes 1 to 2 argument\(s\) \(0 given\)"):
+        command_handler.execute_command("page")
@@ -0,0 +1,96 @@
+"""Unit tests for the precision-aware sin/cos/tan/sqrt engine."""
+
+import decimal
+from decimal import Decimal
+import math
+import pytest
+from calculator import decimal_math, operations
+from calculator.cache import configure_cache
+
+PI_50 = Decimal("3.14159265358979323846264338327950288419716939937510")
+
+@pytest.fixture(autouse=True)
+def float_engine():
+    """Restore the float engine after every test."""
+    yield
+    decimal_math.configure_precision(None)
+
+def test_pi_is_exact_at_any_context_precision():
+    """Test that pi has the requested digits even when the context precision is lower."""
+    truncated = decimal_math.pi(50).quantize(Decimal("1e-50"), rounding=decimal.ROUND_DOWN,
+                                             context=decimal.Context(prec=60))
+    assert truncated == PI_50
+    assert len(decimal_math.pi(50).as_tuple().digits) > decimal.getcontext().prec
+
+@pytest.mark.parametrize("digits", [20, 50, 200])
+def test_identities_hold_to_the_requested_digits(digits):
+    """Test that sin^2 + cos^2 = 1, tan = sin/cos and sqrt(x)^2 = x to the requested precision."""
+    tolerance = Decimal(10) ** (2 - digits)
+    for x in (Decimal("0.7"), Decimal("-2.5"), Decimal("100"), Decimal("-7.3")):
+        sin_x, cos_x = decimal_math.sin(x, digits), decimal_math.cos(x, digits)
+        tan_x = decimal_math.tan(x, digits)
+        with decimal.localcontext() as context:
+            context.prec = digits + 20
+            assert abs(sin_x * sin_x + cos_x * cos_x - 1) < tolerance
+            assert abs(tan_x - sin_x / cos_x) < tolerance * max(abs(tan_x), 1)
+        assert len(sin_x.as_tuple().digits) <= digits
+    root = decimal_math.sqrt(Decimal(2), digits)
+    assert root == decimal.Context(prec=digits).sqrt(Decimal(2))
+    assert len(root.as_tuple().digits) == digits
+
+def test_decimal_path_matches_float_maths():
+    """Test that high-precision results round to the float results for exactly representable arguments."""
+    for x in (0.5, -1.25, 3.0, 1e22, 123456.789):
+        exact = Decimal(x)  # The exact value of the float, so both paths see the same argument
+        assert float(decimal_math.sin(exact, 40)) == pytest.approx(math.sin(x), rel=1e-15, abs=1e-300)
+        assert float(decimal_math.cos(exact, 40)) == pytest.approx(math.cos(x), rel=1e-15, abs=1e-300)
+        assert float(decimal_math.tan(exact, 40)) == pytest.approx(math.tan(x), rel=1e-15, abs=1e-300)
+
+def test_reduction_near_multiples_of_pi():
+    """Test that arguments close to pi keep their accuracy through argument reduction."""
+    x = decimal.Context(prec=37).plus(PI_50)  # Differs from pi by about 4.2e-36
+    expected = decimal.Context(prec=20).plus(decimal.Context(prec=100).subtract(decimal_math.pi(80), x))
+    assert decimal_math.sin(x, 20) == expected  # sin(pi - d) = d to far more than 20 digits
+    with pytest.raises(ValueError, match="too large"):
+        decimal_math.sin(Decimal("1e20000"), 20)
+
+def test_float_fast_path_rounds_to_digits():
+    """Test that precisions up to FLOAT_DIGITS use float maths rounded to the requested digits."""
+    assert decimal_math.sin(Decimal(1), 15) == Decimal("0.841470984807897")
+    assert decimal_math.sqrt(Decimal(2), 6) == Decimal("1.41421")
+    # Outside the float range sqrt falls back to Decimal
+    assert decimal_math.sqrt(Decimal("1e400"), 10) == Decimal("1e200")
+    assert decimal_math.sqrt(Decimal("1e-400"), 10) == Decimal("1e-200")
+
+def test_operations_follow_the_configured_precision():
+    """Test that the default float engine is unchanged and a configured precision reaches the kernels."""
+    assert operations.sin(Decimal(1)) == Decimal(math.sin(1.0))
+    assert operations.sqrt(Decimal(2)) == Decimal(math.sqrt(2.0))
+
+    decimal_math.configure_precision(50)
+    assert operations.sqrt(Decimal(2)) == decimal.Context(prec=50).sqrt(Decimal(2))
+    assert len(operations.cos(Decimal(1)).as_tuple().digits) == 50
+    with pytest.raises(ValueError, match="negative"):
+        operations.sqrt(Decimal(-1))
+
+def test_configure_precision_clears_cache():
+    """Test that results cached at the old precision are dropped and bad precisions are rejected."""
+    cache = configure_cache(True)
+    try:
+        cache.put("key", Decimal(1))
+        decimal_math.configure_precision(30)
+        assert len(cache) == 0
+    finally:
+        configure_cache(False)
+    with pytest.raises(ValueError):
+        decimal_math.configure_precision(0)
+
+def test_configure_precision_from_env(monkeypatch):
+    """Test that MATH_PRECISION sets the precision and empty or invalid values keep the float engine."""
+    monkeypatch.setenv("MATH_PRECISION", "40")
+    assert decimal_math.configure_precision_from_env() == 40
+    assert decimal_math.get_precision() == 40
+    monkeypatch.setenv("MATH_PRECISION", "")
+    assert decimal_math.configure_precision_from_env() is None
+    monkeypatch.setenv("MATH_PRECISION", "lots")
+    assert decimal_math.configure_precision_from_env() is None
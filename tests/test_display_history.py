@@ -3,7 +3,12 @@
 
 import logging
 from unittest.mock import patch
+import pytest
+from calculator.calculations import Calculations
+from calculator.commands import CommandHandler
 from calculator.plugins.display_history import DisplayHistoryCommand
+from calculator.plugins.tail_history import TailHistoryCommand
+from main import process_command
 
 # Set up logging for the tests
 logger = logging.getLogger(__name__)
@@ -23,3 +28,66 @@ def test_display_history_command_success(caplog):
 
     # Assertions
     assert "Successfully retrieved history" in caplog.text  # Check the log message
+
+@pytest.fixture
+def history_rows():
+    """Fill history with 100 additions whose result is the row number."""
+    Calculations.clear_history()
+    Calculations.record_batch("add", list(range(100)), [0] * 100, list(range(100)))
+    yield
+    Calculations.clear_history()
+
+@pytest.mark.parametrize("args, kwargs, rows", [
+    ((), {}, list(range(25)) + list(range(75, 100))),
+    ((3,), {}, [0, 1, 2]),
+    ((), {"tail": 2}, [98, 99]),
+    ((), {"tail": 500}, list(range(100))),
+    ((10, 3), {}, [10, 11, 12]),
+    ((98, 5), {}, [98, 99]),
+    ((200, 5), {}, []),
+])
+def test_display_history_selects_rows(history_rows, capsys, args, kwargs, rows):
+    """Test the default (cut to its first and last rows), first-n, tail and offset/limit modes, with rows numbered by their place in the history."""
+    history = DisplayHistoryCommand().execute(*args, **kwargs)
+    assert history.index.tolist() == rows
+    assert history["result"].tolist() == rows
+    output = capsys.readouterr().out
+    assert ("of 100" in output) if rows else ("no calculations" in output)
+
+def test_display_history_keeps_rows_out_of_the_log(history_rows, caplog):
+    """Test that only the selection is logged, not the formatted rows."""
+    with caplog.at_level(logging.INFO):
+        DisplayHistoryCommand().execute(tail=5)
+    assert "5 of 100 rows, from row 95" in caplog.text
+    assert "operand1" not in caplog.text
+
+def test_display_history_arguments_from_the_repl(history_rows, capsys):
+    """Test that REPL arguments are coerced to whole numbers and bad ones are rejected."""
+    command_handler = CommandHandler()
+    command_handler.register_command("display_history", DisplayHistoryCommand)
+    assert process_command(command_handler, "display_history(2, 3)", logger)
+    assert "rows 2 to 4 of 100" in capsys.readouterr().out
+    assert not process_command(command_handler, "display_history(1.5)", logger)
+    assert not process_command(command_handler, "display_history(-1)", logger)
+    assert not process_command(command_handler, "display_history(-1, 2)", logger)
+    assert not process_command(command_handler, "display_history(1, 2, 3)", logger)
+
+    command_handler.register_command("tail_history", TailHistoryCommand)
+    assert process_command(command_handler, "tail_history(3)", logger)
+    assert "rows 97 to 99 of 100" in capsys.readouterr().out
+    assert not process_command(command_handler, "tail_history()", logger)
+
+def test_display_history_rejects_mixed_modes(history_rows):
+    """Test that tail cannot be combined with count or limit."""
+    with pytest.raises(ValueError, match="either tail or count"):
+        DisplayHistoryCommand().execute(3, tail=2)
+
+def test_display_history_shows_short_history_in_full(capsys):
+    """Test that a history of at most DISPLAY_ROWS rows is shown without cutting it."""
+    Calculations.clear_history()
+    Calculations.record_batch("add", list(range(5)), [0] * 5, list(range(5)))
+    try:
+        assert DisplayHistoryCommand().execute().index.tolist() == list(range(5))
+        assert "rows 0 to 4 of 5" in capsys.readouterr().out
+    finally:
+        Calculations.clear_history()
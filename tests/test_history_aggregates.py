@@ -0,0 +1,124 @@
+"""Unit tests for the running per-operation aggregates and the summary command."""
+
+from decimal import Decimal
+import math
+import numpy as np
+import pandas as pd
+import pytest
+from calculator import Calculator
+from calculator.calculations import Calculations
+from calculator.history_aggregates import OperationAggregates, RunningStats
+from calculator.plugins.summary import SummaryCommand
+
+pytestmark = pytest.mark.usefixtures("unbounded_history")
+
+def expected_summary(frame: pd.DataFrame) -> dict:
+    """The summary computed from scratch with a pandas groupby."""
+    grouped = frame.groupby("operation")["result"]
+    return {
+        operation: {"count": len(results), "sum": results.sum(), "min": results.min(), "max": results.max(),
+                    "mean": results.mean(), "variance": results.var()}
+        for operation, results in grouped
+    }
+
+def assert_summary_matches(summary: dict, frame: pd.DataFrame):
+    expected = expected_summary(frame)
+    assert list(summary) == sorted(expected)
+    for operation, stats in expected.items():
+        for name, value in stats.items():
+            assert summary[operation][name] == pytest.approx(value, rel=1e-9, nan_ok=True), (operation, name)
+
+def test_running_stats_single_values_and_arrays_agree():
+    """Test that Welford updates and merged array batches give numpy's mean, variance, min and max."""
+    values = np.random.default_rng(0).normal(1e6, 3.0, 1000)  # Large mean, small spread: naive variance fails here
+    one_by_one = RunningStats()
+    for value in values:
+        one_by_one.add(float(value))
+    merged = RunningStats()
+    for batch in np.array_split(values, 7):
+        merged.add_array(batch)
+
+    for stats in (one_by_one, merged):
+        assert stats.count == 1000
+        assert stats.mean == pytest.approx(values.mean(), rel=1e-12)
+        assert stats.variance == pytest.approx(values.var(ddof=1), rel=1e-9)
+        assert (stats.minimum, stats.maximum) == (values.min(), values.max())
+    single = RunningStats()
+    single.add(2.0)
+    assert math.isnan(single.variance)
+    assert RunningStats().summary()["count"] == 0
+
+def test_merged_aggregates_match_one_pass():
+    """Test that merging aggregates of two parts gives the aggregates of the whole."""
+    values = np.random.default_rng(1).normal(50.0, 2.0, 300)
+    first, second, whole = OperationAggregates(), OperationAggregates(), OperationAggregates()
+    first.extend("add", None, None, values[:100])
+    second.extend(["add"] * 150 + ["sqrt"] * 50, None, None, values[100:])
+    whole.extend(["add"] * 250 + ["sqrt"] * 50, None, None, values)
+    merged = first.merged(second).summary()
+    for operation, stats in whole.summary().items():
+        for name, value in stats.items():
+            assert merged[operation][name] == pytest.approx(value, rel=1e-9), (operation, name)
+    assert first.summary()["add"]["count"] == 100  # The parts are left unchanged
+
+def test_operation_aggregates_group_by_name():
+    """Test that batches with mixed operation names are split per operation."""
+    aggregates = OperationAggregates()
+    aggregates.extend(["add", "sqrt", "add"], None, None, [1.0, 2.0, 3.0])
+    aggregates.append("sqrt", 16.0, None, 4.0)
+    summary = aggregates.summary()
+    assert list(summary) == ["add", "sqrt"]
+    assert summary["add"]["sum"] == 4.0
+    assert summary["sqrt"]["mean"] == 3.0
+    aggregates.clear()
+    assert aggregates.summary() == {}
+
+def test_summary_follows_recorded_history():
+    """Test that single calculations and batches update the summary, and clearing resets it."""
+    calculator = Calculator()
+    for a, b in [(1, 2), (5, 7), (-3, 4)]:
+        calculator.add(Decimal(a), Decimal(b))
+    calculator.sqrt(Decimal(9))
+    Calculations.record_batch("multiply", [2, 3, 4], [4, 5, 6], [8, 15, 24])
+
+    assert_summary_matches(Calculations.summarize(), Calculations.get_history())
+    assert Calculations.summarize()["add"]["count"] == 3
+    assert math.isnan(Calculations.summarize()["sqrt"]["variance"])
+    Calculations.clear_history()
+    assert Calculations.summarize() == {}
+
+def test_summary_includes_spilled_rows(tmp_path):
+    """Test that rows evicted from a bounded history still count towards the summary."""
+    Calculations.configure_history(4, str(tmp_path / "spill.csv"))
+    Calculations.record_batch("add", np.arange(10.0), np.ones(10), np.arange(10.0) + 1)
+    Calculations.record_batch("divide", [9.0, 8.0], [3.0, 2.0], [3.0, 4.0])
+
+    assert_summary_matches(Calculations.summarize(), Calculations.get_history(full=True))
+    assert Calculations.summarize()["add"]["count"] == 10
+
+@pytest.mark.parametrize("file_name", ["history.csv", "history.rec"])
+def test_load_history_rebuilds_the_summary(tmp_path, file_name):
+    """Test that loading a file (memory-mapped or not) replaces the summary with the file's rows."""
+    file_path = str(tmp_path / file_name)
+    Calculations.record_batch("subtract", [5.0, 6.0, 9.0], [1.0, 1.0, 2.0], [4.0, 5.0, 7.0])
+    Calculations.record_batch("cos", [0.0], None, [1.0])
+    Calculations.save_history(file_path)
+    saved = Calculations.get_history(full=True)
+    Calculations.record_batch("add", [1.0], [1.0], [2.0])
+
+    Calculations.load_history(file_path)
+    assert Calculations._mapped_aggregates is None  # Mapped rows are not read until they are summarized
+    assert_summary_matches(Calculations.summarize(), saved)
+    Calculations.record_batch("cos", [0.0], None, [1.0])
+    assert Calculations.summarize()["cos"]["count"] == 2
+
+def test_summary_command(capsys):
+    """Test that the summary command prints a row per operation and returns the summary."""
+    assert SummaryCommand().execute() == {}
+    assert "No calculation history" in capsys.readouterr().out
+
+    Calculations.record_batch("add", [1.0, 2.0], [2.0, 3.0], [3.0, 5.0])
+    summary = SummaryCommand().execute()
+    output = capsys.readouterr().out
+    assert summary["add"]["mean"] == 4.0
+    assert "variance" in output and "add" in output
@@ -0,0 +1,139 @@
+"""Unit tests for the columnar HistoryBuffer used by Calculations."""
+
+import math
+import numpy as np
+import pandas as pd
+import pytest
+from calculator.calculations import Calculations
+from calculator.history_buffer import HistoryBuffer, HistorySpill, RingHistoryBuffer, HISTORY_COLUMNS
+
+def test_append_and_to_frame():
+    """Test that appended rows are materialized into a DataFrame in order."""
+    buffer = HistoryBuffer()
+    buffer.append("add", 1.0, 2.0, 3.0)
+    buffer.append("sqrt", 4.0, None, 2.0)
+
+    frame = buffer.to_frame()
+    assert list(frame.columns) == HISTORY_COLUMNS
+    assert len(frame) == 2
+    assert frame.iloc[0].to_dict() == {"operation": "add", "operand1": 1.0, "operand2": 2.0, "result": 3.0}
+    assert math.isnan(frame.iloc[1]["operand2"])
+
+def test_frame_is_cached_until_next_write():
+    """Test that the DataFrame is reused between reads and rebuilt after a write."""
+    buffer = HistoryBuffer()
+    buffer.append("add", 1.0, 2.0, 3.0)
+    first = buffer.to_frame()
+    assert buffer.to_frame() is first
+
+    buffer.append("subtract", 5.0, 3.0, 2.0)
+    second = buffer.to_frame()
+    assert second is not first
+    assert len(second) == 2
+    assert len(first) == 1  # Previously returned frames are not mutated by later writes
+
+def test_load_frame_and_clear():
+    """Test loading rows from a DataFrame and clearing the buffer."""
+    buffer = HistoryBuffer()
+    buffer.load_frame(pd.DataFrame([{"operation": "multiply", "operand1": 2, "operand2": 3, "result": 6}]))
+    assert len(buffer) == 1
+    assert buffer.last_row() == {"operation": "multiply", "operand1": 2.0, "operand2": 3.0, "result": 6.0}
+
+    buffer.clear()
+    assert len(buffer) == 0
+    assert buffer.last_row() is None
+    assert buffer.to_frame().empty
+
+def test_ring_buffer_keeps_most_recent_rows_and_spills_the_rest(tmp_path):
+    """Test that a full ring evicts the oldest rows to the spill file in order."""
+    ring = RingHistoryBuffer(3, HistorySpill(str(tmp_path / "spill.csv")))
+    for i in range(5):
+        ring.append("add", float(i), 1.0, float(i + 1))
+
+    assert len(ring) == 3
+    assert ring.spilled_rows == 2
+    assert ring.to_frame()["operand1"].tolist() == [2.0, 3.0, 4.0]
+    assert ring.last_row()["result"] == 5.0
+
+    full = pd.concat(list(ring.iter_frames(chunksize=1)), ignore_index=True)
+    assert full["operand1"].tolist() == [0.0, 1.0, 2.0, 3.0, 4.0]
+
+def test_ring_buffer_extend_wraps_and_overflows(tmp_path):
+    """Test batch appends that wrap around the ring and batches larger than the capacity."""
+    ring = RingHistoryBuffer(4, HistorySpill(str(tmp_path / "spill.csv")))
+    ring.extend("multiply", np.arange(3), None, np.arange(3))
+    ring.extend("multiply", np.arange(3, 6), None, np.arange(3, 6))
+    assert ring.to_frame()["result"].tolist() == [2.0, 3.0, 4.0, 5.0]
+
+    ring.extend("divide", np.arange(6, 16), np.ones(10), np.arange(6, 16))
+    assert ring.to_frame()["result"].tolist() == [12.0, 13.0, 14.0, 15.0]
+    assert ring.spilled_rows == 12
+    full = pd.concat(list(ring.iter_frames()), ignore_index=True)
+    assert full["result"].tolist() == [float(i) for i in range(16)]
+
+def test_ring_buffer_clear_removes_spill_file(tmp_path):
+    """Test that clearing a bounded history also removes spilled rows."""
+    spill_path = tmp_path / "spill.csv"
+    ring = RingHistoryBuffer(1, HistorySpill(str(spill_path)))
+    ring.append("add", 1.0, 1.0, 2.0)
+    ring.append("add", 2.0, 2.0, 4.0)
+    list(ring.iter_frames())  # Forces the pending spilled row to disk
+    assert spill_path.exists()
+
+    ring.clear()
+    assert len(ring) == 0
+    assert ring.spilled_rows == 0
+    assert not spill_path.exists()
+    with pytest.raises(ValueError):
+        RingHistoryBuffer(0)
+
+def test_bounded_calculations_history(tmp_path):
+    """Test that Calculations keeps only max_rows in memory but returns everything with full=True."""
+    Calculations.clear_history()
+    Calculations.configure_history(max_rows=2, spill_path=str(tmp_path / "spill.csv"))
+    try:
+        for i in range(4):
+            Calculations.record_batch("add", [i], [i], [2 * i])
+        assert len(Calculations.get_history()) == 2
+        assert len(Calculations.display_history(full=True)) == 4
+        assert Calculations.get_last_calculation()["result"] == 6.0
+    finally:
+        Calculations.configure_history()
+        Calculations.clear_history()
+
+def test_take_rows_by_position():
+    """Test that both buffers return rows by position, the ring counting from its oldest row."""
+    buffer = HistoryBuffer()
+    buffer.extend(["add", "sqrt", "divide"], [1.0, 4.0, 9.0], [2.0, None, 3.0], [3.0, 2.0, 3.0])
+    rows = buffer.take([2, 0])
+    assert rows["operation"].tolist() == ["divide", "add"]
+    assert rows["operand1"].tolist() == [9.0, 1.0]
+    assert list(buffer.take([]).columns) == HISTORY_COLUMNS
+
+    ring = RingHistoryBuffer(3)
+    ring.extend("add", np.arange(5.0), np.zeros(5), np.arange(5.0))  # Wraps, keeping rows 2, 3 and 4
+    assert ring.take([0, 2])["result"].tolist() == [2.0, 4.0]
+
+def test_slice_history_of_bounded_history(tmp_path):
+    """Test that slices of bounded history match the full history, whether they reach spilled rows or not."""
+    Calculations.clear_history()
+    Calculations.configure_history(max_rows=5, spill_path=str(tmp_path / "spill.csv"))
+    try:
+        Calculations.record_batch("add", np.arange(12.0), np.zeros(12), np.arange(12.0))
+        assert Calculations.slice_history(8, 11)["result"].tolist() == [8.0, 9.0, 10.0]
+        assert Calculations.slice_history(5, 9)["result"].tolist() == [5.0, 6.0, 7.0, 8.0]
+        assert Calculations.tail_history(2)["result"].tolist() == [10.0, 11.0]
+    finally:
+        Calculations.configure_history()
+        Calculations.clear_history()
+
+@pytest.mark.parametrize("buffer", [HistoryBuffer(), RingHistoryBuffer(4)])
+def test_extend_rejects_mismatched_columns(buffer):
+    """Test that a batch whose columns differ in length or shape is rejected without changing the buffer."""
+    with pytest.raises(ValueError, match="equal length"):
+        buffer.extend(["add", "add"], np.ones(6), np.ones(6), np.ones(6))
+    with pytest.raises(ValueError, match="one-dimensional"):
+        buffer.extend("add", np.ones((2, 3)), np.ones((2, 3)), np.ones((2, 3)))
+    assert len(buffer) == 0
+    buffer.extend("add", [1.0], [2.0], [3.0])
+    assert buffer.to_frame()["result"].tolist() == [3.0]
@@ -0,0 +1,124 @@
+"""Stress tests for recording history from many threads at once."""
+
+from decimal import Decimal
+import threading
+import pytest
+from calculator import Calculator
+from calculator.cache import CalculationCache
+from calculator.calculations import Calculations
+
+THREADS = 8
+CALLS_PER_THREAD = 2000
+
+pytestmark = pytest.mark.usefixtures("unbounded_history")
+
+def run_threads(worker, count=THREADS):
+    """Start count threads together on worker(thread_index) and wait for all of them."""
+    barrier = threading.Barrier(count)
+    errors = []
+
+    def run(index):
+        barrier.wait()
+        try:
+            worker(index)
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            errors.append(e)
+
+    threads = [threading.Thread(target=run, args=(index,)) for index in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors
+
+def record_from_threads():
+    """Every thread adds CALLS_PER_THREAD rows tagged (thread, call) while a reader polls the history."""
+    done = threading.Event()
+    lengths = []
+
+    def reader():
+        while not done.is_set():
+            lengths.append(Calculations.history_length())
+            Calculations.get_last_calculation()
+
+    poller = threading.Thread(target=reader)
+    poller.start()
+    try:
+        run_threads(lambda thread: [Calculator.add(Decimal(thread), Decimal(call)) for call in range(CALLS_PER_THREAD)])
+    finally:
+        done.set()
+        poller.join()
+    assert lengths == sorted(lengths)  # The history never shrinks while rows are being added
+
+def assert_every_row_recorded_once(history):
+    """Check that no row is lost or duplicated and that each thread's rows keep their order."""
+    assert len(history) == THREADS * CALLS_PER_THREAD
+    rows = list(zip(history["operand1"].astype(int), history["operand2"].astype(int)))
+    assert len(set(rows)) == len(rows)
+    assert set(rows) == {(thread, call) for thread in range(THREADS) for call in range(CALLS_PER_THREAD)}
+    for thread in range(THREADS):
+        calls = [call for row_thread, call in rows if row_thread == thread]
+        assert calls == list(range(CALLS_PER_THREAD))
+
+def test_concurrent_recording_loses_no_rows():
+    """Test that concurrent Calculator calls record every row exactly once."""
+    record_from_threads()
+    assert_every_row_recorded_once(Calculations.get_history())
+
+def test_concurrent_recording_with_bounded_history(tmp_path):
+    """Test concurrent recording into a ring buffer that spills evicted rows to disk."""
+    Calculations.configure_history(1000, str(tmp_path / "spill.csv"))
+    record_from_threads()
+    assert Calculations.history_length() == THREADS * CALLS_PER_THREAD
+    assert_every_row_recorded_once(Calculations.get_history(full=True))
+
+def test_concurrent_recording_with_shared_cache(monkeypatch):
+    """Test that threads sharing a small, constantly evicting cache get correct results."""
+    monkeypatch.setattr("calculator.cache._cache", CalculationCache(maxsize=16))
+
+    def worker(thread):
+        for call in range(CALLS_PER_THREAD):
+            assert Calculator.add(Decimal(call % 32), Decimal(1)) == Decimal(call % 32 + 1)
+
+    run_threads(worker)
+    assert Calculations.history_length() == THREADS * CALLS_PER_THREAD
+
+def test_concurrent_save_matches_saved_row_count(tmp_path):
+    """Test that rows recorded during a journal save are journaled by the next save, not skipped."""
+    file_path = str(tmp_path / "history.csv")
+    Calculations.save_history(file_path, journal=True)
+    writer_finished = threading.Event()
+
+    def worker(thread):
+        if thread == 0:
+            while not writer_finished.is_set():  # Save repeatedly while rows are being added
+                Calculations.save_history(file_path, journal=True)
+        else:
+            for call in range(CALLS_PER_THREAD):
+                Calculator.add(Decimal(thread), Decimal(call))
+            writer_finished.set()
+
+    run_threads(worker, count=4)
+    Calculations.save_history(file_path, journal=True)
+    assert Calculations.history_length() == 3 * CALLS_PER_THREAD
+    Calculations.clear_history()
+    Calculations.load_history(file_path)
+    assert Calculations.history_length() == 3 * CALLS_PER_THREAD
+
+def test_partly_read_history_iterator_does_not_hold_the_lock(tmp_path):
+    """Test that another thread can write while an iter_history() generator is suspended, and close it."""
+    Calculations.configure_history(2, str(tmp_path / "spill.csv"))
+    Calculations.record_batch("add", [1.0, 2.0, 3.0, 4.0], [1.0] * 4, [2.0, 3.0, 4.0, 5.0])
+    chunks = Calculations.iter_history(chunksize=1)
+    first = next(chunks)
+
+    def worker(thread):
+        Calculations.record_batch("add", [9.0] * 5, [1.0] * 5, [10.0] * 5)  # Evicts rows into the spill file
+        Calculations.clear_history()
+        chunks.close()
+
+    writer = threading.Thread(target=worker, args=(0,))
+    writer.start()
+    writer.join(timeout=5)
+    assert not writer.is_alive()
+    assert first["operand1"].tolist() == [1.0]
@@ -19,9 +19,9 @@ from calculator.operations import add, subtract, divide  # Only importing what i
 
 
 @pytest.fixture
-def set_env(monkeypatch):
+def set_env(monkeypatch, tmp_path):
     """Fixture to set the environment variable for the history file path."""
-    monkeypatch.setenv("HISTORY_FILE_PATH", "test_history.csv")  # Path for the test
+    monkeypatch.setenv("HISTORY_FILE_PATH", str(tmp_path / "test_history.csv"))  # Path for the test
 
 
 @pytest.fixture
@@ -55,6 +55,18 @@ def test_add_and_get_last_calculation(history_facade):
         assert last_calc.perform() == 7
 
 
+def test_record_calculation(history_facade):
+    """Test that an already performed calculation is recorded with its stored result."""
+    calculation = Calculation(subtract, 9, 4)
+    calculation.perform()
+
+    history_facade.record_calculation(calculation)
+
+    last_calc = history_facade.get_last_calculation()
+    assert last_calc["operation"] == "subtract"
+    assert last_calc["result"] == 5
+
+
 def test_save_and_load_history(history_facade):
     """Test saving and loading history."""
     history_facade.clear_history()
@@ -183,6 +195,7 @@ def test_save_history_error_handling(history_facade):
 
 def test_load_history_error_handling(history_facade):
     """Test handling error while loading history."""
+    history_facade.save_history()  # The file must exist for the read to be attempted
     with patch('pandas.read_csv') as mock_read_csv:
         mock_read_csv.side_effect = Exception("Failed to load history.")
         with pytest.raises(Exception, match="Failed to load history."):
@@ -194,3 +207,20 @@ def test_display_history_error_handling(history_facade):
     with patch.object(Calculations, 'display_history', side_effect=Exception("Display history error")):
         with pytest.raises(Exception, match="Display history error"):
             history_facade.display_history()
+
+
+def test_configure_from_env_bounds_history(history_facade, monkeypatch, tmp_path):
+    """Test that HISTORY_MAX_ROWS and HISTORY_SPILL_PATH switch on bounded history."""
+    history_facade.clear_history()
+    monkeypatch.setenv("HISTORY_MAX_ROWS", "1")
+    monkeypatch.setenv("HISTORY_SPILL_PATH", str(tmp_path / "spill.csv"))
+    history_facade.configure_from_env()
+    try:
+        history_facade.add_calculation(Calculation(add, 1, 2))
+        history_facade.add_calculation(Calculation(add, 3, 4))
+        assert len(history_facade.get_history()) == 1
+        assert len(history_facade.get_history(full=True)) == 2
+    finally:
+        monkeypatch.setenv("HISTORY_MAX_ROWS", "not-a-number")
+        history_facade.configure_from_env()  # Falls back to unbounded history
+        history_facade.clear_history()
@@ -0,0 +1,176 @@
+"""Unit tests for the history file formats used by save_history/load_history."""
+
+import importlib.util
+import math
+import numpy as np
+import pandas as pd
+import pytest
+from calculator.calculations import Calculations
+from calculator.history_facade.history_facade import HistoryFacade
+from calculator.history_formats import (MappedHistory, count_rows, detect_compression, detect_format,
+                                        iter_history_file, read_history, sniff_compression, write_history)
+
+HAS_PYARROW = importlib.util.find_spec("pyarrow") is not None
+
+CODECS = [
+    ("history.csv.gz", "gzip"),
+    pytest.param("history.csv.zst", "zstd", marks=pytest.mark.skipif(
+        importlib.util.find_spec("zstandard") is None, reason="zstandard not installed")),
+    pytest.param("history.csv.lz4", "lz4", marks=pytest.mark.skipif(
+        importlib.util.find_spec("lz4") is None, reason="lz4 not installed")),
+]
+
+FORMATS = [
+    ("history.csv", "csv"),
+    ("history.npz", "npz"),
+    ("history.rec", "records"),
+    pytest.param("history.parquet", "parquet", marks=pytest.mark.skipif(not HAS_PYARROW, reason="pyarrow not installed")),
+    pytest.param("history.feather", "feather", marks=pytest.mark.skipif(not HAS_PYARROW, reason="pyarrow not installed")),
+]
+
+def sample_history():
+    """Build a small history with a binary and a unary row."""
+    return pd.DataFrame({
+        "operation": ["add", "sqrt"],
+        "operand1": [1.5, 16.0],
+        "operand2": [2.5, float("nan")],
+        "result": [4.0, 4.0]
+    })
+
+def test_detect_format():
+    """Test that an explicit format wins over the extension and unknown extensions default to csv."""
+    assert detect_format("history.parquet") == "parquet"
+    assert detect_format("history.arrow") == "feather"
+    assert detect_format("history.txt") == "csv"
+    assert detect_format("history.csv", "NPZ") == "npz"
+    with pytest.raises(ValueError):
+        detect_format("history.csv", "xlsx")
+
+@pytest.mark.parametrize("file_name, fmt", FORMATS)
+def test_round_trip_keeps_rows_and_dtypes(tmp_path, file_name, fmt):
+    """Test that each format reads back the same rows with float operand and result columns."""
+    file_path = str(tmp_path / file_name)
+    write_history(sample_history(), file_path)
+    loaded = read_history(file_path)
+
+    assert detect_format(file_path) == fmt
+    assert loaded["operation"].tolist() == ["add", "sqrt"]
+    assert loaded["operand1"].dtype == float
+    assert loaded["result"].tolist() == [4.0, 4.0]
+    assert math.isnan(loaded["operand2"][1])
+
+@pytest.mark.parametrize("file_name, fmt", FORMATS)
+def test_calculations_save_and_load(tmp_path, file_name, fmt):
+    """Test that Calculations saves and loads history in every format."""
+    file_path = str(tmp_path / file_name)
+    Calculations.clear_history()
+    Calculations.record_batch("multiply", [2, 3], [4, 5], [8, 15])
+    Calculations.save_history(file_path)
+    Calculations.clear_history()
+
+    Calculations.load_history(file_path)
+    assert Calculations.get_history()["result"].tolist() == [8.0, 15.0]
+    Calculations.clear_history()
+
+def test_mapped_history_reads_rows_without_loading(tmp_path):
+    """Test that a records file is memory-mapped and that tail, slice and last row read from the mapping."""
+    file_path = str(tmp_path / "history.rec")
+    count = 10_000
+    write_history(pd.DataFrame({
+        "operation": ["add"] * count,
+        "operand1": np.arange(count, dtype=float),
+        "operand2": np.ones(count),
+        "result": np.arange(count, dtype=float) + 1
+    }), file_path)
+
+    Calculations.clear_history()
+    Calculations.load_history(file_path)
+    try:
+        assert isinstance(Calculations._mapped._records, np.memmap)
+        assert Calculations.history_length() == count
+        assert Calculations.get_last_calculation()["result"] == float(count)
+        assert HistoryFacade().slice_history(10, 13)["operand1"].tolist() == [10.0, 11.0, 12.0]
+
+        # New rows go to memory after the mapped rows
+        Calculations.record_batch("multiply", [2.0], [3.0], [6.0])
+        tail = HistoryFacade().tail_history(2)
+        assert tail["operation"].tolist() == ["add", "multiply"]
+        assert Calculations.get_last_calculation()["result"] == 6.0
+        assert len(Calculations.get_history()) == count + 1
+    finally:
+        Calculations.clear_history()
+    assert Calculations.history_length() == 0
+
+def test_mapped_history_rejects_other_files(tmp_path):
+    """Test that files without the records header are rejected."""
+    file_path = tmp_path / "history.rec"
+    file_path.write_bytes(b"operation,operand1\n")
+    with pytest.raises(ValueError):
+        MappedHistory(str(file_path))
+
+def test_mapped_history_empty_file(tmp_path):
+    """Test that an empty records file maps to an empty history."""
+    file_path = str(tmp_path / "history.rec")
+    write_history(pd.DataFrame(columns=["operation", "operand1", "operand2", "result"]), file_path)
+    mapped = MappedHistory(file_path)
+    assert len(mapped) == 0
+    assert mapped.last_row() is None
+    assert mapped.tail(5).empty
+
+def test_detect_compression():
+    """Test that compression follows an explicit setting, then a trailing extension, and is csv only."""
+    assert detect_format("history.csv.gz") == "csv"
+    assert detect_format("history.npz.zst") == "npz"
+    assert detect_compression("history.csv.zst") == "zstd"
+    assert detect_compression("history.csv") is None
+    assert detect_compression("history.csv", "LZ4") == "lz4"
+    assert detect_compression("history.csv.gz", "none") is None
+    with pytest.raises(ValueError):
+        detect_compression("history.csv", "brotli")
+    with pytest.raises(ValueError, match="only supported for csv"):
+        write_history(sample_history(), "history.npz", compression="gzip")
+
+@pytest.mark.parametrize("file_name, codec", CODECS)
+def test_compressed_csv_round_trip_and_streaming(tmp_path, file_name, codec):
+    """Test that compressed CSV reads back whole, in chunks and by row count, and is smaller than plain CSV."""
+    file_path = str(tmp_path / file_name)
+    count = 5_000
+    frame = pd.DataFrame({
+        "operation": ["add", "sqrt"] * (count // 2),
+        "operand1": np.arange(count, dtype=float),
+        "operand2": np.ones(count),
+        "result": np.arange(count, dtype=float) + 1
+    })
+    write_history(frame, file_path)
+    frame.to_csv(tmp_path / "plain.csv", index=False)
+
+    assert sniff_compression(file_path) == codec
+    assert (tmp_path / file_name).stat().st_size < (tmp_path / "plain.csv").stat().st_size / 2
+    pd.testing.assert_frame_equal(read_history(file_path), frame)
+    chunks = list(iter_history_file(file_path, chunksize=1_000, start=10, stop=2_510, operations=["sqrt"]))
+    assert len(chunks) == 3 and sum(len(chunk) for chunk in chunks) == 1_250
+    assert count_rows(file_path) == count
+
+def test_save_history_compression_from_config(tmp_path, monkeypatch):
+    """Test that HISTORY_COMPRESSION compresses a plain-named file, loading sniffs it and compaction keeps it."""
+    file_path = str(tmp_path / "history.csv")
+    monkeypatch.setenv("HISTORY_FILE_PATH", file_path)
+    monkeypatch.setenv("HISTORY_COMPRESSION", "gzip")
+    monkeypatch.setenv("HISTORY_SAVE_MODE", "journal")
+    facade = HistoryFacade()
+    Calculations.clear_history()
+    try:
+        Calculations.record_batch("add", [1, 2], [3, 4], [4, 6])
+        facade.save_history()
+        assert sniff_compression(file_path) == "gzip"
+        Calculations.record_batch("divide", [8], [2], [4])
+        facade.save_history()  # Appended to the plain CSV journal
+
+        Calculations.clear_history()
+        facade.load_history()
+        assert Calculations.get_history()["result"].tolist() == [4.0, 6.0, 4.0]
+        facade.compact_history()
+        assert sniff_compression(file_path) == "gzip"
+        assert read_history(file_path)["operation"].tolist() == ["add", "add", "divide"]
+    finally:
+        Calculations.clear_history()
@@ -0,0 +1,145 @@
+"""Unit tests for the sorted history indexes and HistoryFacade.query."""
+
+import numpy as np
+import pandas as pd
+import pytest
+from calculator import history_index
+from calculator.calculations import Calculations
+from calculator.history_buffer import HistoryBuffer, RingHistoryBuffer
+from calculator.history_facade.history_facade import HistoryFacade
+from calculator.history_index import HistoryIndexes
+
+@pytest.fixture(autouse=True)
+def unindexed_history():
+    """Start and finish each test with empty, unbounded, unindexed history."""
+    Calculations.configure_history(0)
+    Calculations.configure_indexes(None)
+    Calculations.clear_history()
+    yield
+    Calculations.configure_history(0)
+    Calculations.configure_indexes(None)
+    Calculations.clear_history()
+
+def scan(frame: pd.DataFrame, column: str, low=None, high=None) -> pd.DataFrame:
+    """The expected query result, by boolean mask and a stable sort on the column."""
+    mask = frame[column].notna()
+    if low is not None:
+        mask &= frame[column] >= low
+    if high is not None:
+        mask &= frame[column] <= high
+    return frame[mask].sort_values(column, kind="stable").reset_index(drop=True)
+
+def record_random_history(rows: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    operations = rng.choice(["add", "subtract", "multiply", "sqrt"], rows).tolist()
+    operand1 = rng.integers(0, 50, rows).astype(float)
+    results = rng.integers(-100, 100, rows).astype(float)
+    Calculations.record_batch(operations, operand1, np.ones(rows), results)
+
+def test_indexes_match_a_scan_across_merges(monkeypatch):
+    """Test that range and point lookups match a full scan before and after recent rows are merged."""
+    monkeypatch.setattr(history_index, "MERGE_ROWS", 50)
+    Calculations.configure_indexes(["result", "operand1", "operation"])
+    record_random_history(300)
+    Calculations.query("result")  # Merges the 300 rows into the sorted arrays
+    for row in range(40):  # Fewer than MERGE_ROWS, so these stay in the linearly scanned tail
+        Calculations.record_batch("divide", [float(row)], [2.0], [row / 2])
+    history = Calculations.get_history()
+
+    for column, low, high in [("result", -10, 10), ("result", 5, 5), ("result", None, -90), ("result", 95, None),
+                              ("operand1", 7, 7), ("operand1", 45, None), ("operation", "sqrt", "sqrt"),
+                              ("operation", "divide", "divide"), ("result", 1000, None)]:
+        pd.testing.assert_frame_equal(Calculations.query(column, low=low, high=high), scan(history, column, low, high))
+    assert Calculations._indexes._merged_rows == 300
+    record_random_history(100, seed=1)
+    pd.testing.assert_frame_equal(HistoryFacade().query("operand1", value=3),
+                                  scan(Calculations.get_history(), "operand1", 3, 3))
+
+def test_index_search_uses_sorted_runs(monkeypatch):
+    """Test that merged rows are kept sorted, ties stay in history order and NaN stays out of open ranges."""
+    monkeypatch.setattr(history_index, "MERGE_ROWS", 0)
+    buffer = HistoryBuffer()
+    indexes = HistoryIndexes(buffer, ["result"])
+    buffer.extend("add", [1.0, 2.0, 3.0, 4.0], None, [5.0, 1.0, float("nan"), 5.0])
+    assert indexes.search("result", 5, 5).tolist() == [0, 3]
+    buffer.append("add", 0.0, 0.0, 5.0)
+    assert indexes.search("result", 1).tolist() == [1, 0, 3, 4]
+    assert [run[1].tolist() for run in indexes._runs["result"]] == [[1, 0, 3, 2], [4]]
+    buffer.append("add", 0.0, 0.0, 0.0)
+    assert indexes.search("result", 1).tolist() == [1, 0, 3, 4]
+    assert [run[1].tolist() for run in indexes._runs["result"]] == [[5, 1, 0, 3, 4, 2]]  # The new run cascades into one
+    indexes.clear()
+    buffer.clear()
+    assert indexes.search("result").tolist() == []
+    with pytest.raises(ValueError):
+        indexes.search("operand1")
+    with pytest.raises(ValueError):
+        HistoryIndexes(buffer, ["operand2"])
+
+def test_index_runs_stay_logarithmic(monkeypatch):
+    """Test that repeated merges keep O(log n) runs, each more than twice the size of the next."""
+    monkeypatch.setattr(history_index, "MERGE_ROWS", 0)
+    buffer = HistoryBuffer()
+    indexes = HistoryIndexes(buffer, ["operand1"])
+    rng = np.random.default_rng(3)
+    for _ in range(200):
+        count = int(rng.integers(1, 20))
+        buffer.extend("add", rng.integers(0, 10, count).astype(float), None, np.zeros(count))
+        indexes.search("operand1", 4, 4)
+    sizes = [len(values) for values, _ in indexes._runs["operand1"]]
+    assert sum(sizes) == len(buffer)
+    assert all(older > 2 * newer for older, newer in zip(sizes, sizes[1:]))
+    operand1 = buffer.column("operand1")
+    assert indexes.search("operand1", 4, 4).tolist() == np.flatnonzero(operand1 == 4).tolist()
+
+def test_indexes_refuse_bounded_and_mapped_history(tmp_path):
+    """Test that indexes are refused, or dropped, for history that keeps rows outside the buffer."""
+    file_path = str(tmp_path / "history.rec")
+    record_random_history(500)
+    Calculations.save_history(file_path)
+
+    Calculations.configure_indexes(["result"])
+    Calculations.load_history(file_path)  # Loading a memory-mapped file drops the indexes
+    assert Calculations._indexes is None
+    with pytest.raises(ValueError, match="memory-mapped"):
+        Calculations.configure_indexes(["result"])
+    pd.testing.assert_frame_equal(Calculations.query("result", low=-5, high=5),
+                                  scan(Calculations.get_history(), "result", -5, 5))
+
+    Calculations.clear_history()
+    Calculations.configure_indexes(["result"])
+    Calculations.configure_history(10, str(tmp_path / "spill.csv"))  # So does bounding the history
+    assert Calculations._indexes is None
+    with pytest.raises(ValueError, match="unbounded"):
+        Calculations.configure_indexes(["result"])
+    with pytest.raises(ValueError, match="unbounded"):
+        HistoryIndexes(RingHistoryBuffer(10))
+
+def test_load_history_resets_the_indexes(tmp_path):
+    """Test that loading a non-mapped file replaces the indexed rows."""
+    file_path = str(tmp_path / "history.csv")
+    record_random_history(500)
+    Calculations.save_history(file_path)
+    Calculations.configure_indexes(["result"])
+    record_random_history(200, seed=2)
+    assert len(Calculations.query("result")) == 700
+    Calculations.load_history(file_path)
+    pd.testing.assert_frame_equal(Calculations.query("result", low=-5, high=5),
+                                  scan(Calculations.get_history(), "result", -5, 5))
+    assert len(Calculations.query("result")) == 500
+
+def test_query_without_an_index_scans():
+    """Test that unindexed columns fall back to a scan and unknown columns are rejected."""
+    Calculations.record_batch("add", [1.0, 2.0], [3.0, 4.0], [4.0, 6.0])
+    assert Calculations.query("operand2", value=4.0)["result"].tolist() == [6.0]
+    with pytest.raises(ValueError):
+        HistoryFacade().query("answer", value=1)
+
+def test_configure_indexes_from_env(monkeypatch):
+    """Test that HISTORY_INDEXES configures the indexed columns and invalid columns are ignored."""
+    monkeypatch.setenv("HISTORY_INDEXES", "result, operation")
+    HistoryFacade().configure_from_env()
+    assert Calculations._indexes.columns == ("result", "operation")
+    monkeypatch.setenv("HISTORY_INDEXES", "answer")
+    HistoryFacade().configure_from_env()
+    assert Calculations._indexes.columns == ("result", "operation")
@@ -0,0 +1,72 @@
+"""Unit tests for journal (append-only) history saves and compaction."""
+
+import os
+import pytest
+from calculator.calculations import Calculations
+from calculator.history_facade.history_facade import HistoryFacade
+from calculator.plugins.compact_history import CompactHistoryCommand
+
+@pytest.fixture
+def history_file(tmp_path, monkeypatch):
+    """Point the history file at a temporary path in journal mode and start from an empty history."""
+    file_path = str(tmp_path / "history.csv")
+    monkeypatch.setenv("HISTORY_FILE_PATH", file_path)
+    monkeypatch.setenv("HISTORY_SAVE_MODE", "journal")
+    Calculations.clear_history()
+    yield file_path
+    Calculations.clear_history()
+
+def journal_rows(file_path):
+    """Count the data rows in the journal of a history file."""
+    with open(Calculations.journal_path(file_path), encoding="utf-8") as journal:
+        return sum(1 for _ in journal) - 1  # Minus the header
+
+def test_journal_appends_only_new_rows(history_file):
+    """Test that the first save writes a snapshot and later saves append only new rows to the journal."""
+    facade = HistoryFacade()
+    Calculations.record_batch("add", [1, 2], [1, 2], [2, 4])
+    facade.save_history()
+    assert not os.path.exists(Calculations.journal_path(history_file))
+
+    Calculations.record_batch("subtract", [5], [3], [2])
+    facade.save_history()
+    facade.save_history()  # Nothing new, so nothing appended
+    Calculations.record_batch("multiply", [3], [3], [9])
+    facade.save_history()
+    assert journal_rows(history_file) == 2
+
+    Calculations.clear_history()
+    facade.load_history()
+    assert Calculations.get_history()["operation"].tolist() == ["add", "add", "subtract", "multiply"]
+
+def test_compaction_merges_journal_into_snapshot(history_file, capsys):
+    """Test that compaction folds the journal into the snapshot and removes it."""
+    facade = HistoryFacade()
+    Calculations.record_batch("add", [1], [1], [2])
+    facade.save_history()
+    Calculations.record_batch("divide", [8], [2], [4])
+    facade.save_history()
+
+    CompactHistoryCommand().execute()
+    assert "History journal compacted successfully." in capsys.readouterr().out
+    assert not os.path.exists(Calculations.journal_path(history_file))
+
+    Calculations.clear_history()
+    facade.load_history()
+    assert Calculations.get_history()["result"].tolist() == [2.0, 4.0]
+
+def test_save_after_clear_writes_fresh_snapshot(history_file):
+    """Test that clearing history makes the next journal-mode save rewrite the snapshot."""
+    facade = HistoryFacade()
+    Calculations.record_batch("add", [1], [1], [2])
+    facade.save_history()
+    Calculations.record_batch("add", [2], [2], [4])
+    facade.save_history()
+
+    Calculations.clear_history()
+    Calculations.record_batch("sqrt", [9], None, [3])
+    facade.save_history()
+    assert not os.path.exists(Calculations.journal_path(history_file))
+
+    facade.load_history()
+    assert Calculations.get_history()["operation"].tolist() == ["sqrt"]
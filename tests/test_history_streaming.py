@@ -0,0 +1,93 @@
+"""Unit tests for streaming history reads with row-range, operation filter and column projection."""
+
+import importlib.util
+import numpy as np
+import pandas as pd
+import pytest
+from calculator.calculations import Calculations
+from calculator.history_facade.history_facade import HistoryFacade
+from calculator.history_formats import count_rows, iter_history_file, write_history
+
+HAS_PYARROW = importlib.util.find_spec("pyarrow") is not None
+NEEDS_PYARROW = pytest.mark.skipif(not HAS_PYARROW, reason="pyarrow not installed")
+
+FILE_NAMES = [
+    "history.csv",
+    "history.npz",
+    "history.rec",
+    pytest.param("history.parquet", marks=NEEDS_PYARROW),
+    pytest.param("history.feather", marks=NEEDS_PYARROW),
+]
+
+ROWS = 25
+
+def sample_history():
+    """Build a history whose operations cycle through add, divide and sqrt and whose operand1 is the row number."""
+    operations = ["add", "divide", "sqrt"]
+    return pd.DataFrame({
+        "operation": [operations[i % 3] for i in range(ROWS)],
+        "operand1": np.arange(ROWS, dtype=float),
+        "operand2": np.ones(ROWS),
+        "result": np.arange(ROWS, dtype=float)
+    })
+
+@pytest.fixture(params=FILE_NAMES)
+def history_file(request, tmp_path):
+    """Write the sample history in each format (parquet with small row groups)."""
+    file_path = str(tmp_path / request.param)
+    if file_path.endswith(".parquet"):
+        sample_history().to_parquet(file_path, index=False, row_group_size=4)
+    else:
+        write_history(sample_history(), file_path)
+    return file_path
+
+def test_streams_in_chunks(history_file):
+    """Test that the whole file is returned in chunks of at most chunksize rows."""
+    chunks = list(iter_history_file(history_file, chunksize=10))
+    assert all(len(chunk) <= 10 for chunk in chunks)
+    assert pd.concat(chunks)["operand1"].tolist() == list(range(ROWS))
+    assert count_rows(history_file) == ROWS
+
+def test_row_range_filter_and_projection(history_file):
+    """Test that row range, operation filter and projection are applied together."""
+    chunks = list(iter_history_file(history_file, chunksize=3, start=5, stop=20,
+                                    operations=["divide"], columns=["operand1", "result"]))
+    frame = pd.concat(chunks)
+    assert list(frame.columns) == ["operand1", "result"]
+    assert frame["operand1"].tolist() == [float(i) for i in range(5, 20) if i % 3 == 1]
+
+def test_empty_selection(history_file):
+    """Test that selections with no rows yield nothing."""
+    assert not list(iter_history_file(history_file, start=10, stop=10))
+    assert not list(iter_history_file(history_file, operations=["tan"]))
+
+def test_invalid_arguments(tmp_path):
+    """Test that unknown columns and negative bounds are rejected."""
+    file_path = str(tmp_path / "history.csv")
+    write_history(sample_history(), file_path)
+    with pytest.raises(ValueError):
+        list(iter_history_file(file_path, columns=["colour"]))
+    with pytest.raises(ValueError):
+        list(iter_history_file(file_path, start=-1))
+
+def test_load_history_with_selection_includes_journal(tmp_path, monkeypatch):
+    """Test that a filtered load spans the snapshot and its journal tail."""
+    file_path = str(tmp_path / "history.csv")
+    monkeypatch.setenv("HISTORY_FILE_PATH", file_path)
+    monkeypatch.setenv("HISTORY_SAVE_MODE", "journal")
+    facade = HistoryFacade()
+    Calculations.clear_history()
+    Calculations.record_batch("add", [1, 2], [1, 1], [2, 3])
+    facade.save_history()
+    Calculations.record_batch("divide", [9, 8], [3, 2], [3, 4])
+    facade.save_history()  # Journaled
+
+    facade.load_history(start=1, operations=["divide", "add"])
+    assert Calculations.get_history()["operand1"].tolist() == [2.0, 9.0, 8.0]
+
+    facade.load_history(stop=3, operations=["divide"])
+    assert Calculations.get_history()["operand1"].tolist() == [9.0]
+
+    streamed = pd.concat(facade.stream_history(columns=["result"]))
+    assert streamed["result"].tolist() == [2.0, 3.0, 3.0, 4.0]
+    Calculations.clear_history()
@@ -0,0 +1,38 @@
+"""Import-time budget check for REPL startup, based on `python -X importtime`."""
+
+import os
+import subprocess
+import sys
+
+# Cumulative import time allowed for `import main`, in microseconds. Startup currently takes
+# well under 100 ms; the budget leaves room for slow CI machines while still catching an
+# eager pandas import (several hundred ms on its own).
+IMPORT_BUDGET_US = 500_000
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def import_times(statement):
+    """Run a statement under -X importtime and return {module: cumulative microseconds}."""
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        cwd=PROJECT_ROOT, capture_output=True, text=True, check=True
+    )
+    times = {}
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, module = line[len("import time:"):].split("|")
+        times[module.strip()] = int(cumulative)
+    return times
+
+def test_main_import_is_within_budget():
+    """Test that importing main stays within the startup budget."""
+    times = import_times("import main")
+    assert times["main"] < IMPORT_BUDGET_US, f"import main took {times['main']} us"
+
+def test_main_import_skips_heavy_and_plugin_modules():
+    """Test that pandas, NumPy and plugin modules are not imported until they are used."""
+    times = import_times("import main")
+    assert "pandas" not in times
+    assert "numpy" not in times
+    assert not [module for module in times if module.startswith("calculator.plugins.")]
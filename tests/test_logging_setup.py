@@ -0,0 +1,103 @@
+"""Unit tests for the JSON formatter, log sampling and queued logging."""
+
+import json
+import logging
+import threading
+import pytest
+from calculator.logging_setup import JsonFormatter, SamplingFilter, parse_sampling, start_queue_logging, \
+    stop_queue_logging
+
+class ListHandler(logging.Handler):
+    """A handler that keeps the formatted records it receives."""
+
+    def __init__(self):
+        super().__init__()
+        self.lines = []
+
+    def emit(self, record):
+        self.lines.append(self.format(record))
+
+def make_record(name="calculator.calculations", level=logging.INFO, msg="Added %s", args=("row",)):
+    """Build a log record without going through a logger."""
+    return logging.LogRecord(name, level, __file__, 1, msg, args, None)
+
+def test_json_formatter():
+    """Test that records are formatted as JSON objects with the message arguments applied."""
+    entry = json.loads(JsonFormatter().format(make_record()))
+    assert entry["level"] == "INFO"
+    assert entry["logger"] == "calculator.calculations"
+    assert entry["message"] == "Added row"
+    assert "time" in entry
+
+def test_parse_sampling():
+    """Test parsing of logger=N sampling rules."""
+    assert parse_sampling("calculator=100, calculator.plugins=10") == {"calculator": 100, "calculator.plugins": 10}
+    assert parse_sampling("") == {}
+    with pytest.raises(ValueError, match="Invalid log sampling entry"):
+        parse_sampling("calculator=often")
+
+def test_sampling_filter_keeps_one_in_n():
+    """Test that one in N records is kept, per logger, with the most specific rule applied."""
+    sampling = SamplingFilter({"calculator": 10, "calculator.plugins": 2})
+    kept = sum(sampling.filter(make_record()) for _ in range(100))
+    assert kept == 10
+    kept = sum(sampling.filter(make_record(name="calculator.plugins.add")) for _ in range(100))
+    assert kept == 50
+    assert all(sampling.filter(make_record(name="__main__")) for _ in range(5))
+
+def test_sampling_filter_keeps_warnings():
+    """Test that warnings and errors are never sampled out."""
+    sampling = SamplingFilter({"calculator": 1000})
+    assert all(sampling.filter(make_record(level=logging.WARNING)) for _ in range(10))
+
+def test_queue_logging_delivers_records_on_listener_thread():
+    """Test that records logged through the queue reach the listener's handlers."""
+    root = logging.getLogger()
+    saved_handlers, saved_level = root.handlers[:], root.level
+    handler = ListHandler()
+    handler.setFormatter(JsonFormatter())
+    listener = start_queue_logging([handler], logging.INFO, {"test_queue_logging": 5})
+    try:
+        test_logger = logging.getLogger("test_queue_logging")
+        for index in range(10):
+            test_logger.info("Message %d", index)
+        test_logger.error("Failure")
+    finally:
+        stop_queue_logging(listener)
+        root.handlers[:] = saved_handlers
+        root.setLevel(saved_level)
+
+    messages = [json.loads(line)["message"] for line in handler.lines]
+    assert messages == ["Message 0", "Message 5", "Failure"]
+
+def test_sampling_filter_counts_across_threads():
+    """Test that records filtered on several threads are counted exactly once each."""
+    sampling = SamplingFilter({"calculator": 10})
+    kept = []
+
+    def worker():
+        kept.append(sum(sampling.filter(make_record()) for _ in range(1000)))
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sum(kept) == 800
+
+def test_queue_logging_formats_arguments_when_logged():
+    """Test that a mutable argument is logged as it was at the call, not when the listener runs."""
+    root = logging.getLogger()
+    saved_handlers, saved_level = root.handlers[:], root.level
+    handler = ListHandler()
+    listener = start_queue_logging([handler], logging.INFO)
+    try:
+        row = {"result": 1}
+        logging.getLogger("test_queue_logging").info("Row %s", row)
+        row["result"] = 2
+    finally:
+        stop_queue_logging(listener)
+        root.handlers[:] = saved_handlers
+        root.setLevel(saved_level)
+
+    assert handler.lines == ["Row {'result': 1}"]
@@ -1,5 +1,7 @@
 """Unit tests for the main calculator module and its REPL functionality."""
 
+import io
+import logging
 from decimal import Decimal, InvalidOperation
 from unittest.mock import patch
 import pytest
@@ -14,7 +16,7 @@ from calculator.plugins.save_history import SaveHistoryCommand
 from calculator.plugins.load_history import LoadHistoryCommand
 
 # Import main at the top level
-from main import main
+from main import main, run_script
 
 def setup_command_handler():
     """Set up the CommandHandler with available commands."""
@@ -162,3 +164,30 @@ def test_main_repl_with_invalid_command_format(mock_input):
 
         # Check that exit was called
         mock_print.assert_any_call("Exiting the calculator.")
+
+def test_run_script_buffers_output_and_reports_throughput():
+    """Test that script mode runs every command, skips comments and blank lines, and prints a summary."""
+    script = io.StringIO("add(1, 2)\n# a comment\n\ndivide(1, 0)\nmultiply(2, 3)\nexit\nadd(5, 5)\n")
+    output = io.StringIO()
+
+    commands, errors = run_script(setup_command_handler(), script, logging.getLogger(__name__), output)
+
+    assert (commands, errors) == (3, 1)
+    text = output.getvalue()
+    assert "Result: 3" in text
+    assert "Result: 6" in text
+    assert "Result: 10" not in text  # Commands after 'exit' are not run
+    assert "Processed 3 commands (1 errors)" in text
+
+def test_main_script_mode(tmp_path, capsys):
+    """Test that main runs commands from a script file when --script is given."""
+    script_file = tmp_path / "commands.txt"
+    script_file.write_text("add(2, 2)\nsubtract(9, 4)\n", encoding="utf-8")
+
+    main(["--script", str(script_file)])
+
+    captured = capsys.readouterr().out
+    assert "Result: 4" in captured
+    assert "Result: 5" in captured
+    assert "Processed 2 commands (0 errors)" in captured
+    assert "Welcome to the Calculator REPL!" not in captured
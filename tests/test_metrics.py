@@ -0,0 +1,97 @@
+"""Unit tests for latency histograms, command/operation timing and the stats command."""
+
+from decimal import Decimal
+import json
+import os
+import subprocess
+import sys
+import pytest
+from calculator import Calculator
+from calculator.calculations import Calculations
+from calculator.commands import CommandHandler
+from calculator.metrics import LatencyHistogram, bucket_bounds, bucket_index, configure_metrics, get_metrics
+from calculator.plugins.add import AddCommand
+from calculator.plugins.stats import StatsCommand
+
+@pytest.fixture
+def metrics():
+    """Enable empty latency metrics for a test, then disable them and clear the history it creates."""
+    yield configure_metrics(True)
+    configure_metrics(False)
+    Calculations.clear_history()
+
+def test_metrics_are_disabled_until_configured():
+    """Test that importing and using the calculator leaves metrics off, so library callers pay nothing for them."""
+    completed = subprocess.run(
+        [sys.executable, "-c", "from decimal import Decimal; from calculator import Calculator; "
+                               "from calculator.metrics import get_metrics; "
+                               "Calculator.add(Decimal(1), Decimal(2)); print(get_metrics())"],
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))), capture_output=True, text=True, check=True
+    )
+    assert completed.stdout.strip() == "None"
+
+def test_bucket_bounds_contain_value():
+    """Test that every value falls inside its bucket and buckets are at most 12.5% wide."""
+    for value in list(range(100)) + [1_000, 65_537, 1_234_567, 10**12]:
+        lowest, highest = bucket_bounds(bucket_index(value))
+        assert lowest <= value <= highest
+        assert highest - lowest <= max(lowest // 8, 0)
+
+def test_histogram_percentiles():
+    """Test percentiles, counts and errors of a histogram."""
+    histogram = LatencyHistogram()
+    for value in range(1, 1001):
+        histogram.record(value * 1000, error=value > 990)
+    summary = histogram.summary()
+    assert summary["count"] == 1000
+    assert summary["errors"] == 10
+    assert summary["p50_us"] == pytest.approx(500, rel=0.07)
+    assert summary["p95_us"] == pytest.approx(950, rel=0.07)
+    assert summary["p99_us"] == pytest.approx(990, rel=0.07)
+    assert summary["max_us"] == 1000
+
+def test_empty_histogram():
+    """Test that an empty histogram reports zeros."""
+    assert LatencyHistogram().summary()["p99_us"] == 0.0
+
+def test_commands_and_operations_are_timed(metrics):
+    """Test that execute_command and Calculator operations feed their histograms, errors included."""
+    command_handler = CommandHandler()
+    command_handler.register_command("add", AddCommand)
+    command_handler.execute_command("add", Decimal("1"), Decimal("2"))
+    with pytest.raises(ValueError):
+        command_handler.execute_command("add", Decimal("1"))
+    with pytest.raises(ValueError):
+        Calculator.divide(Decimal("1"), Decimal("0"))
+
+    snapshot = metrics.snapshot()
+    assert snapshot["command.add"]["count"] == 2
+    assert snapshot["command.add"]["errors"] == 1
+    assert snapshot["operation.add"]["count"] == 1
+    assert snapshot["operation.divide"]["errors"] == 1
+
+def test_disabled_metrics_record_nothing():
+    """Test that disabling metrics turns timing off."""
+    configure_metrics(False)
+    try:
+        Calculator.add(Decimal("1"), Decimal("2"))
+        assert get_metrics() is None
+        assert StatsCommand().execute() == {}
+    finally:
+        configure_metrics(True)
+        Calculations.clear_history()
+
+def test_stats_command(metrics, capsys):
+    """Test that the stats command prints and returns the latency summary."""
+    Calculator.add(Decimal("1"), Decimal("2"))
+    snapshot = StatsCommand().execute()
+    assert snapshot["operation.add"]["count"] == 1
+    output = capsys.readouterr().out
+    assert "operation.add" in output and "p99 us" in output
+
+def test_metrics_dump(metrics, tmp_path):
+    """Test that the snapshot can be written to a JSON file."""
+    Calculator.add(Decimal("1"), Decimal("2"))
+    file_path = tmp_path / "metrics.json"
+    metrics.dump(str(file_path))
+    assert json.loads(file_path.read_text())["operation.add"]["count"] == 1
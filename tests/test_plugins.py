@@ -1,47 +1,116 @@
 """Unit tests for the PluginLoader class in the calculator.plugins module."""
 
-from unittest.mock import MagicMock 
+from decimal import Decimal
+import os
+import shutil
+import sys
 import pytest 
 from calculator.commands import CommandHandler
-from calculator.plugins import PluginLoader
-
-# Mock command classes
-class ValidCommand:
-    """A valid command for testing purposes."""
-    # No methods or properties; empty class
-
-class InvalidCommand:
-    """An invalid command for testing purposes."""
-    # No methods or properties; empty class
+from calculator.plugins import PluginLoader, build_manifest, load_manifest
 
 @pytest.fixture
 def command_handler():
     """Create a mock command handler."""
     return CommandHandler()
 
+PLUGIN_SOURCE = '''
+from decimal import Decimal
+from calculator.commands import Command
+
+class PowerCommand(Command):
+    def __init__(self, a: Decimal, b: Decimal):
+        self.a = a
+        self.b = b
+
+    def execute(self):
+        return self.a ** self.b
+'''
+
 @pytest.fixture
-def plugin_loader(command_handler):
-    """Create a plugin loader with a mock command handler."""
-    return PluginLoader(command_handler)
-
-def test_load_invalid_plugins(plugin_loader, monkeypatch):
-    """Test that invalid plugins are ignored."""
-    # Mock the import to return the InvalidCommand
-    monkeypatch.setattr('importlib.import_module', lambda x: MagicMock(**{'InvalidCommand': InvalidCommand}))
-    
-    # Attempt to load plugins
+def plugins_dir(tmp_path):
+    """Create a plugins directory with one command plugin and one package without a command."""
+    directory = tmp_path / "plugins"
+    (directory / "power").mkdir(parents=True)
+    (directory / "power" / "__init__.py").write_text(PLUGIN_SOURCE)
+    (directory / "helpers").mkdir()
+    (directory / "helpers" / "__init__.py").write_text("VALUE = 1\n")
+    return directory
+
+@pytest.fixture
+def plugin_loader(command_handler, plugins_dir, tmp_path, monkeypatch):
+    """Create a plugin loader over the temporary plugins package, with its manifest in tmp_path."""
+    monkeypatch.syspath_prepend(str(tmp_path))
+    yield PluginLoader(command_handler, plugins_dir=str(plugins_dir), package="plugins",
+                       manifest_path=str(tmp_path / "manifest.json"))
+    for module in [name for name in sys.modules if name == "plugins" or name.startswith("plugins.")]:
+        del sys.modules[module]
+
+def test_load_invalid_plugins(plugin_loader, plugins_dir):
+    """Test that a class which is not a Command subclass is ignored."""
+    (plugins_dir / "invalid_command").mkdir()
+    (plugins_dir / "invalid_command" / "__init__.py").write_text("class InvalidCommand:\n    pass\n")
     plugin_loader.load_plugins()
-    
-    # Check that no invalid command is registered
     assert 'invalid_command' not in plugin_loader.command_handler.commands
+    assert plugin_loader.command_handler.execute_command("power", Decimal("2"), Decimal("3")) == Decimal("8")
 
-def test_load_command_with_no_class(plugin_loader, monkeypatch):
+def test_load_command_with_no_class(plugin_loader, plugins_dir):
     """Test that items that are not classes are ignored."""
-    # Mock the import to return an object instead of a command class
-    monkeypatch.setattr('importlib.import_module', lambda x: MagicMock(**{'NotACommand': 'string'}))
-    
-    # Attempt to load plugins
+    (plugins_dir / "not_a_command").mkdir()
+    (plugins_dir / "not_a_command" / "__init__.py").write_text("NotACommand = 'string'\n")
     plugin_loader.load_plugins()
-    
-    # Check that no non-class is registered
     assert 'not_a_command' not in plugin_loader.command_handler.commands
+    assert 'helpers' not in plugin_loader.command_handler.commands
+
+def test_manifest_describes_bundled_plugins(tmp_path):
+    """Test that the manifest records module, class, arity and argument types of the bundled plugins."""
+    plugins = load_manifest(manifest_path=str(tmp_path / "manifest.json"))["plugins"]
+    assert plugins["add"] == {"module": "calculator.plugins.add", "class": "AddCommand", "arity": 2,
+                              "min_arity": 2, "arg_types": ["Decimal", "Decimal"], "call": "init"}
+    assert plugins["sin"]["arity"] == 1 and plugins["sin"]["call"] == "execute"
+    assert plugins["menu"]["arity"] == 0
+    assert plugins["display_history"]["arity"] == 2 and plugins["display_history"]["min_arity"] == 0
+    assert plugins["display_history"]["arg_types"] == ["int", "int"]  # Optional[int] is coerced like int
+    assert plugins["tail_history"]["arity"] == 1 and plugins["tail_history"]["call"] == "execute"
+
+def test_manifest_ignores_packages_without_commands(plugins_dir, tmp_path):
+    """Test that only packages defining a Command subclass are listed."""
+    manifest = build_manifest(str(plugins_dir), "plugins")
+    assert list(manifest["plugins"]) == ["power"]
+    assert manifest["plugins"]["power"]["module"] == "plugins.power"
+    assert set(manifest["files"]) == {"power", "helpers"}
+
+def test_manifest_is_cached(plugins_dir, tmp_path, monkeypatch):
+    """Test that a current manifest is read from disk without scanning plugin sources."""
+    manifest_path = str(tmp_path / "manifest.json")
+    first = load_manifest(str(plugins_dir), "plugins", manifest_path)
+
+    def fail(*args):
+        raise AssertionError("plugin sources were rescanned")
+    monkeypatch.setattr("calculator.plugins.scan_plugin", fail)
+    assert load_manifest(str(plugins_dir), "plugins", manifest_path) == first
+
+def test_manifest_is_rebuilt_when_a_plugin_changes(plugins_dir, tmp_path):
+    """Test that modifying, adding or removing a plugin invalidates the cached manifest."""
+    manifest_path = str(tmp_path / "manifest.json")
+    load_manifest(str(plugins_dir), "plugins", manifest_path)
+
+    plugin_file = plugins_dir / "power" / "__init__.py"
+    plugin_file.write_text(PLUGIN_SOURCE.replace("PowerCommand", "PowCommand"))
+    os.utime(plugin_file, ns=(0, 0))  # Make sure the mtime differs even on coarse filesystems
+    assert load_manifest(str(plugins_dir), "plugins", manifest_path)["plugins"]["power"]["class"] == "PowCommand"
+
+    (plugins_dir / "negate").mkdir()
+    (plugins_dir / "negate" / "__init__.py").write_text(
+        "from calculator.commands import Command\n\nclass NegateCommand(Command):\n"
+        "    def execute(self, a):\n        return -a\n")
+    assert "negate" in load_manifest(str(plugins_dir), "plugins", manifest_path)["plugins"]
+
+    shutil.rmtree(plugins_dir / "negate")
+    assert "negate" not in load_manifest(str(plugins_dir), "plugins", manifest_path)["plugins"]
+
+def test_load_plugins_registers_commands_lazily(command_handler, tmp_path):
+    """Test that plugins are registered as import strings and resolved on first execution."""
+    loader = PluginLoader(command_handler, manifest_path=str(tmp_path / "manifest.json"))
+    loader.load_plugins()
+    assert command_handler.commands["add"] == "calculator.plugins.add:AddCommand"
+    assert command_handler.execute_command("add", Decimal("1"), Decimal("2")) == Decimal("3")
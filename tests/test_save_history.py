@@ -7,8 +7,9 @@ from calculator.plugins.save_history import SaveHistoryCommand
 # Set up logging for the tests
 logger = logging.getLogger(__name__)
 
-def test_save_history_command_success(caplog):
+def test_save_history_command_success(caplog, monkeypatch, tmp_path):
     """Test that SaveHistoryCommand executes successfully and logs the correct message."""
+    monkeypatch.setenv("HISTORY_FILE_PATH", str(tmp_path / "history.csv"))  # Keep the saved file out of the project
     command = SaveHistoryCommand()
 
     with caplog.at_level(logging.INFO):
@@ -0,0 +1,176 @@
+"""Tests for the asyncio JSON-lines server and its load-generator client."""
+
+import asyncio
+import contextlib
+from decimal import Decimal
+import io
+import json
+import os
+import tempfile
+import threading
+import time
+from unittest.mock import patch
+import pytest
+from benchmarks.load_client import run_load
+from calculator.commands import Command, CommandHandler
+from calculator.plugins.add import AddCommand
+from calculator.plugins.divide import DivideCommand
+from calculator.server import MAX_LINE_BYTES, CalculatorServer, parse_address
+from main import main
+
+class SlowCommand(Command):
+    """Sleeps for a moment and records how many calls overlapped."""
+
+    lock = threading.Lock()
+    running = 0
+    peak = 0
+
+    def execute(self):
+        with SlowCommand.lock:
+            SlowCommand.running += 1
+            SlowCommand.peak = max(SlowCommand.peak, SlowCommand.running)
+        time.sleep(0.01)
+        with SlowCommand.lock:
+            SlowCommand.running -= 1
+        return "done"
+
+def make_handler():
+    """A CommandHandler with add, divide and slow registered."""
+    command_handler = CommandHandler()
+    command_handler.register_command("add", AddCommand)
+    command_handler.register_command("divide", DivideCommand)
+    command_handler.register_command("slow", SlowCommand)
+    return command_handler
+
+async def exchange(server: CalculatorServer, payload: bytes, address: str = "127.0.0.1:0") -> list:
+    """Sends payload on one connection, closes the write side and returns the decoded responses."""
+    listener = await server.start(address)
+    async with listener:
+        if address.startswith("unix:"):
+            reader, writer = await asyncio.open_unix_connection(address[len("unix:"):])
+        else:
+            reader, writer = await asyncio.open_connection(*listener.sockets[0].getsockname()[:2])
+        writer.write(payload)
+        await writer.drain()
+        writer.write_eof()
+        lines = [json.loads(line) for line in (await reader.read()).splitlines()]
+        writer.close()
+        return lines
+
+def requests_payload(*requests) -> bytes:
+    return b"".join(json.dumps(request).encode() + b"\n" for request in requests)
+
+def test_parse_address():
+    """Test that TCP and Unix socket addresses are parsed and bad ones rejected."""
+    assert parse_address("127.0.0.1:8765") == ("tcp", "127.0.0.1", 8765)
+    assert parse_address("unix:/tmp/calc.sock") == ("unix", "/tmp/calc.sock", None)
+    with pytest.raises(ValueError):
+        parse_address("localhost")
+
+def test_pipelined_requests_are_answered_in_order():
+    """Test that pipelined requests get one response each, in request order."""
+    server = CalculatorServer(make_handler())
+    payload = requests_payload(*({"id": i, "cmd": "add", "args": [str(i), "0.5"]} for i in range(200)))
+    with contextlib.redirect_stdout(io.StringIO()):
+        responses = asyncio.run(exchange(server, payload))
+
+    assert [response["id"] for response in responses] == list(range(200))
+    assert all(response["ok"] for response in responses)
+    assert Decimal(responses[7]["result"]) == Decimal("7.5")
+    assert server.requests == 200
+
+def test_error_responses():
+    """Test that bad requests and failing commands produce error responses without closing the connection."""
+    server = CalculatorServer(make_handler())
+    payload = (requests_payload({"id": 1, "cmd": "divide", "args": ["1", "0"]}) + b"not json\n\n"
+               + requests_payload({"id": 2, "cmd": "nope"}, {"id": 3, "cmd": "add", "args": ["1"]},
+                                  {"id": 4, "cmd": "add", "args": "1 2"}, {"id": 5, "cmd": "add", "args": [1, 2]}))
+    with contextlib.redirect_stdout(io.StringIO()):
+        responses = asyncio.run(exchange(server, payload))
+
+    assert responses[0] == {"id": 1, "ok": False, "error": "Cannot divide by zero"}
+    assert responses[1]["error"].startswith("Invalid request")
+    assert responses[2] == {"id": 2, "ok": False, "error": "Unknown command: nope"}
+    assert "takes 2 argument(s)" in responses[3]["error"]
+    assert responses[4]["ok"] is False
+    assert responses[5] == {"id": 5, "ok": True, "result": "3"}
+
+def test_oversized_request_closes_connection():
+    """Test that a request line over MAX_LINE_BYTES is rejected and ends the connection."""
+    server = CalculatorServer(make_handler())
+    payload = requests_payload({"cmd": "add", "args": ["1", "2"]}) + b"x" * (MAX_LINE_BYTES * 2) + b"\n"
+    with contextlib.redirect_stdout(io.StringIO()):
+        responses = asyncio.run(exchange(server, payload))
+    assert responses[0]["result"] == "3"
+    assert "exceeds" in responses[-1]["error"]
+
+def test_max_in_flight_limits_concurrent_commands():
+    """Test that a connection never has more than max_in_flight commands running on the worker pool."""
+    SlowCommand.peak = 0
+    server = CalculatorServer(make_handler(), max_in_flight=2, workers=8)
+    try:
+        responses = asyncio.run(exchange(server, requests_payload(*({"id": i, "cmd": "slow"} for i in range(12)))))
+    finally:
+        server.close()
+    assert [response["result"] for response in responses] == ["done"] * 12
+    assert SlowCommand.peak == 2
+
+class BrokenWriter:
+    """A stream writer whose client has gone away: every drain fails."""
+
+    def __init__(self):
+        self.closed = False
+
+    def get_extra_info(self, name):
+        return None
+
+    def write(self, data):
+        pass
+
+    async def drain(self):
+        raise ConnectionResetError("client went away")
+
+    def close(self):
+        self.closed = True
+
+def test_connection_ends_when_responses_cannot_be_written():
+    """Test that the read loop stops instead of waiting forever for a slot when the responder fails."""
+    server = CalculatorServer(make_handler(), max_in_flight=1)
+    writer = BrokenWriter()
+
+    async def serve():
+        reader = asyncio.StreamReader()
+        reader.feed_data(requests_payload(*({"id": i, "cmd": "add", "args": ["1", "2"]} for i in range(5))))
+        await asyncio.wait_for(server.handle_connection(reader, writer), timeout=5)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        asyncio.run(serve())
+    assert writer.closed
+    assert server.connections == 0
+    assert server.requests == 1
+
+def test_max_in_flight_must_be_positive():
+    """Test that a connection must be allowed at least one open request."""
+    with pytest.raises(ValueError):
+        CalculatorServer(make_handler(), max_in_flight=0)
+
+def test_load_client_over_unix_socket():
+    """Test that the load client reports throughput and latency against a Unix socket server."""
+    async def run(address):
+        listener = await CalculatorServer(make_handler(), max_in_flight=4).start(address)
+        async with listener:
+            return await run_load(address, connections=3, requests=100, pipeline=8, command="add", args=("1", "2"))
+
+    with tempfile.TemporaryDirectory() as directory, contextlib.redirect_stdout(io.StringIO()):
+        report = asyncio.run(run("unix:" + os.path.join(directory, "calc.sock")))
+    assert report["count"] == 100
+    assert report["errors"] == 0
+    assert report["requests_per_sec"] > 0
+    assert 0 < report["p50_us"] <= report["p99_us"] <= report["max_us"]
+
+def test_main_serve_mode():
+    """Test that main starts the server when --serve is given."""
+    with patch("main.run_server") as run_server:
+        main(["--serve", "127.0.0.1:0", "--max-in-flight", "8", "--workers", "2"])
+    _, address, _, max_in_flight, workers = run_server.call_args.args
+    assert (address, max_in_flight, workers) == ("127.0.0.1:0", 8, 2)